@@ -2,6 +2,7 @@ from typing import Optional
 
 from django import forms
 from django.core.exceptions import ValidationError
+from django.db.models.expressions import RawSQL
 
 
 def clean_int(value) -> Optional[int]:
@@ -9,3 +10,14 @@ def clean_int(value) -> Optional[int]:
         return forms.IntegerField().clean(value)
     except ValidationError:
         return None
+
+
+class RawSubquery(RawSQL):
+    """
+    Подзапрос SQL для `__in`. Сам `RawSQL` берется в скобки, а `__in`
+    добавляет еще одни, и `IN ((SELECT …))` становится сравнением
+    со скалярным подзапросом — с первой строкой его результата.
+    """
+
+    def as_sql(self, compiler, connection):
+        return self.sql, self.params
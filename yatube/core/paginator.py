@@ -0,0 +1,294 @@
+import base64
+import binascii
+import collections.abc
+import datetime
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
+from django.db import models
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+CURSOR_NEXT = "n"
+CURSOR_PREVIOUS = "p"
+
+COUNT_CACHE_TIMEOUT = 60 * 60
+
+COUNT_LIMIT = 10000
+
+PAGE_WINDOW_ON_EACH_SIDE = 2
+
+Position = Tuple[str, datetime.datetime, int]
+
+Prefetch = Callable[[List[models.Model]], None]
+
+
+class PrefetchList(collections.abc.Sequence):
+    """
+    Объекты страницы, загружаемые при первом обращении. Загруженный список
+    передается в `prefetch`, чтобы подгрузить связанные данные всей
+    страницы одним запросом. Если страница не выводится (например, из-за
+    кэша фрагмента), ни загрузки, ни подгрузки не происходит.
+    """
+
+    def __init__(
+        self, object_list: Iterable[models.Model], prefetch: Prefetch
+    ):
+        self.object_list = object_list
+        self.prefetch = prefetch
+
+    @cached_property
+    def items(self) -> List[models.Model]:
+        items = list(self.object_list)
+        self.prefetch(items)
+
+        return items
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, index):
+        return self.items[index]
+
+
+class PrefetchPaginator(Paginator):
+    """Паджинатор, передающий объекты страницы в `prefetch`."""
+
+    def __init__(
+        self,
+        object_list,
+        per_page: int,
+        prefetch: Optional[Prefetch] = None,
+        **kwargs,
+    ):
+        super().__init__(object_list, per_page, **kwargs)
+        self.prefetch = prefetch
+
+    def _get_page(self, object_list, number: int, paginator: Paginator):
+        if self.prefetch is not None:
+            object_list = PrefetchList(object_list, self.prefetch)
+
+        return super()._get_page(object_list, number, paginator)
+
+
+class CachedCountPaginator(PrefetchPaginator):
+    """
+    Паджинатор, хранящий общее количество объектов в кэше под `count_key`.
+
+    Ключ поддерживается в актуальном состоянии снаружи (инкрементом или
+    удалением при изменении данных), `COUNT(*)` выполняется только при
+    его отсутствии. Объекты страницы передаются в `prefetch`
+    (см. `PrefetchList`).
+    """
+
+    def __init__(
+        self,
+        object_list,
+        per_page: int,
+        count_key: str,
+        timeout: int = COUNT_CACHE_TIMEOUT,
+        **kwargs,
+    ):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_key = count_key
+        self.timeout = timeout
+
+    @cached_property
+    def count(self) -> int:
+        count = cache.get(self.count_key)
+
+        if count is None:
+            count = super().count
+            cache.set(self.count_key, count, self.timeout)
+
+        return count
+
+
+class CappedCountPaginator(Paginator):
+    """
+    Паджинатор, считающий не больше `count_limit` объектов: `COUNT(*)`
+    по подзапросу с `LIMIT` не просматривает всю выборку. Объекты дальше
+    лимита постранично недоступны — выборку нужно сузить фильтрами.
+    """
+
+    def __init__(
+        self,
+        object_list,
+        per_page: int,
+        count_limit: int = COUNT_LIMIT,
+        **kwargs,
+    ):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_limit = count_limit
+
+    @cached_property
+    def count(self) -> int:
+        return self.object_list[: self.count_limit].count()
+
+
+def page_window(
+    page: Page, on_each_side: int = PAGE_WINDOW_ON_EACH_SIDE
+) -> List[Optional[int]]:
+    """
+    Номера страниц вокруг текущей, первая и последняя страницы.
+    Пропуски обозначаются `None`.
+    """
+    number = page.number
+    num_pages = page.paginator.num_pages
+    window_start = max(number - on_each_side, 1)
+    window_end = min(number + on_each_side, num_pages)
+
+    pages: List[Optional[int]] = []
+
+    if window_start > 1:
+        pages.append(1)
+    if window_start > 2:
+        pages.append(None)
+
+    pages.extend(range(window_start, window_end + 1))
+
+    if window_end < num_pages - 1:
+        pages.append(None)
+    if window_end < num_pages:
+        pages.append(num_pages)
+
+    return pages
+
+
+class CursorPage(collections.abc.Sequence):
+    def __init__(
+        self,
+        object_list: Sequence[models.Model],
+        paginator: "CursorPaginator",
+        next_cursor: Optional[str],
+        previous_cursor: Optional[str],
+    ):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f"<Cursor page of {len(self)} items>"
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    def has_other_pages(self) -> bool:
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    Постраничный вывод по ключу `(created, id)` без `COUNT(*)` и `OFFSET`.
+
+    Курсор хранит направление и позицию крайнего элемента страницы,
+    поэтому стоимость запроса не зависит от глубины страницы. Объекты
+    страницы передаются в `prefetch` (см. `PrefetchList`).
+    """
+
+    def __init__(
+        self,
+        object_list: models.QuerySet,
+        per_page: int,
+        prefetch: Optional[Prefetch] = None,
+    ):
+        self.object_list = object_list
+        self.per_page = per_page
+        self.prefetch = prefetch
+
+    @staticmethod
+    def encode_cursor(direction: str, item: models.Model) -> str:
+        microseconds = (item.created - EPOCH) // datetime.timedelta(
+            microseconds=1
+        )
+        value = f"{direction}{microseconds}.{item.pk}"
+
+        return base64.urlsafe_b64encode(value.encode()).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: Optional[str]) -> Optional[Position]:
+        if not cursor:
+            return None
+
+        try:
+            value = base64.urlsafe_b64decode(
+                cursor + "=" * (-len(cursor) % 4)
+            ).decode()
+            direction = value[0]
+            microseconds, pk = value[1:].split(".")
+            created = EPOCH + datetime.timedelta(
+                microseconds=int(microseconds)
+            )
+            pk = int(pk)
+        except (binascii.Error, UnicodeDecodeError, IndexError, ValueError):
+            return None
+
+        if direction not in (CURSOR_NEXT, CURSOR_PREVIOUS):
+            return None
+
+        return direction, created, pk
+
+    def get_page(self, cursor: Optional[str]) -> CursorPage:
+        """
+        Страница после (или перед) позицией из курсора.
+        Некорректный курсор ведет на первую страницу.
+        """
+        position = self.decode_cursor(cursor)
+        limit = self.per_page + 1
+
+        if position is None:
+            items = list(self.object_list.order_by("-created", "-pk")[:limit])
+            has_next = len(items) > self.per_page
+            has_previous = False
+            items = items[: self.per_page]
+
+        elif position[0] == CURSOR_NEXT:
+            _, created, pk = position
+            items = list(
+                self.object_list.filter(
+                    models.Q(created__lt=created)
+                    | models.Q(created=created, pk__lt=pk)
+                ).order_by("-created", "-pk")[:limit]
+            )
+            has_next = len(items) > self.per_page
+            has_previous = True
+            items = items[: self.per_page]
+
+        else:
+            _, created, pk = position
+            items = list(
+                self.object_list.filter(
+                    models.Q(created__gt=created)
+                    | models.Q(created=created, pk__gt=pk)
+                ).order_by("created", "pk")[:limit]
+            )
+            has_next = True
+            has_previous = len(items) > self.per_page
+            items = items[: self.per_page][::-1]
+
+        next_cursor = None
+        previous_cursor = None
+
+        if items and has_next:
+            next_cursor = self.encode_cursor(CURSOR_NEXT, items[-1])
+
+        if items and has_previous:
+            previous_cursor = self.encode_cursor(CURSOR_PREVIOUS, items[0])
+
+        if self.prefetch is not None:
+            items = PrefetchList(items, self.prefetch)
+
+        return CursorPage(items, self, next_cursor, previous_cursor)
@@ -0,0 +1,68 @@
+import hashlib
+import os
+import re
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+CONTENT_NAME_RE = re.compile(r"(?:^|/)([0-9a-f]{2})/\1[0-9a-f]{62}(\.\w+)?$")
+
+
+def content_digest(content: File) -> str:
+    digest = hashlib.sha256()
+
+    for chunk in content.chunks():
+        digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def is_content_name(name: str) -> bool:
+    """Имя файла уже построено по содержимому (`ContentAddressedStorage`)."""
+    return bool(CONTENT_NAME_RE.search(name))
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Файловое хранилище с адресацией по содержимому.
+
+    Файл сохраняется под именем из SHA-256 содержимого в каталоге исходного
+    имени (`posts/ab/ab…ef.jpg`), расширение сохраняется. Одинаковые файлы
+    хранятся один раз: повторная запись возвращает имя уже существующего.
+    Так как файл могут разделять несколько записей, удалять его можно,
+    только когда на него больше никто не ссылается.
+    """
+
+    def content_name(self, name: str, content: File) -> str:
+        directory, basename = os.path.split(name)
+
+        # Имя уже построено по содержимому (пересохранение измененного
+        # файла): каталог старого хеша заменяется каталогом нового.
+        if is_content_name(name):
+            directory = os.path.dirname(directory)
+
+        digest = content_digest(content)
+        extension = os.path.splitext(basename)[1].lower()
+
+        return os.path.join(directory, digest[:2], digest + extension)
+
+    def save(self, name, content, max_length=None) -> str:
+        if name is None:
+            name = content.name
+
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+
+        name = self.content_name(name, content)
+
+        if self.exists(name):
+            return name
+
+        saved = self._save(name, content)
+
+        # Тот же файл успел записать параллельный запрос, а `_save`
+        # сохранил копию под свободным именем.
+        if saved != name:
+            self.delete(saved)
+
+        return name
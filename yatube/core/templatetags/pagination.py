@@ -0,0 +1,9 @@
+from core.paginator import page_window as get_page_window
+from django import template
+
+register = template.Library()
+
+
+@register.filter
+def page_window(page):
+    return get_page_window(page)
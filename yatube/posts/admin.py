@@ -1,16 +1,206 @@
-from django.contrib import admin
+from core.helpers import clean_int
+from core.paginator import CachedCountPaginator, CappedCountPaginator
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.contrib.admin.helpers import ActionForm
+from django.db import models
+from django.http import StreamingHttpResponse
+from django.template.response import TemplateResponse
 
-from .models import Comment, Group, Post
+from . import export, moderation, search
+from .cache import FEED_ALL, feed_count_key
+from .models import Comment, Follow, Group, Post, User
 
 
-class PostAdmin(admin.ModelAdmin):
+class ExportActionsMixin:
+    """Действия выгрузки выбранных объектов потоком (см. `posts.export`)."""
+
+    export_name: str
+
+    def export(self, queryset, format_: str) -> StreamingHttpResponse:
+        _, content_type, extension = export.FORMATS[format_]
+        response = StreamingHttpResponse(
+            export.export_lines(self.export_name, queryset, format_),
+            content_type=f"{content_type}; charset=utf-8",
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="{self.export_name}{extension}"'
+        )
+
+        return response
+
+    def export_csv(self, request, queryset):
+        return self.export(queryset, "csv")
+
+    export_csv.short_description = "Выгрузить выбранные в CSV"
+
+    def export_jsonl(self, request, queryset):
+        return self.export(queryset, "jsonl")
+
+    export_jsonl.short_description = "Выгрузить выбранные в JSON lines"
+
+
+class LargeTableAdmin(ExportActionsMixin, admin.ModelAdmin):
+    """
+    Список объектов большой таблицы без точных подсчетов: общее число
+    объектов не выводится, а выборка считается не дальше
+    `CappedCountPaginator.count_limit`.
+    """
+
+    show_full_result_count = False
+    date_hierarchy = "created"
+
+    def get_paginator(self, request, queryset, per_page, **kwargs):
+        return CappedCountPaginator(queryset, per_page, **kwargs)
+
+
+class PostActionForm(ActionForm):
+    # Номер вместо списка: выбор из всех групп загружал бы их на каждой
+    # странице списка постов.
+    group = forms.IntegerField(
+        required=False,
+        label="id группы",
+        help_text="Пусто — без группы",
+    )
+
+
+class PostAdmin(LargeTableAdmin):
     list_display = ("pk", "text", "created", "author", "group")
+    list_select_related = ("author", "group")
+    list_filter = ("created",)
+    autocomplete_fields = ("author", "group")
+    search_fields = ("text",)
+    empty_value_display = "-пусто-"
+    action_form = PostActionForm
+    actions = (
+        "delete_authors_posts",
+        "move_to_group",
+        "export_csv",
+        "export_jsonl",
+    )
+    export_name = "posts"
+
+    def get_paginator(self, request, queryset, per_page, **kwargs):
+        """Для списка без фильтров — количество постов из кэша лент."""
+        if queryset.query.where:
+            return super().get_paginator(
+                request, queryset, per_page, **kwargs
+            )
+
+        return CachedCountPaginator(
+            queryset, per_page, feed_count_key(FEED_ALL), **kwargs
+        )
+
+    def get_search_results(self, request, queryset, search_term):
+        """Поиск по полнотекстовому индексу вместо `LIKE` по таблице."""
+        if not search_term:
+            return queryset, False
+
+        return search.filter_posts(queryset, search_term), False
+
+    def delete_authors_posts(self, request, queryset):
+        """
+        Удаляет все посты авторов выбранных постов. Как и
+        `delete_selected`, сначала показывает страницу подтверждения
+        с авторами и числом их постов.
+        """
+        author_ids = list(
+            queryset.order_by().values_list("author_id", flat=True).distinct()
+        )
+
+        if request.POST.get("post"):
+            deleted = moderation.delete_author_posts(author_ids)
+
+            self.message_user(
+                request, f"Удалено постов: {deleted}", messages.SUCCESS
+            )
+            return None
+
+        authors = (
+            User.objects.filter(pk__in=author_ids)
+            .annotate(posts_total=models.Count("posts"))
+            .order_by("username")
+        )
+        context = {
+            **self.admin_site.each_context(request),
+            "title": "Удалить все посты авторов?",
+            "opts": self.model._meta,
+            "authors": authors,
+            "posts_total": sum(author.posts_total for author in authors),
+            "selected_ids": queryset.values_list("pk", flat=True),
+            "action_checkbox_name": helpers.ACTION_CHECKBOX_NAME,
+            "media": self.media,
+        }
+        request.current_app = self.admin_site.name
+
+        return TemplateResponse(
+            request,
+            "admin/posts/post/delete_authors_posts_confirmation.html",
+            context,
+        )
+
+    delete_authors_posts.short_description = (
+        "Удалить все посты авторов выбранных постов"
+    )
+
+    def move_to_group(self, request, queryset):
+        group_id = clean_int(request.POST.get("group"))
+        group = Group.objects.filter(pk=group_id).first()
+
+        if group_id is not None and group is None:
+            self.message_user(request, "Группа не найдена.", messages.ERROR)
+            return
+
+        moved = moderation.move_posts(queryset, group)
+
+        self.message_user(
+            request, f"Перенесено постов: {moved}", messages.SUCCESS
+        )
+
+    move_to_group.short_description = "Перенести выбранные посты в группу"
+
+
+class CommentAdmin(LargeTableAdmin):
+    list_display = ("pk", "text", "created", "author", "post")
+    list_select_related = ("author", "post")
     list_filter = ("created",)
-    list_editable = ("group",)
+    autocomplete_fields = ("author",)
+    raw_id_fields = ("post", "parent")
     search_fields = ("text",)
     empty_value_display = "-пусто-"
+    actions = ("purge_comments", "export_csv", "export_jsonl")
+    export_name = "comments"
+
+    def purge_comments(self, request, queryset):
+        deleted = moderation.purge_comments(queryset)
+
+        self.message_user(
+            request, f"Удалено комментариев: {deleted}", messages.SUCCESS
+        )
+
+    purge_comments.short_description = "Очистить выбранные комментарии"
+
+
+class FollowAdmin(LargeTableAdmin):
+    list_display = ("pk", "user", "author")
+    list_select_related = ("user", "author")
+    autocomplete_fields = ("user", "author")
+    search_fields = ("user__username", "author__username")
+    date_hierarchy = None
+    actions = ("export_csv", "export_jsonl")
+    export_name = "follows"
+
+
+class GroupAdmin(ExportActionsMixin, admin.ModelAdmin):
+    list_display = ("title", "slug")
+    search_fields = ("title", "slug")
+    prepopulated_fields = {"slug": ("title",)}
+    actions = ("export_csv", "export_jsonl")
+    export_name = "groups"
 
 
 admin.site.register(Post, PostAdmin)
-admin.site.register(Group)
-admin.site.register(Comment)
+admin.site.register(Group, GroupAdmin)
+admin.site.register(Comment, CommentAdmin)
+admin.site.register(Follow, FollowAdmin)
@@ -0,0 +1,479 @@
+import csv
+import itertools
+import json
+import time
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    TextIO,
+    Tuple,
+    Union,
+)
+
+from django.core.management.color import no_style
+from django.db import connection, models, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import search, threads, timeline
+from .cache import bump_post_versions
+from .counters import recount_comments
+from .models import COMMENT_PATH_DIGITS, Comment, Group, Post, User
+from .moderation import refresh_posts_state
+
+IMPORT_CHUNK_SIZE = 1000
+
+MAX_REPORTED_ERRORS = 20
+
+# Вызывается после каждой порции: создано строк и строк в секунду.
+Progress = Callable[[int, float], None]
+
+Row = Dict[str, Optional[str]]
+
+# Строка файла до разбора: словарь из CSV или строка JSON lines.
+RawRow = Union[Dict[str, Any], str]
+
+
+class ImportResult(NamedTuple):
+    """Итог импорта: создано и отклонено строк, первые ошибки, время."""
+
+    created: int
+    invalid: int
+    errors: List[str]
+    seconds: float
+
+
+def read_rows(file: TextIO, format_: str) -> Iterator[RawRow]:
+    """
+    Строки файла в формате выгрузки (`csv` или `jsonl`) по одной, без
+    разбора: некорректная строка отклоняется `parse_row` при импорте.
+    """
+    if format_ == "csv":
+        return csv.DictReader(file)
+
+    return (line for line in file if line.strip())
+
+
+def parse_row(raw: RawRow) -> Row:
+    """Разбирает строку файла; значения приводятся к строкам."""
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except ValueError:
+            raise ValueError("некорректный JSON")
+
+        if not isinstance(raw, dict):
+            raise ValueError("строка не объект JSON")
+
+    return {
+        key: None if value is None else str(value)
+        for key, value in raw.items()
+    }
+
+
+def insert_objects(model: models.Model, objects: List[models.Model]):
+    """
+    Вставляет объекты со значениями полей как есть. В отличие от
+    `bulk_create`, поля не подготавливаются `pre_save`, поэтому дата
+    создания из файла не заменяется текущей (`auto_now_add`). Объекты
+    с явными id и без них вставляются отдельными запросами.
+    """
+    ops = connection.ops
+    fields = model._meta.local_concrete_fields
+    table = ops.quote_name(model._meta.db_table)
+
+    for with_pk in (True, False):
+        group = [obj for obj in objects if (obj.pk is not None) == with_pk]
+
+        if not group:
+            continue
+
+        group_fields = [
+            field
+            for field in fields
+            if with_pk or field is not model._meta.auto_field
+        ]
+        columns = ", ".join(
+            ops.quote_name(field.column) for field in group_fields
+        )
+        placeholders = ", ".join(["%s"] * len(group_fields))
+
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {table} ({columns}) VALUES ({placeholders})",
+                [
+                    [
+                        field.get_db_prep_save(
+                            getattr(obj, field.attname), connection
+                        )
+                        for field in group_fields
+                    ]
+                    for obj in group
+                ],
+            )
+
+
+class AuthorLookup:
+    """
+    Имена авторов и их id. Неизвестные имена ищутся одним запросом
+    на порцию строк, при `create` недостающие пользователи создаются.
+    """
+
+    def __init__(self, create: bool = False):
+        self.create = create
+        self.ids: Dict[str, int] = {}
+
+    def resolve(self, usernames: Iterable[Optional[str]]):
+        missing = {name for name in usernames if name} - set(self.ids)
+
+        if self.create and missing:
+            User.objects.bulk_create(
+                [User(username=name, password="!") for name in missing],
+                ignore_conflicts=True,
+            )
+
+        self.ids.update(
+            User.objects.filter(username__in=missing).values_list(
+                "username", "pk"
+            )
+        )
+
+    def get(self, username: Optional[str]) -> int:
+        if not username:
+            raise ValueError("не указан автор")
+        if username not in self.ids:
+            raise ValueError(f"нет пользователя {username}")
+
+        return self.ids[username]
+
+
+def clean_text(row: Row) -> str:
+    text = (row.get("text") or "").strip()
+
+    if not text:
+        raise ValueError("пустой текст")
+
+    return text
+
+
+def clean_created(row: Row):
+    value = row.get("created")
+
+    if not value:
+        return timezone.now()
+
+    created = parse_datetime(value)
+
+    if created is None:
+        raise ValueError(f"неверная дата {value}")
+    if timezone.is_naive(created):
+        created = timezone.make_aware(created)
+
+    return created
+
+
+def row_ids(rows: Iterable[Row], key: str) -> Set[int]:
+    """Целые значения столбца `key` строк порции, кроме некорректных."""
+    ids = set()
+
+    for row in rows:
+        try:
+            ids.add(int(row.get(key)))
+        except (TypeError, ValueError):
+            pass
+
+    return ids
+
+
+def reset_sequence(model: models.Model):
+    """Сдвигает последовательность id после вставки с явными id."""
+    statements = connection.ops.sequence_reset_sql(no_style(), [model])
+
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+class Importer:
+    """
+    Импорт строк одной модели порциями: проверка порции, справочники
+    авторов и групп в памяти, одна вставка (`insert_objects`) в транзакции
+    на порцию. Счетчики, индексы и кэш обновляются один раз в конце.
+
+    Id из столбца `id` сохраняются, чтобы ссылки других выгрузок (пост
+    комментария) указывали на те же записи; строки с занятыми id
+    отклоняются. Без `id` запись получает новый id.
+    """
+
+    model: models.Model
+
+    def __init__(self, create_authors: bool = False):
+        self.authors = AuthorLookup(create_authors)
+        self.taken_ids: Set[int] = set()
+
+    def prepare(self, rows: List[Row]):
+        """Загружает справочники для порции строк."""
+        self.authors.resolve(row.get("author") for row in rows)
+        self.taken_ids = set(
+            self.model.objects.filter(
+                pk__in=row_ids(rows, "id")
+            ).values_list("pk", flat=True)
+        )
+
+    def clean_id(self, row: Row) -> Optional[int]:
+        value = row.get("id")
+
+        if not value:
+            return None
+
+        try:
+            pk = int(value)
+        except ValueError:
+            raise ValueError(f"неверный id {value}")
+
+        if pk < 1:
+            raise ValueError(f"неверный id {value}")
+        if pk in self.taken_ids:
+            raise ValueError(f"id {pk} уже занят")
+
+        self.taken_ids.add(pk)
+
+        return pk
+
+    def build(self, row: Row) -> models.Model:
+        raise NotImplementedError
+
+    def finish(self):
+        """Обновляет производные данные после вставки всех порций."""
+
+
+class PostImporter(Importer):
+    model = Post
+
+    def __init__(self, create_authors: bool = False):
+        super().__init__(create_authors)
+        self.groups = dict(Group.objects.values_list("slug", "pk"))
+        self.last_id = Post.objects.aggregate(last=models.Max("pk"))["last"]
+        self.author_ids: Set[int] = set()
+        self.group_ids: Set[Optional[int]] = set()
+        # Явные id не новее прежних постов — их не охватит
+        # `search.index_posts_after`.
+        self.earlier_ids: List[int] = []
+
+    def build(self, row: Row) -> Post:
+        slug = row.get("group")
+
+        if slug and slug not in self.groups:
+            raise ValueError(f"нет группы {slug}")
+
+        post = Post(
+            id=self.clean_id(row),
+            text=clean_text(row),
+            author_id=self.authors.get(row.get("author")),
+            group_id=self.groups.get(slug) if slug else None,
+            image=row.get("image") or "",
+            created=clean_created(row),
+        )
+        self.author_ids.add(post.author_id)
+        self.group_ids.add(post.group_id)
+
+        if post.id is not None and post.id <= (self.last_id or 0):
+            self.earlier_ids.append(post.id)
+
+        return post
+
+    def finish(self):
+        with transaction.atomic():
+            search.index_posts_after(self.last_id or 0)
+            search.index_posts(self.earlier_ids)
+        timeline.backfill_authors(self.author_ids)
+        refresh_posts_state(self.author_ids, self.group_ids)
+
+
+class CommentImporter(Importer):
+    """
+    Комментарии с их ветками: ответ (столбец `parent`) должен идти после
+    родителя и иметь id, путь в ветке строится из пути родителя. Без
+    `parent` комментарий — корень ветки.
+    """
+
+    model = Comment
+
+    def __init__(self, create_authors: bool = False):
+        super().__init__(create_authors)
+        self.existing_posts: Set[int] = set()
+        self.post_ids: Set[int] = set()
+        # Id поста и путь родителей ответов порции.
+        self.parents: Dict[int, Tuple[int, str]] = {}
+
+    def prepare(self, rows: List[Row]):
+        super().prepare(rows)
+
+        self.existing_posts = set(
+            Post.objects.filter(pk__in=row_ids(rows, "post")).values_list(
+                "pk", flat=True
+            )
+        )
+        self.parents = {
+            pk: (post_id, path)
+            for pk, post_id, path in Comment.objects.filter(
+                pk__in=row_ids(rows, "parent")
+            ).values_list("pk", "post_id", "path")
+        }
+
+    def build(self, row: Row) -> Comment:
+        try:
+            post_id = int(row.get("post"))
+        except (TypeError, ValueError):
+            raise ValueError("неверный id поста")
+
+        if post_id not in self.existing_posts:
+            raise ValueError(f"нет поста {post_id}")
+
+        comment = Comment(
+            id=self.clean_id(row),
+            text=clean_text(row),
+            author_id=self.authors.get(row.get("author")),
+            post_id=post_id,
+            created=clean_created(row),
+        )
+        self.build_path(comment, row.get("parent"))
+        self.post_ids.add(post_id)
+
+        return comment
+
+    def build_path(self, comment: Comment, parent: Optional[str]):
+        """Назначает ответу родителя и путь в ветке, корню с id — путь."""
+        if not parent:
+            if comment.id is not None:
+                comment.path = f"{comment.id:0{COMMENT_PATH_DIGITS}d}/"
+                self.parents[comment.id] = (comment.post_id, comment.path)
+            return
+
+        try:
+            parent_id = int(parent)
+        except ValueError:
+            raise ValueError(f"неверный id родителя {parent}")
+
+        if comment.id is None:
+            raise ValueError("у ответа нет id")
+        if parent_id not in self.parents:
+            raise ValueError(f"нет комментария {parent_id}")
+
+        post_id, parent_path = self.parents[parent_id]
+
+        if post_id != comment.post_id:
+            raise ValueError(f"комментарий {parent_id} к другому посту")
+
+        comment.parent_id, comment.path = threads.reply_path(
+            parent_path, comment.id
+        )
+        self.parents[comment.id] = (comment.post_id, comment.path)
+
+    def finish(self):
+        threads.fill_root_paths()
+        recount_comments(self.post_ids)
+        posts = Post.objects.filter(pk__in=self.post_ids)
+        bump_post_versions(
+            set(posts.values_list("author_id", flat=True)),
+            set(posts.values_list("group_id", flat=True)),
+        )
+
+
+IMPORTERS = {"posts": PostImporter, "comments": CommentImporter}
+
+
+def batches(
+    rows: Iterable[RawRow], size: int
+) -> Iterator[List[Tuple[int, RawRow]]]:
+    """Порции строк вместе с их номерами (с единицы)."""
+    numbered = enumerate(rows, start=1)
+
+    while True:
+        batch = list(itertools.islice(numbered, size))
+
+        if not batch:
+            return
+
+        yield batch
+
+
+def import_batch(
+    importer: Importer,
+    batch: List[Tuple[int, RawRow]],
+    reject: Callable[[int, ValueError], None],
+) -> int:
+    """
+    Разбирает, проверяет и вставляет порцию строк в одной транзакции.
+    Отклоненные строки передаются в `reject`; возвращает число созданных.
+    """
+    parsed = []
+
+    for line, raw in batch:
+        try:
+            parsed.append((line, parse_row(raw)))
+        except ValueError as error:
+            reject(line, error)
+
+    importer.prepare([row for _, row in parsed])
+    objects = []
+
+    for line, row in parsed:
+        try:
+            objects.append(importer.build(row))
+        except ValueError as error:
+            reject(line, error)
+
+    with transaction.atomic():
+        insert_objects(importer.model, objects)
+
+        if any(obj.pk is not None for obj in objects):
+            reset_sequence(importer.model)
+
+    return len(objects)
+
+
+def import_rows(
+    name: str,
+    rows: Iterable[RawRow],
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    create_authors: bool = False,
+    progress: Optional[Progress] = None,
+) -> ImportResult:
+    """
+    Импортирует посты или комментарии (`name`) из строк в формате
+    выгрузки (см. `posts.export`). Строки с ошибками пропускаются.
+    """
+    if chunk_size < 1:
+        raise ValueError("размер порции должен быть не меньше 1")
+
+    start = time.perf_counter()
+    importer = IMPORTERS[name](create_authors)
+    created = invalid = 0
+    errors: List[str] = []
+
+    def reject(line: int, error: ValueError):
+        nonlocal invalid
+        invalid += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append(f"строка {line}: {error}")
+
+    for batch in batches(rows, chunk_size):
+        created += import_batch(importer, batch, reject)
+
+        if progress is not None:
+            progress(created, created / (time.perf_counter() - start))
+
+    if created:
+        importer.finish()
+
+    return ImportResult(
+        created, invalid, errors, time.perf_counter() - start
+    )
@@ -0,0 +1,113 @@
+import uuid
+from typing import Dict, Iterable, Optional, Union
+
+from django.core.cache import cache
+
+FEED_ALL = "all"
+FEED_GROUP = "group"
+FEED_AUTHOR = "author"
+FEED_FOLLOW = "follow"
+
+
+def feed_count_key(
+    feed: str, object_id: Optional[Union[int, str]] = None
+) -> str:
+    """Ключ кэша с количеством постов ленты."""
+    if object_id is None:
+        return f"posts:count:{feed}"
+
+    return f"posts:count:{feed}:{object_id}"
+
+
+def change_feed_counts(delta: int, group_id: Optional[int], author_id: int):
+    """
+    Изменяет закэшированные количества постов лент, в которые попадает пост.
+
+    Отсутствующие ключи не создаются: количество будет посчитано заново
+    при следующем обращении. Количества лент подписок меняются вместе
+    с их версиями.
+    """
+    keys = [feed_count_key(FEED_ALL), feed_count_key(FEED_AUTHOR, author_id)]
+
+    if group_id is not None:
+        keys.append(feed_count_key(FEED_GROUP, group_id))
+
+    for key in keys:
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            pass
+
+
+def reset_group_count(group_id: Optional[int]):
+    if group_id is not None:
+        cache.delete(feed_count_key(FEED_GROUP, group_id))
+
+
+def reset_feed_counts(
+    author_ids: Iterable[int], group_ids: Iterable[Optional[int]] = ()
+):
+    """
+    Удаляет закэшированные количества постов общей ленты и лент авторов
+    и групп после массовых изменений: они будут посчитаны заново.
+    """
+    cache.delete_many(
+        [feed_count_key(FEED_ALL)]
+        + [feed_count_key(FEED_AUTHOR, pk) for pk in author_ids]
+        + [feed_count_key(FEED_GROUP, pk) for pk in group_ids if pk]
+    )
+
+
+def version_key(feed: str, object_id: Optional[int] = None) -> str:
+    """Ключ кэша с версией (поколением) ленты."""
+    if object_id is None:
+        return f"posts:version:{feed}"
+
+    return f"posts:version:{feed}:{object_id}"
+
+
+def get_versions(
+    feed: str, object_ids: Iterable[Optional[int]]
+) -> Dict[Optional[int], str]:
+    """
+    Текущие версии лент. Отсутствующая в кэше версия создается заново,
+    поэтому вытеснение ключа лишь инвалидирует зависящие от нее данные.
+    """
+    keys = {version_key(feed, pk): pk for pk in object_ids}
+    versions = cache.get_many(keys)
+    missing = {key: uuid.uuid4().hex for key in keys if key not in versions}
+
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+
+    return {keys[key]: version for key, version in versions.items()}
+
+
+def get_version(feed: str, object_id: Optional[int] = None) -> str:
+    return get_versions(feed, [object_id])[object_id]
+
+
+def bump_versions(feed: str, object_ids: Iterable[Optional[int]]):
+    """Сменяет версии лент: ключи с прежними версиями больше не читаются."""
+    cache.set_many(
+        {version_key(feed, pk): uuid.uuid4().hex for pk in object_ids},
+        timeout=None,
+    )
+
+
+def bump_post_versions(
+    author_ids: Iterable[int],
+    group_ids: Iterable[Optional[int]] = (),
+    follower_ids: Iterable[int] = (),
+):
+    """
+    Сменяет версии лент, в которых показываются измененные посты:
+    общей ленты, лент авторов и групп и лент подписок подписчиков.
+    """
+    bump_versions(FEED_ALL, [None])
+    bump_versions(FEED_AUTHOR, author_ids)
+    bump_versions(
+        FEED_GROUP, {group_id for group_id in group_ids if group_id}
+    )
+    bump_versions(FEED_FOLLOW, follower_ids)
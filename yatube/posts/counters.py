@@ -0,0 +1,103 @@
+from contextvars import ContextVar
+from typing import FrozenSet, Iterable, Optional
+
+from django.db import models, transaction
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Comment, Follow, Post, User, UserStats
+
+# Пользователи, удаляемые сейчас: их счетчики удаляются вместе с ними,
+# поэтому каскадное удаление их постов и подписок счетчики не меняет.
+deleting_users: ContextVar[FrozenSet[int]] = ContextVar(
+    "deleting_users", default=frozenset()
+)
+
+
+def count_subquery(
+    queryset: models.QuerySet, field: str
+) -> models.expressions.Combinable:
+    """Количество строк `queryset`, связанных по `field` с внешней строкой."""
+    counts = (
+        queryset.filter(**{field: models.OuterRef("pk")})
+        .order_by()
+        .values(field)
+        .annotate(count=models.Count("pk"))
+        .values("count")
+    )
+
+    return Coalesce(
+        models.Subquery(counts, output_field=models.IntegerField()), 0
+    )
+
+
+def start_user_deletion(user_id: int):
+    deleting_users.set(deleting_users.get() | {user_id})
+
+
+def finish_user_deletion(user_id: int):
+    deleting_users.set(deleting_users.get() - {user_id})
+
+
+def change_user_stats(user_id: int, **deltas: int):
+    """
+    Атомарно изменяет счетчики пользователя на заданные величины, не ниже
+    нуля — расхождение счетчика не должно ломать отписку или удаление.
+
+    Отсутствующая строка счетчиков пересчитывается только при увеличении:
+    уменьшение приходит и при каскадном удалении пользователя, строку
+    которого создавать нельзя. Счетчики удаляемых пользователей
+    не меняются.
+    """
+    if user_id in deleting_users.get():
+        return
+
+    updated = UserStats.objects.filter(user_id=user_id).update(
+        **{
+            field: Greatest(models.F(field) + delta, 0)
+            for field, delta in deltas.items()
+        }
+    )
+
+    if not updated and all(delta > 0 for delta in deltas.values()):
+        recount_user_stats([user_id])
+
+
+def change_comments_count(post_id: int, delta: int):
+    Post.objects.filter(pk=post_id).update(
+        comments_count=models.F("comments_count") + delta
+    )
+
+
+@transaction.atomic
+def recount_user_stats(user_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Пересчитывает счетчики пользователей одним UPDATE по подзапросам.
+    Без `user_ids` — для всех пользователей.
+    """
+    users = User.objects.all()
+    if user_ids is not None:
+        users = users.filter(pk__in=list(user_ids))
+
+    UserStats.objects.bulk_create(
+        [UserStats(user_id=pk) for pk in users.values_list("pk", flat=True)],
+        ignore_conflicts=True,
+    )
+
+    stats = UserStats.objects.filter(user__in=users)
+
+    return stats.update(
+        posts_count=count_subquery(Post.objects.all(), "author"),
+        followers_count=count_subquery(Follow.objects.all(), "author"),
+        following_count=count_subquery(Follow.objects.all(), "user"),
+    )
+
+
+def recount_comments(post_ids: Optional[Iterable[int]] = None) -> int:
+    """Пересчитывает количество комментариев постов одним UPDATE."""
+    posts = Post.objects.all()
+    if post_ids is not None:
+        posts = posts.filter(pk__in=list(post_ids))
+
+    return posts.update(
+        comments_count=count_subquery(Comment.objects.all(), "post")
+    )
@@ -0,0 +1,167 @@
+import csv
+import datetime
+import json
+from typing import Dict, Iterable, Iterator, NamedTuple, Optional, Type
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+
+from .models import Comment, Follow, Group, Post
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+class ExportSpec(NamedTuple):
+    """Выгружаемая модель: столбцы (поле или связь) и доступные фильтры."""
+
+    model: Type[models.Model]
+    columns: Dict[str, str]
+    filters: Dict[str, str]
+
+
+EXPORTS = {
+    "posts": ExportSpec(
+        Post,
+        {
+            "id": "id",
+            "created": "created",
+            "author": "author__username",
+            "group": "group__slug",
+            "text": "text",
+            "image": "image",
+        },
+        {"author": "author__username", "group": "group__slug"},
+    ),
+    "comments": ExportSpec(
+        Comment,
+        {
+            "id": "id",
+            "created": "created",
+            "post": "post_id",
+            "parent": "parent_id",
+            "author": "author__username",
+            "text": "text",
+        },
+        {"author": "author__username", "group": "post__group__slug"},
+    ),
+    "follows": ExportSpec(
+        Follow,
+        {"id": "id", "user": "user__username", "author": "author__username"},
+        {"author": "author__username"},
+    ),
+    "groups": ExportSpec(
+        Group,
+        {
+            "id": "id",
+            "slug": "slug",
+            "title": "title",
+            "description": "description",
+        },
+        {"group": "slug"},
+    ),
+}
+
+
+def day_start(date: datetime.date) -> datetime.datetime:
+    return timezone.make_aware(
+        datetime.datetime.combine(date, datetime.time.min)
+    )
+
+
+def export_queryset(
+    name: str,
+    author: Optional[str] = None,
+    group: Optional[str] = None,
+    since: Optional[datetime.date] = None,
+    until: Optional[datetime.date] = None,
+) -> models.QuerySet:
+    """
+    Выгружаемые объекты модели `name` с фильтрами по автору (имени
+    пользователя), группе (адресу) и интервалу дат включительно.
+    Неприменимый к модели фильтр — `ValueError`.
+    """
+    spec = EXPORTS[name]
+    queryset = spec.model.objects.all()
+
+    for key, value in (("author", author), ("group", group)):
+        if value is None:
+            continue
+        if key not in spec.filters:
+            raise ValueError(f"Фильтр {key} не применим к {name}")
+
+        queryset = queryset.filter(**{spec.filters[key]: value})
+
+    if since is not None or until is not None:
+        if "created" not in spec.columns:
+            raise ValueError(f"Фильтр по датам не применим к {name}")
+
+    if since is not None:
+        queryset = queryset.filter(created__gte=day_start(since))
+
+    if until is not None:
+        queryset = queryset.filter(
+            created__lt=day_start(until + datetime.timedelta(days=1))
+        )
+
+    return queryset
+
+
+class Echo:
+    """Файл для `csv.writer`, возвращающий записанную строку."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def csv_value(value):
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+
+    return value
+
+
+def csv_lines(columns: Iterable[str], rows: Iterable[tuple]) -> Iterator[str]:
+    writer = csv.writer(Echo())
+
+    yield writer.writerow(columns)
+
+    for row in rows:
+        yield writer.writerow(csv_value(value) for value in row)
+
+
+def jsonl_lines(
+    columns: Iterable[str], rows: Iterable[tuple]
+) -> Iterator[str]:
+    columns = list(columns)
+
+    for row in rows:
+        yield json.dumps(
+            dict(zip(columns, row)), ensure_ascii=False, cls=DjangoJSONEncoder
+        ) + "\n"
+
+
+FORMATS = {
+    "csv": (csv_lines, "text/csv", ".csv"),
+    "jsonl": (jsonl_lines, "application/x-ndjson", ".jsonl"),
+}
+
+
+def export_lines(
+    name: str, queryset: models.QuerySet, format_: str
+) -> Iterator[str]:
+    """
+    Строки выгрузки объектов `queryset` модели `name` в формате `format_`
+    (`csv` или `jsonl`). Строки читаются курсором порциями по
+    `EXPORT_CHUNK_SIZE`, без создания объектов моделей, поэтому память
+    не зависит от объема выгрузки.
+    """
+    columns = EXPORTS[name].columns
+    rows = (
+        queryset.order_by("pk")
+        .values_list(*columns.values())
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    write_lines = FORMATS[format_][0]
+
+    return write_lines(columns.keys(), rows)
@@ -0,0 +1,181 @@
+import array
+from typing import FrozenSet, Iterable, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from . import timeline
+from .cache import FEED_AUTHOR, FEED_FOLLOW, bump_versions
+from .counters import change_user_stats
+from .models import Follow, User
+
+# Тип элементов массива id авторов в кэше: беззнаковые 32-битные целые.
+ID_TYPECODE = "I"
+
+
+def following_key(user_id: int) -> str:
+    """Ключ кэша с id авторов, на которых подписан пользователь."""
+    return f"posts:following:{user_id}"
+
+
+def pack(author_ids: Iterable[int]) -> bytes:
+    """Компактное представление: отсортированный массив id."""
+    return array.array(ID_TYPECODE, sorted(author_ids)).tobytes()
+
+
+def unpack(value: bytes) -> FrozenSet[int]:
+    ids = array.array(ID_TYPECODE)
+    ids.frombytes(value)
+
+    return frozenset(ids)
+
+
+def load_following(user_id: int) -> FrozenSet[int]:
+    """
+    Id авторов, на которых подписан пользователь: из кэша, а при его
+    отсутствии — одним запросом с сохранением в кэш.
+    """
+    value = cache.get(following_key(user_id))
+
+    if value is None:
+        author_ids = Follow.objects.filter(user_id=user_id).values_list(
+            "author_id", flat=True
+        )
+        value = pack(author_ids)
+        cache.set(
+            following_key(user_id),
+            value,
+            settings.POSTS_FOLLOWING_CACHE_TIMEOUT,
+        )
+
+    return unpack(value)
+
+
+def following_ids(user: User) -> FrozenSet[int]:
+    """
+    Id авторов, на которых подписан пользователь. Множество запоминается
+    на объекте пользователя, поэтому за запрос кэш читается один раз,
+    а каждая проверка подписки — поиск в множестве.
+    """
+    if not user.is_authenticated:
+        return frozenset()
+
+    if not hasattr(user, "_following_ids"):
+        user._following_ids = load_following(user.id)
+
+    return user._following_ids
+
+
+def is_following(user: User, author_id: int) -> bool:
+    return author_id in following_ids(user)
+
+
+def forget_following(user_id: int):
+    """
+    Удаляет закэшированные подписки пользователя после фиксации
+    транзакции: множество заново загрузится из БД при следующем
+    обращении. Ключ не переписывается — иначе одновременные подписки
+    или чтение до фиксации могли бы сохранить неполное множество.
+    """
+    transaction.on_commit(lambda: cache.delete(following_key(user_id)))
+
+
+def bump_follow_versions(user_id: int, author_id: int):
+    """
+    Меняет версии лент подписчика и автора после фиксации транзакции —
+    чтобы под новой версией не закэшировалась страница с данными до нее.
+    """
+
+    def bump():
+        bump_versions(FEED_FOLLOW, [user_id])
+        bump_versions(FEED_AUTHOR, [user_id, author_id])
+
+    transaction.on_commit(bump)
+
+
+def followed(user_id: int, author_id: int):
+    """
+    Обновляет счетчики и ленту подписок после новой подписки в той же
+    транзакции; кэши подписок и версии лент сбрасываются после ее
+    фиксации.
+    """
+    change_user_stats(author_id, followers_count=1)
+    change_user_stats(user_id, following_count=1)
+    timeline.update_fanout_flag(author_id)
+
+    if timeline.is_fanout_enabled(author_id):
+        timeline.backfill(user_id, author_id)
+
+    forget_following(user_id)
+    bump_follow_versions(user_id, author_id)
+
+
+def unfollowed(user_id: int, author_id: int):
+    """То же после отписки (см. `followed`)."""
+    change_user_stats(author_id, followers_count=-1)
+    change_user_stats(user_id, following_count=-1)
+    timeline.prune(user_id, author_id)
+    forget_following(user_id)
+    bump_follow_versions(user_id, author_id)
+
+
+def follow_table() -> Tuple[str, str, str]:
+    """Имена таблицы подписок и ее столбцов читателя и автора для SQL."""
+    quote_name = connection.ops.quote_name
+    meta = Follow._meta
+
+    return (
+        quote_name(meta.db_table),
+        quote_name(meta.get_field("user").column),
+        quote_name(meta.get_field("author").column),
+    )
+
+
+def follow(user_id: int, author_id: int) -> bool:
+    """
+    Подписывает пользователя на автора одним INSERT, который при уже
+    существующей подписке ничего не делает (`INSERT OR IGNORE`,
+    `ON CONFLICT DO NOTHING`): без исключения и прерванной транзакции
+    при повторном или одновременном запросе. Возвращает, создана ли
+    подписка; связанные данные обновляются, только если создана.
+    """
+    ops = connection.ops
+    table, user_column, author_column = follow_table()
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"{ops.insert_statement(ignore_conflicts=True)} {table} "
+                f"({user_column}, {author_column}) VALUES (%s, %s) "
+                f"{ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)}",
+                [user_id, author_id],
+            )
+            created = cursor.rowcount == 1
+
+        if created:
+            followed(user_id, author_id)
+
+    return created
+
+
+def unfollow(user_id: int, author_id: int) -> bool:
+    """
+    Отписывает пользователя от автора одним DELETE без предварительной
+    выборки. Возвращает, была ли подписка.
+    """
+    table, user_column, author_column = follow_table()
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {table} "
+                f"WHERE {user_column} = %s AND {author_column} = %s",
+                [user_id, author_id],
+            )
+            deleted = cursor.rowcount > 0
+
+        if deleted:
+            unfollowed(user_id, author_id)
+
+    return deleted
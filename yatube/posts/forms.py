@@ -1,15 +1,82 @@
+from typing import Optional
+
+from django import forms
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.forms.models import ModelForm
+from django.template.defaultfilters import filesizeformat
 
+from . import thumbnails
 from .models import Comment, Post
 
 
+class PostImageField(forms.ImageField):
+    """
+    Изображение поста с ограничениями размера файла и числа пикселей.
+
+    Размер проверяется еще при загрузке (`UploadSizeLimitHandler`), число
+    пикселей — по заголовку изображения, до декодирования, что отсекает
+    «бомбы» распаковки.
+    """
+
+    def to_python(self, data):
+        if getattr(data, "oversized", False):
+            raise ValidationError(
+                "Файл больше %(limit)s.",
+                code="file_too_large",
+                params={
+                    "limit": filesizeformat(
+                        settings.POSTS_IMAGE_MAX_UPLOAD_SIZE
+                    )
+                },
+            )
+
+        image_file = super().to_python(data)
+
+        if image_file is not None:
+            width, height = image_file.image.size
+
+            if width * height > settings.POSTS_IMAGE_MAX_PIXELS:
+                raise ValidationError(
+                    "Изображение больше %(limit)s мегапикселей.",
+                    code="too_many_pixels",
+                    params={
+                        "limit": settings.POSTS_IMAGE_MAX_PIXELS // 10 ** 6
+                    },
+                )
+
+        return image_file
+
+
 class PostForm(ModelForm):
     class Meta:
         model = Post
         fields = ("text", "group", "image")
+        field_classes = {"image": PostImageField}
+
+    def save(self, commit: bool = True) -> Post:
+        """
+        Сохраняет пост и ставит в очередь нормализацию изображения
+        и создание миниатюр.
+        """
+        post = super().save(commit)
+
+        if commit and "image" in self.changed_data:
+            thumbnails.schedule(post.image.name, normalize=True)
+
+        return post
 
 
 class CommentForm(ModelForm):
+    """Комментарий к посту `post_id` или ответ на его комментарий."""
+
     class Meta:
         model = Comment
-        fields = ("text",)
+        fields = ("text", "parent")
+        widgets = {"parent": forms.HiddenInput}
+
+    def __init__(self, *args, post_id: Optional[int] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["parent"].queryset = Comment.objects.filter(
+            post_id=post_id
+        )
@@ -0,0 +1,145 @@
+import io
+import random
+import tempfile
+from typing import Tuple
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+from PIL import Image, ImageFilter
+from sorl.thumbnail import get_thumbnail
+
+from posts import thumbnails
+
+BENCH_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "bench_feed_images",
+    }
+}
+
+# Ширина экрана в CSS-пикселях и плотность пикселей.
+VIEWPORTS = ((360, 2), (414, 3), (768, 2), (1280, 1), (1920, 1))
+
+# Ширина карточки ленты, как в `sizes` шаблона `post_list.html`.
+FEED_CARD_MAX_WIDTH = 1110
+FEED_CARD_BREAKPOINT = 1200
+
+LEGACY_GEOMETRY = "960x339"
+
+
+def source_image(width: int, height: int, seed: int) -> bytes:
+    """Синтетическая «фотография»: фрактал, шум и градиент в каналах."""
+    random.seed(seed)
+    x = random.uniform(-0.8, -0.4)
+    y = random.uniform(-0.3, 0.3)
+    channels = (
+        Image.effect_mandelbrot(
+            (width, height), (x - 1, y - 0.6, x + 1, y + 0.6), 64
+        ),
+        Image.effect_noise((width, height), 24).filter(
+            ImageFilter.GaussianBlur(1)
+        ),
+        Image.linear_gradient("L").resize((width, height)),
+    )
+    buffer = io.BytesIO()
+    Image.merge("RGB", channels).save(buffer, "JPEG", quality=90)
+
+    return buffer.getvalue()
+
+
+def card_width(viewport: int) -> int:
+    if viewport >= FEED_CARD_BREAKPOINT:
+        return FEED_CARD_MAX_WIDTH
+
+    return viewport
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает объем изображений страницы ленты: прежняя единственная "
+        "миниатюра 960x339 JPEG против вариантов JPEG и WebP, которые браузер "
+        "выберет из srcset для разных экранов. Файлы создаются во временном "
+        "каталоге, записи хранилища ключей откатываются."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--posts", type=int, default=10, help="Постов на странице"
+        )
+        parser.add_argument("--width", type=int, default=2400)
+        parser.add_argument("--height", type=int, default=1600)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as media_root, override_settings(
+            MEDIA_ROOT=media_root, CACHES=BENCH_CACHES
+        ):
+            with transaction.atomic():
+                self.run(options)
+                transaction.set_rollback(True)
+
+    def run(self, options):
+        width, height = options["width"], options["height"]
+        names = [
+            default_storage.save(
+                f"posts/bench-{i}.jpg",
+                ContentFile(source_image(width, height, options["seed"] + i)),
+            )
+            for i in range(options["posts"])
+        ]
+
+        legacy = sum(self.legacy_size(name) for name in names)
+
+        for name in names:
+            thumbnails.create_thumbnails(name)
+
+        self.stdout.write(
+            f"{'viewport':>10}{'dpr':>5}{'width':>7}{'960 JPEG':>12}"
+            f"{'srcset JPEG':>13}{'srcset WebP':>13}{'saved':>8}"
+        )
+
+        for viewport, dpr in VIEWPORTS:
+            needed = card_width(viewport) * dpr
+            jpeg = [self.picked_size(name, "JPEG", needed) for name in names]
+            webp = [self.picked_size(name, "WEBP", needed) for name in names]
+            jpeg_total = sum(size for _, size in jpeg)
+            webp_total = sum(size for _, size in webp)
+
+            self.stdout.write(
+                f"{viewport:>10}{dpr:>5}{webp[0][0]:>7}{legacy:>12}"
+                f"{jpeg_total:>13}{webp_total:>13}"
+                f"{1 - webp_total / legacy:>8.0%}"
+            )
+
+    @staticmethod
+    def legacy_size(name: str) -> int:
+        thumbnail = get_thumbnail(
+            name, LEGACY_GEOMETRY, **thumbnails.POST_THUMBNAIL_OPTIONS
+        )
+
+        return default_storage.size(thumbnail.name)
+
+    @staticmethod
+    def picked_size(name: str, format_: str, needed: int) -> Tuple[int, int]:
+        """
+        Ширина и объем варианта, который браузер выберет из srcset
+        формата `format_` для ширины `needed` в физических пикселях.
+        """
+        candidates = [
+            (derivative, thumbnail)
+            for derivative, thumbnail in thumbnails.cached_thumbnails(name)
+            if derivative.format == format_
+        ]
+        derivative, thumbnail = next(
+            (
+                (derivative, thumbnail)
+                for derivative, thumbnail in candidates
+                if derivative.width >= needed
+            ),
+            candidates[-1],
+        )
+
+        return derivative.width, default_storage.size(thumbnail.name)
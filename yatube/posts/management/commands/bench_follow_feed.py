@@ -0,0 +1,178 @@
+import random
+import time
+from typing import Callable, List, Tuple
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from posts.counters import recount_user_stats
+from posts.models import Follow, Post, User
+from posts.timeline import follow_feed, rebuild_timelines
+
+DISTRIBUTIONS = ("uniform", "skewed")
+
+SKEW_EXPONENT = 1.2
+
+PAGE_SIZE = 10
+
+BENCH_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "bench_follow_feed",
+    }
+}
+
+Measure = Tuple[float, int]
+
+
+def measure(func: Callable[[], object]) -> Measure:
+    """Время выполнения в миллисекундах и количество запросов к БД."""
+    with CaptureQueriesContext(connection) as context:
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+
+    return elapsed * 1000, len(context)
+
+
+def format_measure(value: Measure) -> str:
+    return f"{value[0]:9.1f} ms {value[1]:4d} q"
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет стоимость записи поста и чтения ленты подписок для "
+        "рассылки при записи, сборки при чтении и гибридного режима при "
+        "разных распределениях подписчиков. Данные создаются в транзакции "
+        "и откатываются, кэш используется отдельный."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--authors", type=int, default=50)
+        parser.add_argument(
+            "--follows", type=int, default=20, help="Подписок на читателя"
+        )
+        parser.add_argument(
+            "--posts", type=int, default=20, help="Постов на автора"
+        )
+        parser.add_argument(
+            "--threshold",
+            type=int,
+            help=(
+                "Порог подписчиков для гибридного режима, по умолчанию — "
+                "вдвое больше среднего числа подписчиков автора"
+            ),
+        )
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        threshold = options["threshold"] or (
+            2 * options["users"] * options["follows"] // options["authors"]
+        )
+        modes = (
+            ("fan-in", 0),
+            ("fan-out", options["users"] + 1),
+            ("hybrid", threshold),
+        )
+
+        self.stdout.write(
+            f"{'distribution':<13}{'mode':<9}{'max followers':>14}"
+            f"{'write popular':>22}{'write median':>22}{'read page':>22}"
+        )
+
+        with override_settings(CACHES=BENCH_CACHES):
+            for distribution in DISTRIBUTIONS:
+                for mode, mode_threshold in modes:
+                    with transaction.atomic():
+                        row = self.run_case(
+                            distribution, mode_threshold, options
+                        )
+                        transaction.set_rollback(True)
+
+                    self.stdout.write(f"{distribution:<13}{mode:<9}{row}")
+
+    def run_case(self, distribution: str, threshold: int, options) -> str:
+        random.seed(options["seed"])
+
+        authors, readers = self.populate(distribution, options)
+        followers = {
+            author.id: author.following.count() for author in authors
+        }
+        authors.sort(key=lambda author: followers[author.id], reverse=True)
+        popular = authors[0]
+        median = authors[len(authors) // 2]
+        reader = next(
+            reader
+            for reader in readers
+            if Follow.objects.filter(user=reader, author=popular).exists()
+        )
+
+        with override_settings(POSTS_FANOUT_THRESHOLD=threshold):
+            rebuild_timelines()
+
+            write_popular = measure(
+                lambda: Post.objects.create(text="Пост", author=popular)
+            )
+            write_median = measure(
+                lambda: Post.objects.create(text="Пост", author=median)
+            )
+            read = measure(lambda: self.read_feed(reader.id))
+
+        return (
+            f"{followers[popular.id]:>14}"
+            f"{format_measure(write_popular):>22}"
+            f"{format_measure(write_median):>22}"
+            f"{format_measure(read):>22}"
+        )
+
+    @staticmethod
+    def read_feed(user_id: int):
+        posts, _ = follow_feed(user_id)
+        list(posts.for_feed()[:PAGE_SIZE])
+        posts.count()
+
+    def populate(
+        self, distribution: str, options
+    ) -> Tuple[List[User], List[User]]:
+        User.objects.bulk_create(
+            [
+                User(username=f"bench-{i}", password="!")
+                for i in range(options["users"])
+            ],
+            batch_size=500,
+        )
+        users = list(User.objects.filter(username__startswith="bench-"))
+        authors = users[:options["authors"]]
+
+        if distribution == "uniform":
+            weights = [1.0] * len(authors)
+        else:
+            weights = [
+                1 / (rank + 1) ** SKEW_EXPONENT for rank in range(len(authors))
+            ]
+
+        follows = []
+        follows_per_user = min(options["follows"], len(authors))
+        for user in users:
+            picked = set()
+            while len(picked) < follows_per_user:
+                picked.add(random.choices(authors, weights)[0].id)
+            picked.discard(user.id)
+            follows.extend(
+                Follow(user=user, author_id=author_id) for author_id in picked
+            )
+        Follow.objects.bulk_create(follows, batch_size=500)
+
+        Post.objects.bulk_create(
+            [
+                Post(text=f"Пост {i}", author=author)
+                for author in authors
+                for i in range(options["posts"])
+            ],
+            batch_size=500,
+        )
+        recount_user_stats(user.id for user in users)
+
+        return authors, users
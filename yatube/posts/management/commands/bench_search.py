@@ -0,0 +1,127 @@
+import itertools
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.db import transaction
+
+from posts.management.commands.bench_follow_feed import (
+    format_measure,
+    measure,
+)
+from posts.models import Post, User
+from posts.search import SearchResults, rebuild_index
+
+PAGE_SIZE = 10
+
+BATCH_SIZE = 5000
+
+# Слоги синтетического словаря; частоты слов распределены по Ципфу,
+# чтобы в запросах были и частые, и редкие слова.
+SYLLABLES = (
+    "ка ро ми та ле но са ви ду ге по ры жа бо лу не то ши фа ре "
+    "зо ку ма ди се ло пу ни бе ва"
+).split()
+
+VOCABULARY_SIZE = 20000
+
+WORDS_PER_POST = 30
+
+
+def make_vocabulary(rng: random.Random) -> list:
+    words = set()
+
+    while len(words) < VOCABULARY_SIZE:
+        words.add("".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+
+    return sorted(words, key=lambda word: rng.random())
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает поиск постов по полнотекстовому индексу FTS5 и поиск "
+        "подстроки (LIKE, как в админке) на синтетических постах: первая "
+        "страница результатов и их количество. Данные создаются "
+        "в транзакции и откатываются."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--posts", type=int, default=1_000_000)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.run(options)
+            transaction.set_rollback(True)
+
+    def run(self, options):
+        rng = random.Random(options["seed"])
+        vocabulary = make_vocabulary(rng)
+        cum_weights = list(
+            itertools.accumulate(
+                1 / rank for rank in range(1, len(vocabulary) + 1)
+            )
+        )
+
+        start = time.perf_counter()
+        author = User.objects.create(username="bench-search", password="!")
+        remaining = options["posts"]
+
+        while remaining:
+            batch = min(remaining, BATCH_SIZE)
+            Post.objects.bulk_create(
+                Post(
+                    text=" ".join(
+                        rng.choices(
+                            vocabulary,
+                            cum_weights=cum_weights,
+                            k=WORDS_PER_POST,
+                        )
+                    ),
+                    author=author,
+                )
+                for _ in range(batch)
+            )
+            remaining -= batch
+
+        self.stdout.write(
+            f"Постов: {options['posts']}, "
+            f"создание {time.perf_counter() - start:.1f} s"
+        )
+
+        start = time.perf_counter()
+        rebuild_index()
+        self.stdout.write(f"Индекс: {time.perf_counter() - start:.1f} s")
+
+        queries = (
+            ("частое слово", vocabulary[0]),
+            ("среднее слово", vocabulary[100]),
+            ("редкое слово", vocabulary[-1]),
+            ("два слова", f"{vocabulary[1]} {vocabulary[50]}"),
+            ("нет совпадений", "несуществующее"),
+        )
+
+        self.stdout.write(
+            f"{'query':<16}{'found':>9}{'LIKE':>19}{'FTS5':>19}{'speedup':>9}"
+        )
+
+        for label, query in queries:
+            like = Post.objects.for_feed()
+            for word in query.split():
+                like = like.filter(text__icontains=word)
+
+            found = like.count()
+            like_time = measure(lambda: self.first_page(like))
+            fts_time = measure(lambda: self.first_page(SearchResults(query)))
+
+            self.stdout.write(
+                f"{label:<16}{found:>9}{format_measure(like_time):>19}"
+                f"{format_measure(fts_time):>19}"
+                f"{like_time[0] / fts_time[0]:>8.1f}x"
+            )
+
+    @staticmethod
+    def first_page(results):
+        page = Paginator(results, PAGE_SIZE).get_page(1)
+        list(page)
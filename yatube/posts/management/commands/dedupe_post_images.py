@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.template.defaultfilters import filesizeformat
+
+from posts.thumbnails import migrate_post_images
+
+
+class Command(BaseCommand):
+    help = (
+        "Переносит изображения постов в хранилище с адресацией "
+        "по содержимому: одинаковые файлы хранятся один раз, миниатюры "
+        "у них общие. Выводит объем освобожденного места."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Только подсчитать, ничего не изменяя",
+        )
+
+    def handle(self, *args, **options):
+        result = migrate_post_images(dry_run=options["dry_run"])
+
+        for name in result.missing:
+            self.stderr.write(self.style.WARNING(f"Нет файла: {name}"))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Файлов: {result.files}, уникальных: {result.blobs}, "
+                f"дубликатов: {result.duplicates}, освобождено: "
+                f"{filesizeformat(result.reclaimed)}"
+            )
+        )
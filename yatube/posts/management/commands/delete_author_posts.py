@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.models import User
+from posts.moderation import MODERATION_CHUNK_SIZE, delete_author_posts
+
+
+class Command(BaseCommand):
+    help = (
+        "Удаляет все посты авторов вместе с комментариями порциями, "
+        "затем пересчитывает счетчики и сбрасывает кэш лент."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("usernames", nargs="+")
+        parser.add_argument(
+            "--chunk-size", type=int, default=MODERATION_CHUNK_SIZE
+        )
+
+    def handle(self, *args, **options):
+        usernames = set(options["usernames"])
+        authors = dict(
+            User.objects.filter(username__in=usernames).values_list(
+                "username", "pk"
+            )
+        )
+        missing = usernames - set(authors)
+
+        if missing:
+            raise CommandError(f"Нет пользователей: {', '.join(missing)}")
+
+        deleted = delete_author_posts(
+            list(authors.values()), options["chunk_size"], self.progress
+        )
+
+        self.stdout.write(self.style.SUCCESS(f"Удалено постов: {deleted}"))
+
+    def progress(self, done: int, total: int):
+        self.stdout.write(f"{done}/{total}")
@@ -0,0 +1,60 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.export import EXPORTS, FORMATS, export_lines, export_queryset
+
+
+class Command(BaseCommand):
+    help = (
+        "Выгружает посты, комментарии, подписки или группы в CSV или JSON "
+        "lines. Строки читаются из БД порциями и сразу записываются, "
+        "поэтому память не зависит от объема выгрузки."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("model", choices=sorted(EXPORTS))
+        parser.add_argument(
+            "--format", choices=sorted(FORMATS), default="csv"
+        )
+        parser.add_argument("--author", help="Имя пользователя автора")
+        parser.add_argument("--group", help="Адрес (slug) группы")
+        parser.add_argument(
+            "--since",
+            type=datetime.date.fromisoformat,
+            help="Первый день, ГГГГ-ММ-ДД",
+        )
+        parser.add_argument(
+            "--until",
+            type=datetime.date.fromisoformat,
+            help="Последний день, ГГГГ-ММ-ДД",
+        )
+        parser.add_argument(
+            "--output", help="Файл выгрузки; без него — стандартный вывод"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            queryset = export_queryset(
+                options["model"],
+                author=options["author"],
+                group=options["group"],
+                since=options["since"],
+                until=options["until"],
+            )
+        except ValueError as error:
+            raise CommandError(error)
+
+        lines = export_lines(options["model"], queryset, options["format"])
+
+        if options["output"] is None:
+            for line in lines:
+                self.stdout.write(line, ending="")
+            return
+
+        with open(
+            options["output"], "w", encoding="utf-8", newline=""
+        ) as file:
+            file.writelines(lines)
+
+        self.stderr.write(self.style.SUCCESS(f"Записано: {options['output']}"))
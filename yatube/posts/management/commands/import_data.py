@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.bulk_import import (
+    IMPORT_CHUNK_SIZE,
+    IMPORTERS,
+    import_rows,
+    read_rows,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Загружает посты или комментарии из CSV или JSON lines в формате "
+        "выгрузки (export_data) с сохранением id. Строки проверяются и "
+        "вставляются порциями, поисковый индекс, ленты подписок, счетчики "
+        "и кэш обновляются один раз в конце."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("model", choices=sorted(IMPORTERS))
+        parser.add_argument("file")
+        parser.add_argument(
+            "--format", choices=("csv", "jsonl"), default="csv"
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=IMPORT_CHUNK_SIZE
+        )
+        parser.add_argument(
+            "--create-authors",
+            action="store_true",
+            help="Создать отсутствующих авторов (без пароля)",
+        )
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size должен быть не меньше 1")
+
+        with open(options["file"], encoding="utf-8", newline="") as file:
+            result = import_rows(
+                options["model"],
+                read_rows(file, options["format"]),
+                options["chunk_size"],
+                options["create_authors"],
+                self.progress,
+            )
+
+        for error in result.errors:
+            self.stderr.write(error)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Создано: {result.created}, с ошибками: {result.invalid}, "
+                f"{result.seconds:.1f} с, "
+                f"{result.created / max(result.seconds, 1e-6):.0f} строк/с"
+            )
+        )
+
+    def progress(self, created: int, rate: float):
+        self.stdout.write(f"{created} ({rate:.0f} строк/с)")
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.models import Group, Post
+from posts.moderation import MODERATION_CHUNK_SIZE, move_posts
+
+
+class Command(BaseCommand):
+    help = (
+        "Переносит посты группы в другую группу (или убирает из групп) "
+        "порциями, затем сбрасывает счетчики и кэш лент."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("source", help="Адрес (slug) исходной группы")
+        parser.add_argument(
+            "target", nargs="?", help="Адрес группы; без него — без группы"
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=MODERATION_CHUNK_SIZE
+        )
+
+    def handle(self, *args, **options):
+        source = self.get_group(options["source"])
+        target = options["target"] and self.get_group(options["target"])
+
+        moved = move_posts(
+            Post.objects.filter(group=source),
+            target,
+            options["chunk_size"],
+            self.progress,
+        )
+
+        self.stdout.write(self.style.SUCCESS(f"Перенесено постов: {moved}"))
+
+    @staticmethod
+    def get_group(slug: str) -> Group:
+        try:
+            return Group.objects.get(slug=slug)
+        except Group.DoesNotExist:
+            raise CommandError(f"Нет группы: {slug}")
+
+    def progress(self, done: int, total: int):
+        self.stdout.write(f"{done}/{total}")
@@ -0,0 +1,54 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from posts.models import Comment
+from posts.moderation import MODERATION_CHUNK_SIZE, purge_comments
+
+
+def parse_date(value: str) -> datetime.datetime:
+    try:
+        date = datetime.date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"Неверная дата: {value}, нужна ГГГГ-ММ-ДД")
+
+    return timezone.make_aware(
+        datetime.datetime.combine(date, datetime.time.min)
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Удаляет комментарии, оставленные в интервале дат (включительно), "
+        "порциями, затем пересчитывает количество комментариев постов."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("since", help="Первый день, ГГГГ-ММ-ДД")
+        parser.add_argument("until", help="Последний день, ГГГГ-ММ-ДД")
+        parser.add_argument("--author", help="Только комментарии автора")
+        parser.add_argument(
+            "--chunk-size", type=int, default=MODERATION_CHUNK_SIZE
+        )
+
+    def handle(self, *args, **options):
+        comments = Comment.objects.filter(
+            created__gte=parse_date(options["since"]),
+            created__lt=parse_date(options["until"])
+            + datetime.timedelta(days=1),
+        )
+
+        if options["author"]:
+            comments = comments.filter(author__username=options["author"])
+
+        deleted = purge_comments(
+            comments, options["chunk_size"], self.progress
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Удалено комментариев: {deleted}")
+        )
+
+    def progress(self, done: int, total: int):
+        self.stdout.write(f"{done}/{total}")
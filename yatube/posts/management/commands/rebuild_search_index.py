@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from posts.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Заново строит полнотекстовый индекс постов, например после "
+        "массовых изменений текстов в обход сигналов."
+    )
+
+    def handle(self, *args, **options):
+        posts = rebuild_index()
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Проиндексировано постов: {posts}")
+        )
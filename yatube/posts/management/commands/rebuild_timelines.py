@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from posts.timeline import rebuild_timelines
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересобирает ленты подписок: заново определяет авторов без рассылки "
+        "по порогу POSTS_FANOUT_THRESHOLD и заполняет ленты остальных."
+    )
+
+    def handle(self, *args, **options):
+        entries = rebuild_timelines()
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Записей в лентах подписок: {entries}")
+        )
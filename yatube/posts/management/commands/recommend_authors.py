@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.recommendations import (
+    RECOMMENDATIONS_BATCH_SIZE,
+    compute_recommendations,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает рекомендации «кого читать»: для каждого читателя "
+        "сохраняет авторов, на которых подписано больше всего авторов "
+        "из его подписок. Запускается периодически, например из cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit",
+            type=int,
+            help="Авторов на читателя (по умолчанию "
+            "POSTS_RECOMMENDATIONS_LIMIT)",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=RECOMMENDATIONS_BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        created = compute_recommendations(
+            options["limit"], options["batch_size"], self.progress
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Рекомендаций: {created}, "
+                f"{time.monotonic() - started:.1f} с"
+            )
+        )
+
+    def progress(self, created: int):
+        self.stdout.write(f"{created}")
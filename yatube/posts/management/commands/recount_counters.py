@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import recount_comments, recount_user_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает счетчики постов, подписчиков и подписок пользователей "
+        "и счетчики комментариев постов."
+    )
+
+    def handle(self, *args, **options):
+        users = recount_user_stats()
+        posts = recount_comments()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Пересчитано: пользователей — {users}, постов — {posts}"
+            )
+        )
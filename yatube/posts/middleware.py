@@ -0,0 +1,170 @@
+import hashlib
+from datetime import datetime
+from typing import Callable, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from .cache import FEED_ALL, FEED_AUTHOR, FEED_GROUP, get_version
+from .models import Comment, Group, Post, User
+
+PageState = Tuple[str, Optional[datetime]]
+
+
+def latest_created(queryset: models.QuerySet) -> Optional[datetime]:
+    return queryset.aggregate(latest=models.Max("created"))["latest"]
+
+
+def index_state() -> PageState:
+    return get_version(FEED_ALL), latest_created(Post.objects.all())
+
+
+def group_state(slug: str) -> Optional[PageState]:
+    group_id = (
+        Group.objects.filter(slug=slug).values_list("pk", flat=True).first()
+    )
+
+    if group_id is None:
+        return None
+
+    return (
+        get_version(FEED_GROUP, group_id),
+        latest_created(Post.objects.filter(group_id=group_id)),
+    )
+
+
+def profile_state(username: str) -> Optional[PageState]:
+    author_id = (
+        User.objects.filter(username=username)
+        .values_list("pk", flat=True)
+        .first()
+    )
+
+    if author_id is None:
+        return None
+
+    return (
+        get_version(FEED_AUTHOR, author_id),
+        latest_created(Post.objects.filter(author_id=author_id)),
+    )
+
+
+def post_detail_state(pk: int) -> Optional[PageState]:
+    post = Post.objects.filter(pk=pk).values("author_id", "created").first()
+
+    if post is None:
+        return None
+
+    comment_created = latest_created(Comment.objects.filter(post_id=pk))
+
+    return (
+        get_version(FEED_AUTHOR, post["author_id"]),
+        max(filter(None, (post["created"], comment_created))),
+    )
+
+
+def comment_replies_state(pk: int, comment_id: int) -> Optional[PageState]:
+    return post_detail_state(pk)
+
+
+PAGE_STATES = {
+    "index": index_state,
+    "group_list": group_state,
+    "profile": profile_state,
+    "post_detail": post_detail_state,
+    "post_comments": post_detail_state,
+    "comment_replies": comment_replies_state,
+}
+
+
+class AnonymousPageCacheMiddleware:
+    """
+    Кэширует страницы лент и постов целиком для анонимных посетителей.
+
+    ETag страницы строится из версии ее ленты и адреса, Last-Modified —
+    из времени последнего поста (комментария) ленты. Неизменившиеся
+    страницы отдаются ответом 304, закэшированные — без вызова
+    представления. Запросы пользователей с сессией кэш обходят.
+
+    Ответ 304 дается только по совпадению ETag: время последнего поста
+    не учитывает правки и уменьшается при удалении, поэтому
+    If-Modified-Since без ETag не проверяется.
+    """
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]):
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        response = self.get_response(request)
+        page = getattr(request, "_page_cache", None)
+
+        if page is not None:
+            self.update_response(response, *page)
+
+        return response
+
+    @staticmethod
+    def is_cacheable(request: HttpRequest) -> bool:
+        return (
+            request.method in ("GET", "HEAD")
+            and not request.user.is_authenticated
+            and settings.SESSION_COOKIE_NAME not in request.COOKIES
+            and "messages" not in request.COOKIES
+        )
+
+    def process_view(self, request: HttpRequest, view_func, args, kwargs):
+        match = request.resolver_match
+        get_state = PAGE_STATES.get(match.url_name)
+
+        if (
+            match.namespace != "posts"
+            or get_state is None
+            or not self.is_cacheable(request)
+        ):
+            return None
+
+        state = get_state(**kwargs)
+
+        if state is None:
+            return None
+
+        version, last_modified = state
+        etag = quote_etag(
+            hashlib.md5(
+                f"{version}:{request.get_full_path()}".encode()
+            ).hexdigest()
+        )
+        last_modified = last_modified and int(last_modified.timestamp())
+
+        response = get_conditional_response(request, etag=etag)
+
+        if response is not None:
+            response["ETag"] = etag
+            return response
+
+        cache_key = f"posts:page:{etag}"
+        response = cache.get(cache_key)
+
+        if response is None:
+            request._page_cache = (cache_key, etag, last_modified)
+
+        return response
+
+    @staticmethod
+    def update_response(
+        response: HttpResponse,
+        cache_key: str,
+        etag: str,
+        last_modified: Optional[int],
+    ):
+        response["ETag"] = etag
+        if last_modified:
+            response["Last-Modified"] = http_date(last_modified)
+        patch_vary_headers(response, ("Cookie",))
+
+        if response.status_code == 200 and not response.cookies:
+            cache.set(cache_key, response, settings.POSTS_PAGE_CACHE_TIMEOUT)
@@ -0,0 +1,22 @@
+# Generated by Django 2.2.28 on 2026-10-18 19:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_timeline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userstats',
+            name='fanout_disabled',
+            field=models.BooleanField(default=False, help_text='Посты автора не рассылаются в ленты подписчиков', verbose_name='Лента подписчиков собирается при чтении'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', '-created'], name='post_author_created'),
+        ),
+    ]
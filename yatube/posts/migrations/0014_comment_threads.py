@@ -0,0 +1,41 @@
+# Generated by Django 2.2.28 on 2026-10-18 20:05
+
+from django.db import migrations, models
+from django.db.models.functions import Cast, Concat, LPad
+import django.db.models.deletion
+
+
+def fill_paths(apps, schema_editor):
+    # Все существующие комментарии — корни веток.
+    Comment = apps.get_model('posts', 'Comment')
+    Comment.objects.update(
+        path=Concat(
+            LPad(Cast('id', models.CharField()), 10, models.Value('0')),
+            models.Value('/'),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_post_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='parent',
+            field=models.ForeignKey(blank=True, help_text='Комментарий, на который это ответ', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='posts.Comment', verbose_name='Ответ на'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(default='', editable=False, max_length=55, verbose_name='Путь в ветке'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'path'], name='comment_post_path'),
+        ),
+        migrations.RunPython(fill_paths, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,30 @@
 from core.models import CreatedModel
+from core.storage import ContentAddressedStorage
 from django.contrib.auth import get_user_model
 from django.db import models
 
 User = get_user_model()
 
+FEED_FIELDS = (
+    "text",
+    "created",
+    "image",
+    "author__username",
+    "author__first_name",
+    "author__last_name",
+    "group__slug",
+    "group__title",
+)
+
+# Путь комментария в ветке — id всех предков и его собственный, каждый
+# в `COMMENT_PATH_DIGITS` цифр с разделителем. Пути сортируются в порядке
+# обхода дерева, а ветка комментария — диапазон путей с его путем в начале.
+COMMENT_PATH_DIGITS = 10
+COMMENT_PATH_STEP = COMMENT_PATH_DIGITS + 1
+# Глубина ответов: ответ на комментарий последнего уровня становится
+# соседним с ним.
+COMMENT_MAX_DEPTH = 4
+
 
 class Group(models.Model):
     title = models.CharField(
@@ -27,6 +48,15 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def for_feed(self) -> "PostQuerySet":
+        """
+        Посты для лент: автор и группа загружаются одним JOIN,
+        выбираются только поля, нужные карточке поста.
+        """
+        return self.select_related("author", "group").only(*FEED_FIELDS)
+
+
 class Post(CreatedModel):
     text = models.TextField(
         verbose_name="Текст поста", help_text="Введите текст поста"
@@ -47,10 +77,27 @@ class Post(CreatedModel):
         verbose_name="Группа",
         help_text="Группа, к которой относится пост",
     )
-    image = models.ImageField("Картинка", upload_to="posts/", blank=True)
+    image = models.ImageField(
+        "Картинка",
+        upload_to="posts/",
+        storage=ContentAddressedStorage(),
+        blank=True,
+    )
+    comments_count = models.PositiveIntegerField(
+        verbose_name="Количество комментариев",
+        help_text="Обновляется автоматически",
+        default=0,
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ["-created"]
+        indexes = [
+            models.Index(
+                fields=["author", "-created"], name="post_author_created"
+            )
+        ]
         verbose_name = "Пост"
         verbose_name_plural = "Посты"
 
@@ -76,12 +123,52 @@ class Comment(CreatedModel):
     text = models.TextField(
         verbose_name="Текст комментария", help_text="Введите текст комментария"
     )
+    parent = models.ForeignKey(
+        "self",
+        on_delete=models.CASCADE,
+        related_name="replies",
+        blank=True,
+        null=True,
+        verbose_name="Ответ на",
+        help_text="Комментарий, на который это ответ",
+    )
+    path = models.CharField(
+        verbose_name="Путь в ветке",
+        max_length=COMMENT_PATH_STEP * (COMMENT_MAX_DEPTH + 1),
+        editable=False,
+        default="",
+    )
 
     class Meta:
         ordering = ["-created"]
+        indexes = [
+            models.Index(fields=["post", "path"], name="comment_post_path")
+        ]
         verbose_name = "Комментарий"
         verbose_name_plural = "Комментарии"
 
+    @property
+    def depth(self) -> int:
+        return max(len(self.path) // COMMENT_PATH_STEP - 1, 0)
+
+    def save(self, *args, **kwargs):
+        """Новому комментарию после вставки назначается путь в ветке."""
+        if self.pk is not None:
+            return super().save(*args, **kwargs)
+
+        parent_path = ""
+
+        if self.parent is not None:
+            if self.parent.depth >= COMMENT_MAX_DEPTH:
+                self.parent = self.parent.parent
+
+            parent_path = self.parent.path
+
+        super().save(*args, **kwargs)
+
+        self.path = f"{parent_path}{self.pk:0{COMMENT_PATH_DIGITS}d}/"
+        Comment.objects.filter(pk=self.pk).update(path=self.path)
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -107,3 +194,103 @@ class Follow(models.Model):
         ]
         verbose_name = "Подписка"
         verbose_name_plural = "Подписки"
+
+
+class UserStats(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="stats",
+        verbose_name="Пользователь",
+    )
+    posts_count = models.PositiveIntegerField(
+        verbose_name="Количество постов", default=0
+    )
+    followers_count = models.PositiveIntegerField(
+        verbose_name="Количество подписчиков", default=0
+    )
+    following_count = models.PositiveIntegerField(
+        verbose_name="Количество подписок", default=0
+    )
+    fanout_disabled = models.BooleanField(
+        verbose_name="Лента подписчиков собирается при чтении",
+        help_text="Посты автора не рассылаются в ленты подписчиков",
+        default=False,
+    )
+
+    class Meta:
+        verbose_name = "Счетчики пользователя"
+        verbose_name_plural = "Счетчики пользователей"
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="timeline",
+        verbose_name="Читатель",
+        help_text="Пользователь, в ленту подписок которого попал пост",
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name="timeline_entries",
+        verbose_name="Пост",
+        help_text="Пост автора, на которого подписан читатель",
+    )
+    created = models.DateTimeField(
+        verbose_name="Дата создания поста",
+        help_text="Копия даты поста для выборки ленты по индексу",
+    )
+
+    class Meta:
+        ordering = ["-created"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "post"], name="unique timeline entry"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "-created"], name="timeline_user_created"
+            )
+        ]
+        verbose_name = "Запись ленты подписок"
+        verbose_name_plural = "Записи лент подписок"
+
+
+class Recommendation(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="recommendations",
+        verbose_name="Читатель",
+        help_text="Пользователь, которому рекомендуется автор",
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name="Автор",
+        help_text="Рекомендуемый автор",
+    )
+    score = models.PositiveIntegerField(
+        verbose_name="Вес",
+        help_text="Сколько авторов из подписок читателя подписаны на автора",
+    )
+
+    class Meta:
+        ordering = ["-score"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "author"], name="unique recommendation"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "-score"], name="recommendation_user_score"
+            )
+        ]
+        verbose_name = "Рекомендация автора"
+        verbose_name_plural = "Рекомендации авторов"
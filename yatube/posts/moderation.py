@@ -0,0 +1,178 @@
+from typing import Callable, Iterator, List, Optional, Set
+
+from django.db import models, transaction
+
+from . import search, threads
+from .cache import bump_post_versions, reset_feed_counts
+from .counters import recount_comments, recount_user_stats
+from .models import Comment, Follow, Group, Post, TimelineEntry
+
+MODERATION_CHUNK_SIZE = 500
+
+# Вызывается после каждой порции: обработано объектов и всего.
+Progress = Callable[[int, int], None]
+
+
+def chunks(
+    queryset: models.QuerySet,
+    chunk_size: int,
+    progress: Optional[Progress] = None,
+) -> Iterator[List[int]]:
+    """
+    Id объектов выборки порциями по возрастанию. Следующая порция
+    выбирается после обработки предыдущей по условию `pk > последний`,
+    поэтому выборка может меняться при обработке (удаление, перенос).
+    """
+    total = queryset.count()
+    done = 0
+    last_id = 0
+
+    while True:
+        ids = list(
+            queryset.filter(pk__gt=last_id)
+            .order_by("pk")
+            .values_list("pk", flat=True)[:chunk_size]
+        )
+
+        if not ids:
+            break
+
+        yield ids
+
+        done += len(ids)
+        last_id = ids[-1]
+
+        if progress is not None:
+            progress(min(done, total), total)
+
+
+def raw_delete(queryset: models.QuerySet) -> int:
+    """
+    Удаляет строки одним DELETE, без загрузки объектов, каскада Django
+    и сигналов; связанные данные обновляются вызывающим кодом.
+    """
+    return queryset._raw_delete(queryset.db)
+
+
+def refresh_posts_state(
+    author_ids: Set[int], group_ids: Set[Optional[int]]
+):
+    """
+    Пересчитывает счетчики и сбрасывает кэш лент после массового
+    изменения постов авторов и групп — один раз на всю операцию.
+    """
+    follower_ids = (
+        Follow.objects.filter(author_id__in=author_ids)
+        .order_by()
+        .values_list("user_id", flat=True)
+        .distinct()
+    )
+
+    recount_user_stats(author_ids)
+    reset_feed_counts(author_ids, group_ids)
+    bump_post_versions(author_ids, group_ids, list(follower_ids))
+
+
+def delete_posts(
+    queryset: models.QuerySet,
+    chunk_size: int = MODERATION_CHUNK_SIZE,
+    progress: Optional[Progress] = None,
+) -> int:
+    """
+    Удаляет посты выборки вместе с комментариями и записями лент подписок
+    порциями по `chunk_size`, без сигналов для каждой строки.
+    """
+    author_ids: Set[int] = set()
+    group_ids: Set[Optional[int]] = set()
+    deleted = 0
+
+    for ids in chunks(queryset, chunk_size, progress):
+        with transaction.atomic():
+            posts = Post.objects.filter(pk__in=ids)
+
+            for author_id, group_id in posts.values_list(
+                "author_id", "group_id"
+            ):
+                author_ids.add(author_id)
+                group_ids.add(group_id)
+
+            raw_delete(TimelineEntry.objects.filter(post_id__in=ids))
+            raw_delete(Comment.objects.filter(post_id__in=ids))
+            deleted += raw_delete(posts)
+            search.unindex_posts(ids)
+
+    if deleted:
+        refresh_posts_state(author_ids, group_ids)
+
+    return deleted
+
+
+def delete_author_posts(
+    author_ids: List[int],
+    chunk_size: int = MODERATION_CHUNK_SIZE,
+    progress: Optional[Progress] = None,
+) -> int:
+    """Удаляет все посты авторов (см. `delete_posts`)."""
+    return delete_posts(
+        Post.objects.filter(author_id__in=author_ids), chunk_size, progress
+    )
+
+
+def move_posts(
+    queryset: models.QuerySet,
+    group: Optional[Group],
+    chunk_size: int = MODERATION_CHUNK_SIZE,
+    progress: Optional[Progress] = None,
+) -> int:
+    """Переносит посты выборки в группу `group` (`None` — без группы)."""
+    author_ids: Set[int] = set()
+    group_ids: Set[Optional[int]] = {group.pk} if group else set()
+    moved = 0
+
+    for ids in chunks(queryset, chunk_size, progress):
+        with transaction.atomic():
+            posts = Post.objects.filter(pk__in=ids)
+
+            for author_id, group_id in posts.values_list(
+                "author_id", "group_id"
+            ):
+                author_ids.add(author_id)
+                group_ids.add(group_id)
+
+            moved += posts.update(group=group)
+
+    if moved:
+        refresh_posts_state(author_ids, group_ids)
+
+    return moved
+
+
+def purge_comments(
+    queryset: models.QuerySet,
+    chunk_size: int = MODERATION_CHUNK_SIZE,
+    progress: Optional[Progress] = None,
+) -> int:
+    """
+    Удаляет комментарии выборки вместе с ответами на них порциями, затем
+    одним UPDATE пересчитывает количество комментариев затронутых постов.
+    """
+    post_ids: Set[int] = set()
+    deleted = 0
+
+    for ids in chunks(queryset, chunk_size, progress):
+        with transaction.atomic():
+            comments = Comment.objects.filter(
+                pk__in=threads.with_replies(ids)
+            )
+            post_ids.update(comments.values_list("post_id", flat=True))
+            deleted += raw_delete(comments)
+
+    if deleted:
+        recount_comments(post_ids)
+        posts = Post.objects.filter(pk__in=post_ids)
+        bump_post_versions(
+            set(posts.values_list("author_id", flat=True)),
+            set(posts.values_list("group_id", flat=True)),
+        )
+
+    return deleted
@@ -0,0 +1,118 @@
+from typing import Callable, List, Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from . import follows
+from .models import Follow, Recommendation, User
+
+# Читателей, рекомендации которых пересчитываются за раз.
+RECOMMENDATIONS_BATCH_SIZE = 1000
+
+Progress = Callable[[int], None]
+
+
+def recommendations_limit() -> int:
+    return settings.POSTS_RECOMMENDATIONS_LIMIT
+
+
+def recommendations_sql() -> str:
+    """
+    Вставка лучших рекомендаций читателей с id из диапазона.
+
+    Вес автора — число авторов из подписок читателя, подписанных на него:
+    произведение матрицы подписок на себя, которое считается соединением
+    таблицы подписок с собой и группировкой. Авторы, на которых читатель
+    уже подписан, и он сам пропускаются; из остальных оконной функцией
+    отбираются первые по весу.
+    """
+    ops = connection.ops
+    follow = ops.quote_name(Follow._meta.db_table)
+    recommendation = ops.quote_name(Recommendation._meta.db_table)
+
+    return (
+        f"INSERT INTO {recommendation} (user_id, author_id, score) "
+        "SELECT user_id, author_id, score FROM ("
+        "SELECT mine.user_id, theirs.author_id, COUNT(*) AS score, "
+        "row_number() OVER ("
+        "PARTITION BY mine.user_id "
+        "ORDER BY COUNT(*) DESC, theirs.author_id"
+        ") AS position "
+        f"FROM {follow} mine "
+        f"JOIN {follow} theirs ON theirs.user_id = mine.author_id "
+        "WHERE mine.user_id BETWEEN %s AND %s "
+        "AND theirs.author_id <> mine.user_id "
+        "AND NOT EXISTS ("
+        f"SELECT 1 FROM {follow} known "
+        "WHERE known.user_id = mine.user_id "
+        "AND known.author_id = theirs.author_id"
+        ") "
+        "GROUP BY mine.user_id, theirs.author_id"
+        ") AS scores WHERE position <= %s"
+    )
+
+
+def compute_recommendations(
+    limit: Optional[int] = None,
+    batch_size: int = RECOMMENDATIONS_BATCH_SIZE,
+    progress: Optional[Progress] = None,
+) -> int:
+    """
+    Пересчитывает рекомендации авторов для всех читателей, по
+    `batch_size` читателей за транзакцию: старые рекомендации диапазона
+    id заменяются новыми одним запросом, поэтому таблица ни в какой
+    момент не пустеет целиком. Возвращает число рекомендаций.
+    """
+    limit = limit or recommendations_limit()
+    user_ids = list(
+        Follow.objects.order_by("user_id")
+        .values_list("user_id", flat=True)
+        .distinct()
+    )
+    sql = recommendations_sql()
+    previous = 0
+    created = 0
+
+    for start in range(0, len(user_ids), batch_size):
+        first = user_ids[start]
+        last = user_ids[start:start + batch_size][-1]
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            Recommendation.objects.filter(
+                user_id__gt=previous, user_id__lte=last
+            ).delete()
+            cursor.execute(sql, [first, last, limit])
+            created += cursor.rowcount
+
+        previous = last
+
+        if progress:
+            progress(created)
+
+    Recommendation.objects.filter(user_id__gt=previous).delete()
+
+    return created
+
+
+def recommended_authors(user: User, limit: Optional[int] = None) -> List[User]:
+    """
+    Рекомендуемые пользователю авторы по убыванию веса — один запрос.
+    Авторы, на которых пользователь подписался после пересчета,
+    отбрасываются по закэшированным подпискам.
+    """
+    if not user.is_authenticated:
+        return []
+
+    following = follows.following_ids(user)
+    recommendations = (
+        Recommendation.objects.filter(user_id=user.id)
+        .select_related("author")
+        .order_by("-score", "author_id")
+    )
+    authors = [
+        recommendation.author
+        for recommendation in recommendations
+        if recommendation.author_id not in following
+    ]
+
+    return authors[: limit or recommendations_limit()]
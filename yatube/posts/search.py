@@ -0,0 +1,199 @@
+import re
+from typing import List, Union
+
+from core.helpers import RawSubquery
+from django.db import connection
+
+from .models import Post, PostQuerySet
+
+# Таблица FTS5 с текстами постов, `rowid` — id поста (см. миграцию 0013).
+SEARCH_TABLE = "posts_post_fts"
+
+# Токенизатор FTS5 не приравнивает «ё» к «е», поэтому буква заменяется
+# в индексируемом тексте и в запросе.
+YO_TABLE = str.maketrans("ёЁ", "еЕ")
+YO_SQL = "replace(replace(text, 'ё', 'е'), 'Ё', 'Е')"
+
+# Id постов в одном запросе индексации.
+INDEX_BATCH_SIZE = 500
+
+
+def is_supported() -> bool:
+    """Полнотекстовый индекс есть только у SQLite."""
+    return connection.vendor == "sqlite"
+
+
+def match_query(query: str) -> str:
+    """
+    Запрос FTS5 из строки пользователя: все слова обязательны и ищутся
+    по началу слова. Операторы FTS5 в строке не интерпретируются.
+    """
+    words = re.findall(r"\w+", query.translate(YO_TABLE))
+
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def index_post(post_id: int, text: str):
+    if not is_supported():
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [post_id]
+        )
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, text) VALUES (%s, %s)",
+            [post_id, text.translate(YO_TABLE)],
+        )
+
+
+def index_posts_after(post_id: int):
+    """
+    Индексирует посты с id больше `post_id` (добавленные импортом).
+    Посты, созданные на сайте во время импорта, уже проиндексированы
+    сигналом, поэтому прежние записи диапазона удаляются.
+    """
+    if not is_supported():
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {SEARCH_TABLE} WHERE rowid > %s", [post_id]
+        )
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, text) "
+            f"SELECT id, {YO_SQL} FROM posts_post WHERE id > %s",
+            [post_id],
+        )
+
+
+def index_posts(post_ids: List[int]):
+    """Индексирует посты с заданными id (добавленные импортом)."""
+    if not is_supported():
+        return
+
+    for start in range(0, len(post_ids), INDEX_BATCH_SIZE):
+        batch = post_ids[start:start + INDEX_BATCH_SIZE]
+        placeholders = ", ".join(["%s"] * len(batch))
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {SEARCH_TABLE} "
+                f"WHERE rowid IN ({placeholders})",
+                batch,
+            )
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE} (rowid, text) "
+                f"SELECT id, {YO_SQL} FROM posts_post "
+                f"WHERE id IN ({placeholders})",
+                batch,
+            )
+
+
+def unindex_post(post_id: int):
+    unindex_posts([post_id])
+
+
+def unindex_posts(post_ids: List[int]):
+    if not is_supported() or not post_ids:
+        return
+
+    placeholders = ", ".join(["%s"] * len(post_ids))
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({placeholders})",
+            post_ids,
+        )
+
+
+def rebuild_index() -> int:
+    """
+    Заново строит индекс по всем постам (после массовых изменений
+    в обход сигналов). Возвращает количество проиндексированных постов.
+    """
+    if not is_supported():
+        return 0
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, text) "
+            f"SELECT id, {YO_SQL} FROM posts_post"
+        )
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('optimize')"
+        )
+        cursor.execute(f"SELECT count(*) FROM {SEARCH_TABLE}")
+
+        return cursor.fetchone()[0]
+
+
+class SearchResults:
+    """
+    Посты, найденные по индексу, по убыванию релевантности (BM25),
+    при равной — сначала новые. Срез загружает только посты страницы,
+    поэтому результаты передаются в `Paginator` как есть.
+    """
+
+    def __init__(self, query: str):
+        self.match = match_query(query)
+
+    def count(self) -> int:
+        if not self.match:
+            return 0
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT count(*) FROM {SEARCH_TABLE} "
+                f"WHERE {SEARCH_TABLE} MATCH %s",
+                [self.match],
+            )
+
+            return cursor.fetchone()[0]
+
+    def __getitem__(self, index: slice) -> List[Post]:
+        if not self.match:
+            return []
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {SEARCH_TABLE} "
+                f"WHERE {SEARCH_TABLE} MATCH %s "
+                "ORDER BY rank, rowid DESC LIMIT %s OFFSET %s",
+                [self.match, index.stop - index.start, index.start],
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+
+        posts = Post.objects.for_feed().in_bulk(ids)
+
+        return [posts[pk] for pk in ids if pk in posts]
+
+
+def filter_posts(queryset: PostQuerySet, query: str) -> PostQuerySet:
+    """Оставляет в выборке посты со словами запроса (без ранжирования)."""
+    if not is_supported():
+        return queryset.filter(text__icontains=query)
+
+    match = match_query(query)
+
+    if not match:
+        return queryset.none()
+
+    return queryset.filter(
+        pk__in=RawSubquery(
+            f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s",
+            [match],
+        )
+    )
+
+
+def search_posts(query: str) -> Union[SearchResults, PostQuerySet]:
+    """
+    Посты, содержащие слова запроса. Без полнотекстового индекса —
+    поиск подстроки (`LIKE`) по всей таблице.
+    """
+    if is_supported():
+        return SearchResults(query)
+
+    return Post.objects.for_feed().filter(text__icontains=query)
@@ -0,0 +1,154 @@
+from django.db.models.signals import (
+    post_delete,
+    post_init,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+
+from . import follows, search, timeline
+from .cache import bump_post_versions, change_feed_counts, reset_group_count
+from .counters import (
+    change_comments_count,
+    change_user_stats,
+    finish_user_deletion,
+    start_user_deletion,
+)
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+
+def get_follower_ids(author_id: int):
+    return list(
+        Follow.objects.filter(author_id=author_id).values_list(
+            "user_id", flat=True
+        )
+    )
+
+
+@receiver(post_save, sender=User)
+def user_created(sender, instance: User, created: bool, **kwargs):
+    if created and not kwargs.get("raw"):
+        UserStats.objects.get_or_create(user=instance)
+
+
+@receiver(pre_delete, sender=User)
+def user_deleting(sender, instance: User, **kwargs):
+    start_user_deletion(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance: User, **kwargs):
+    finish_user_deletion(instance.pk)
+
+
+@receiver(post_init, sender=Post)
+def post_remember_group(sender, instance: Post, **kwargs):
+    """Запоминает исходную группу поста (без загрузки отложенных полей)."""
+    instance._group_id_initial = instance.__dict__.get("group_id")
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance: Post, created: bool, **kwargs):
+    fanout = timeline.is_fanout_enabled(instance.author_id)
+    follower_ids = get_follower_ids(instance.author_id) if fanout else []
+
+    if created:
+        change_user_stats(instance.author_id, posts_count=1)
+        change_feed_counts(1, instance.group_id, instance.author_id)
+
+        if fanout:
+            timeline.push_post(instance, follower_ids)
+
+    elif instance._group_id_initial != instance.group_id:
+        reset_group_count(instance._group_id_initial)
+        reset_group_count(instance.group_id)
+
+    bump_post_versions(
+        [instance.author_id],
+        [instance._group_id_initial, instance.group_id],
+        follower_ids,
+    )
+    instance._group_id_initial = instance.group_id
+
+    update_fields = kwargs.get("update_fields")
+    if update_fields is None or "text" in update_fields:
+        search.index_post(instance.pk, instance.text)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance: Post, **kwargs):
+    fanout = timeline.is_fanout_enabled(instance.author_id)
+    follower_ids = get_follower_ids(instance.author_id) if fanout else []
+
+    change_user_stats(instance.author_id, posts_count=-1)
+    change_feed_counts(-1, instance.group_id, instance.author_id)
+    bump_post_versions([instance.author_id], [instance.group_id], follower_ids)
+    search.unindex_post(instance.pk)
+
+
+def bump_comment_versions(post_id: int):
+    """Сменяет версии лент, в которых показывается пост комментария."""
+    post = Post.objects.filter(pk=post_id).values("author_id", "group_id")
+
+    for fields in post:
+        bump_post_versions([fields["author_id"]], [fields["group_id"]])
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance: Comment, created: bool, **kwargs):
+    if created:
+        change_comments_count(instance.post_id, 1)
+
+    bump_comment_versions(instance.post_id)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance: Comment, **kwargs):
+    change_comments_count(instance.post_id, -1)
+    bump_comment_versions(instance.post_id)
+
+
+def bump_group_versions(group: Group):
+    """
+    Сменяет версии лент, в которых показываются посты группы: название
+    и адрес группы выводятся в каждом посте.
+    """
+    author_ids = (
+        Post.objects.filter(group=group)
+        .order_by()
+        .values_list("author_id", flat=True)
+        .distinct()
+    )
+    follower_ids = (
+        Follow.objects.filter(author__posts__group=group)
+        .order_by()
+        .values_list("user_id", flat=True)
+        .distinct()
+    )
+
+    bump_post_versions(list(author_ids), [group.id], list(follower_ids))
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance: Group, created: bool, **kwargs):
+    if not created:
+        bump_group_versions(instance)
+
+
+@receiver(pre_delete, sender=Group)
+def group_deleting(sender, instance: Group, **kwargs):
+    """Версии сменяются до того, как у постов группы будет сброшена ссылка."""
+    bump_group_versions(instance)
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance: Follow, created: bool, **kwargs):
+    if created:
+        follows.followed(instance.user_id, instance.author_id)
+    else:
+        follows.bump_follow_versions(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance: Follow, **kwargs):
+    follows.unfollowed(instance.user_id, instance.author_id)
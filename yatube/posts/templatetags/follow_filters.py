@@ -0,0 +1,20 @@
+from typing import Union
+
+from django import template
+
+from .. import follows
+from ..models import User
+
+register = template.Library()
+
+
+@register.filter
+def follows_author(user: User, author: Union[User, int]) -> bool:
+    """
+    Подписан ли пользователь на автора (`{% if user|follows_author:id %}`).
+    Подписки загружаются один раз за запрос (`follows.following_ids`),
+    поэтому проверки для любого числа авторов страницы не требуют запросов.
+    """
+    author_id = author.pk if isinstance(author, User) else author
+
+    return follows.is_following(user, author_id)
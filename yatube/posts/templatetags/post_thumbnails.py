@@ -0,0 +1,21 @@
+from typing import Optional
+
+from django import template
+
+from .. import thumbnails
+from ..models import Post
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_thumbnail(post: Post) -> Optional[thumbnails.PostImage]:
+    """
+    Готовые миниатюры изображения поста. Обычно они уже подгружены для
+    всей страницы (`thumbnails.prefetch_thumbnails`). Если миниатюр еще
+    нет, их создание ставится в очередь, а шаблон показывает заглушку.
+    """
+    if not hasattr(post, "thumbnail"):
+        thumbnails.prefetch_thumbnails([post])
+
+    return post.thumbnail
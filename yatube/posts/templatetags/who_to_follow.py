@@ -0,0 +1,18 @@
+from typing import Any, Dict
+
+from django import template
+
+from .. import recommendations
+from ..models import User
+
+register = template.Library()
+
+
+@register.inclusion_tag("posts/includes/who_to_follow.html")
+def who_to_follow(user: User) -> Dict[str, Any]:
+    """
+    Блок «кого читать» с авторами, рекомендованными пользователю
+    (`recommendations.recommended_authors`) — один запрос к готовым
+    рекомендациям.
+    """
+    return {"authors": recommendations.recommended_authors(user)}
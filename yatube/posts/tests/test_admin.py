@@ -0,0 +1,118 @@
+from http import HTTPStatus
+
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Group, Post, User
+
+POSTS_COUNT = 15
+# Сессия, пользователь, страница постов с авторами и группами и два
+# запроса `date_hierarchy`; количество постов — из кэша лент.
+POST_CHANGELIST_QUERIES = 5
+
+
+class AdminTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.admin = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="admin"
+        )
+        cls.group = Group.objects.create(
+            title="Группа", slug="test_slug", description="Описание"
+        )
+        authors = [
+            User.objects.create(username=f"test_{i}") for i in range(3)
+        ]
+        cls.posts = [
+            Post.objects.create(
+                text=f"Текст {i}",
+                author=authors[i % len(authors)],
+                group=cls.group,
+            )
+            for i in range(POSTS_COUNT)
+        ]
+        for post in cls.posts:
+            Comment.objects.create(
+                text="Комментарий", author=post.author, post=post
+            )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(AdminTests.admin)
+
+    def get_changelist(self, model: str, **params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(
+                reverse(f"admin:posts_{model}_changelist"), params
+            )
+
+        return response, [query["sql"] for query in context]
+
+    def test_changelists(self):
+        """
+        Авторы, посты и группы строк загружаются вместе со списком:
+        число запросов не зависит от числа строк.
+        """
+        before = {}
+        for model in ("post", "comment"):
+            response, queries = self.get_changelist(model)
+            before[model] = queries
+
+            with self.subTest(model=model):
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+        author = User.objects.create(username="test_another")
+        for _ in range(POSTS_COUNT):
+            post = Post.objects.create(
+                text="Текст", author=author, group=AdminTests.group
+            )
+            Comment.objects.create(
+                text="Комментарий", author=author, post=post
+            )
+
+        _, queries = self.get_changelist("comment")
+
+        with self.subTest("Комментарии"):
+            self.assertEqual(len(queries), len(before["comment"]))
+
+        _, queries = self.get_changelist("post")
+
+        with self.subTest("Посты"):
+            self.assertEqual(len(queries), POST_CHANGELIST_QUERIES)
+
+    def test_counts(self):
+        """Точное количество не считается; без фильтров — из кэша."""
+        self.get_changelist("post")
+        _, queries = self.get_changelist("post")
+
+        with self.subTest("Без фильтров"):
+            self.assertFalse([sql for sql in queries if "COUNT(" in sql])
+
+        _, queries = self.get_changelist("comment")
+
+        with self.subTest("Подсчет ограничен"):
+            counts = [sql for sql in queries if "COUNT(" in sql]
+
+            self.assertEqual(len(counts), 1)
+            self.assertIn("LIMIT", counts[0])
+
+    def test_search(self):
+        """Поиск постов идет по полнотекстовому индексу."""
+        response, queries = self.get_changelist("post", q="текст 3")
+
+        self.assertEqual(
+            list(response.context["cl"].result_list),
+            [AdminTests.posts[3]],
+        )
+        self.assertTrue([sql for sql in queries if "posts_post_fts" in sql])
+
+        with self.subTest("Все найденные посты"):
+            response, _ = self.get_changelist("post", q="текст")
+
+            self.assertEqual(
+                len(response.context["cl"].result_list), POSTS_COUNT
+            )
@@ -1,9 +1,24 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
 from django.core.cache import cache
 from django.core.cache.utils import make_template_fragment_key
-from django.test import Client, TestCase
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from django.utils.module_loading import import_string
+from yatube.cache import cache_config
 
-from ..models import Post, User
+from ..cache import (
+    FEED_ALL,
+    bump_versions,
+    feed_count_key,
+    get_version,
+    version_key,
+)
+from ..models import Follow, Group, Post, User
 
 APP_NAME = "posts"
 
@@ -29,7 +44,9 @@ class CacheTests(TestCase):
         """Проверка кэширования списка постов главной страницы."""
         post = Post.objects.latest("id")
         post_text = str.encode(post.text)
-        cache_key = make_template_fragment_key("index_page", [1])
+        cache_key = make_template_fragment_key(
+            "index_page", [f"{get_version(FEED_ALL)}-1"]
+        )
 
         with self.subTest("Текст поста на странице"):
             response = self.client.get(reverse(f"{APP_NAME}:index"))
@@ -38,16 +55,245 @@ class CacheTests(TestCase):
         with self.subTest("Кеш создан"):
             self.assertIsNotNone(cache.get(cache_key))
 
-        with self.subTest("Текст поста на странице после удаления поста"):
+        with self.subTest("Текста поста нет на странице после удаления поста"):
             post.delete()
             response = self.client.get(reverse(f"{APP_NAME}:index"))
-            self.assertIn(post_text, response.content)
-
-        with self.subTest("Текста поста нет на странице после очистки кеша"):
-            cache.delete(cache_key)
-            response = self.client.get(reverse(f"{APP_NAME}:index"))
             self.assertNotIn(post_text, response.content)
 
+    def cache_group_rename(self):
+        """Переименование группы сбрасывает кэш лент с ее постами."""
+        group = Group.objects.create(title="Старая группа", slug="test")
+        Post.objects.create(text="Текст", author=CacheTests.user, group=group)
+
+        urls = (
+            reverse(f"{APP_NAME}:index"),
+            reverse(f"{APP_NAME}:group_list", kwargs={"slug": group.slug}),
+            reverse(
+                f"{APP_NAME}:profile",
+                kwargs={"username": CacheTests.user.username},
+            ),
+        )
+
+        for url in urls:
+            self.client.get(url)
+
+        group.title = "Новая группа"
+        group.save()
+
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertIn("Новая группа".encode(), response.content)
+
     def test_cache(self):
         """Проверка кэширования."""
         self.cache_post_index()
+        self.cache_group_rename()
+
+
+class FollowCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create(username="test_author")
+        cls.author_another = User.objects.create(username="test_another")
+        cls.user = User.objects.create(username="test")
+        cls.user_another = User.objects.create(username="test_reader")
+
+        Follow.objects.create(user=cls.user, author=cls.author)
+        Follow.objects.create(
+            user=cls.user_another, author=cls.author_another
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def get_follow_page(self, user: User) -> bytes:
+        client = Client()
+        client.force_login(user)
+
+        return client.get(reverse(f"{APP_NAME}:follow_index")).content
+
+    def test_follow_page_cache(self):
+        """Страница подписок кэшируется для каждого пользователя отдельно."""
+        Post.objects.create(text="Пост автора", author=FollowCacheTests.author)
+        Post.objects.create(
+            text="Пост другого автора", author=FollowCacheTests.author_another
+        )
+
+        with self.subTest("Страницы пользователей не смешиваются"):
+            self.get_follow_page(FollowCacheTests.user)
+            content = self.get_follow_page(FollowCacheTests.user_another)
+            self.assertIn("Пост другого автора".encode(), content)
+            self.assertNotIn("Пост автора".encode(), content)
+
+        with self.subTest("Новый пост виден сразу"):
+            Post.objects.create(
+                text="Новый пост", author=FollowCacheTests.author
+            )
+            content = self.get_follow_page(FollowCacheTests.user)
+            self.assertIn("Новый пост".encode(), content)
+
+        with self.subTest("Измененный пост виден сразу"):
+            post = Post.objects.get(text="Новый пост")
+            post.text = "Измененный пост"
+            post.save()
+            content = self.get_follow_page(FollowCacheTests.user)
+            self.assertIn("Измененный пост".encode(), content)
+
+
+class CacheBackendsTests(TestCase):
+    """
+    Ленты и ключи фрагментов одинаково работают со всеми бэкендами кэша.
+    Memcached проверяется, если задана `CACHE_TEST_MEMCACHED_LOCATION`.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create(username="test")
+        cls.cache_dir = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+        cls.backends = {
+            "locmem": {"CACHE_BACKEND": "locmem"},
+            "file": {"CACHE_BACKEND": "file", "CACHE_LOCATION": cls.cache_dir},
+            "db": {"CACHE_BACKEND": "db", "CACHE_LOCATION": "test_cache"},
+        }
+
+        memcached = os.environ.get("CACHE_TEST_MEMCACHED_LOCATION")
+        if memcached:
+            cls.backends["memcached"] = {
+                "CACHE_BACKEND": "memcached",
+                "CACHE_LOCATION": memcached,
+            }
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(cls.cache_dir, ignore_errors=True)
+
+    def check_backend(self, shared: bool):
+        cache.clear()
+        client = Client()
+        url = reverse(f"{APP_NAME}:index")
+
+        Post.objects.create(text="Первый пост", author=CacheBackendsTests.user)
+        client.get(url)
+
+        with self.subTest("Фрагмент и количество постов закэшированы"):
+            cache_key = make_template_fragment_key(
+                "index_page", [f"{get_version(FEED_ALL)}-1"]
+            )
+            self.assertIsNotNone(cache.get(cache_key))
+            self.assertEqual(cache.get(feed_count_key(FEED_ALL)), 1)
+
+        Post.objects.create(text="Второй пост", author=CacheBackendsTests.user)
+
+        with self.subTest("Новый пост виден сразу"):
+            response = client.get(url)
+            self.assertIn("Второй пост".encode(), response.content)
+            self.assertEqual(cache.get(feed_count_key(FEED_ALL)), 2)
+
+        if shared:
+            config = settings.CACHES["default"]
+            other = import_string(config["BACKEND"])(
+                config["LOCATION"], config
+            )
+            key = make_template_fragment_key("test", [])
+            other.set(key, "cached")
+
+            with self.subTest("Данные общие для процессов"):
+                self.assertEqual(cache.get(key), "cached")
+
+            with self.subTest("Смена версии видна другим процессам"):
+                bump_versions(FEED_ALL, [None])
+                self.assertEqual(
+                    other.get(version_key(FEED_ALL)),
+                    get_version(FEED_ALL),
+                )
+
+    def test_backends(self):
+        """Проверка лент с каждым бэкендом кэша."""
+        for name, environ in CacheBackendsTests.backends.items():
+            caches = cache_config(environ, settings.BASE_DIR)
+
+            with self.subTest(backend=name), override_settings(CACHES=caches):
+                if name == "db":
+                    call_command("createcachetable", verbosity=0)
+
+                self.check_backend(shared=name != "locmem")
+                Post.objects.all().delete()
+
+
+class PageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create(username="test")
+        cls.post = Post.objects.create(text="Текст", author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_anonymous_page_cache(self):
+        """Страницы для анонимных посетителей кэшируются и проверяются."""
+        # Адрес и количество запросов состояния ленты при чтении из кэша.
+        urls = (
+            (reverse(f"{APP_NAME}:index"), 1),
+            (
+                reverse(
+                    f"{APP_NAME}:profile",
+                    kwargs={"username": PageCacheTests.user.username},
+                ),
+                2,
+            ),
+            (
+                reverse(
+                    f"{APP_NAME}:post_detail",
+                    kwargs={"pk": PageCacheTests.post.id},
+                ),
+                2,
+            ),
+        )
+
+        for url, queries in urls:
+            response = self.client.get(url)
+            etag = response["ETag"]
+            last_modified = response["Last-Modified"]
+
+            with self.subTest("Заголовки ответа", url=url):
+                self.assertTrue(response.has_header("Last-Modified"))
+
+            with self.subTest("Ответ 304 без изменений", url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+
+            with self.subTest("If-Modified-Since без ETag", url=url):
+                response = self.client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=last_modified
+                )
+                self.assertEqual(response.status_code, 200)
+
+            with self.subTest("Страница из кэша", url=url):
+                with self.assertNumQueries(queries):
+                    response = self.client.get(url)
+                self.assertEqual(response["ETag"], etag)
+
+        Post.objects.create(text="Новый пост", author=PageCacheTests.user)
+
+        for url, _ in urls[:2]:
+            with self.subTest("Новый пост сбрасывает кэш", url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn("Новый пост".encode(), response.content)
+
+    def test_authenticated_bypass(self):
+        """Для авторизованных пользователей страницы не кэшируются."""
+        self.client.force_login(PageCacheTests.user)
+
+        response = self.client.get(reverse(f"{APP_NAME}:index"))
+        self.assertFalse(response.has_header("ETag"))
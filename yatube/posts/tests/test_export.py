@@ -0,0 +1,124 @@
+import csv
+import io
+import json
+
+from django.core.management import CommandError, call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+
+APP_NAME = "posts"
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.admin = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="admin"
+        )
+        cls.author = User.objects.create(username="author")
+        cls.user = User.objects.create(username="user")
+        cls.group = Group.objects.create(
+            title="Группа", slug="group", description="Описание"
+        )
+        cls.post = Post.objects.create(
+            text="Пост, с запятой\nи строкой",
+            author=cls.author,
+            group=cls.group,
+        )
+        cls.post_another = Post.objects.create(text="Другой", author=cls.user)
+        Post.objects.filter(pk=cls.post_another.pk).update(
+            created="2000-01-01T12:00:00Z"
+        )
+        Comment.objects.create(
+            text="Комментарий", author=cls.user, post=cls.post
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    def export(self, *args, **options) -> str:
+        output = io.StringIO()
+        call_command("export_data", *args, stdout=output, **options)
+
+        return output.getvalue()
+
+    def test_csv(self):
+        """Выгрузка постов в CSV с фильтрами."""
+        rows = list(csv.DictReader(io.StringIO(self.export("posts"))))
+
+        with self.subTest("Все посты"):
+            self.assertEqual(len(rows), 2)
+            self.assertEqual(rows[0]["text"], ExportTests.post.text)
+            self.assertEqual(rows[0]["group"], "group")
+
+        cases = (
+            ({"author": "user"}, [ExportTests.post_another]),
+            ({"group": "group"}, [ExportTests.post]),
+            ({"until": "2000-01-01"}, [ExportTests.post_another]),
+            ({"since": "2000-01-02"}, [ExportTests.post]),
+        )
+
+        for filters, posts in cases:
+            with self.subTest(**filters):
+                options = [
+                    f"--{key}={value}" for key, value in filters.items()
+                ]
+                output = self.export("posts", *options)
+                rows = csv.DictReader(io.StringIO(output))
+
+                self.assertEqual(
+                    [int(row["id"]) for row in rows],
+                    [post.pk for post in posts],
+                )
+
+    def test_jsonl(self):
+        """Выгрузка в JSON lines."""
+        cases = (
+            (
+                "comments",
+                [{"text": "Комментарий", "author": "user", "parent": None}],
+            ),
+            ("follows", [{"user": "user", "author": "author"}]),
+            ("groups", [{"slug": "group", "title": "Группа"}]),
+        )
+
+        for model, expected in cases:
+            with self.subTest(model=model):
+                lines = self.export(model, format="jsonl").splitlines()
+                rows = [json.loads(line) for line in lines]
+
+                self.assertEqual(
+                    [
+                        {key: row[key] for key in item}
+                        for row, item in zip(rows, expected)
+                    ],
+                    expected,
+                )
+                self.assertEqual(len(rows), len(expected))
+
+    def test_wrong_filter(self):
+        """Фильтр, неприменимый к модели, — ошибка."""
+        with self.assertRaises(CommandError):
+            self.export("groups", author="author")
+
+    def test_admin_action(self):
+        """Действие админки отдает выбранные объекты потоком."""
+        client = Client()
+        client.force_login(ExportTests.admin)
+
+        response = client.post(
+            reverse("admin:posts_post_changelist"),
+            {
+                "action": "export_csv",
+                "_selected_action": [ExportTests.post.pk],
+            },
+        )
+        content = b"".join(response.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        self.assertEqual(
+            [int(row["id"]) for row in rows], [ExportTests.post.pk]
+        )
@@ -0,0 +1,299 @@
+import threading
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.template import Context, Template
+from django.test import Client, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import follows
+from ..cache import FEED_AUTHOR, FEED_FOLLOW, get_version
+from ..models import Follow, User, UserStats
+
+APP_NAME = "posts"
+
+AUTHORS_COUNT = 5
+CONCURRENT_REQUESTS = 8
+
+
+class FollowCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create(username="test")
+        cls.authors = [
+            User.objects.create(username=f"author_{i}")
+            for i in range(AUTHORS_COUNT)
+        ]
+        for author in cls.authors[::2]:
+            Follow.objects.create(user=cls.user, author=author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(FollowCacheTests.user)
+
+    def test_filter(self):
+        """Проверка подписки на многих авторов — один запрос на все."""
+        template = Template(
+            "{% load follow_filters %}"
+            "{% for author in authors %}"
+            "{% if user|follows_author:author %}+{% else %}-{% endif %}"
+            "{% endfor %}"
+        )
+        user = User.objects.get(pk=FollowCacheTests.user.pk)
+        context = Context(
+            {"user": user, "authors": FollowCacheTests.authors}
+        )
+
+        with self.assertNumQueries(1):
+            self.assertEqual(template.render(context), "+-+-+")
+
+        user = User.objects.get(pk=FollowCacheTests.user.pk)
+
+        with self.subTest("Из кэша"), self.assertNumQueries(0):
+            self.assertEqual(
+                follows.following_ids(user),
+                {author.pk for author in FollowCacheTests.authors[::2]},
+            )
+
+    def test_profile(self):
+        """Страница профиля проверяет подписку без запроса к подпискам."""
+        url = reverse(
+            f"{APP_NAME}:profile",
+            args=[FollowCacheTests.authors[0].username],
+        )
+        self.client.get(url)
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+
+        self.assertTrue(response.context["following"])
+        self.assertFalse(
+            [
+                query["sql"]
+                for query in context
+                if 'FROM "posts_follow"' in query["sql"]
+            ]
+        )
+
+
+class FollowCacheCommitTests(TransactionTestCase):
+    """
+    Закэшированные подписки и версии лент сбрасываются после фиксации
+    транзакции.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="test")
+        self.authors = [
+            User.objects.create(username=f"author_{i}") for i in range(2)
+        ]
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_follow_unfollow(self):
+        """Подписка и отписка обновляют закэшированные подписки."""
+        author = self.authors[0]
+        follows.load_following(self.user.pk)
+
+        self.client.post(
+            reverse(f"{APP_NAME}:profile_follow", args=[author.username])
+        )
+        self.assertIn(author.pk, follows.load_following(self.user.pk))
+
+        self.client.post(
+            reverse(f"{APP_NAME}:profile_unfollow", args=[author.username])
+        )
+        self.assertNotIn(author.pk, follows.load_following(self.user.pk))
+
+    def test_stale_read(self):
+        """
+        Множество, прочитанное до фиксации подписки (другим запросом),
+        не переживает ее.
+        """
+        first, second = self.authors
+        follows.follow(self.user.pk, first.pk)
+
+        with transaction.atomic():
+            follows.follow(self.user.pk, second.pk)
+            cache.set(
+                follows.following_key(self.user.pk),
+                follows.pack([first.pk]),
+            )
+
+        self.assertEqual(
+            follows.load_following(self.user.pk), {first.pk, second.pk}
+        )
+
+    def test_versions_after_commit(self):
+        """До фиксации подписки версии лент не меняются."""
+        author = self.authors[0]
+        keys = ((FEED_FOLLOW, self.user.pk), (FEED_AUTHOR, author.pk))
+        before = [get_version(*key) for key in keys]
+
+        with transaction.atomic():
+            follows.follow(self.user.pk, author.pk)
+            self.assertEqual([get_version(*key) for key in keys], before)
+
+        for key, version in zip(keys, before):
+            with self.subTest(feed=key[0]):
+                self.assertNotEqual(get_version(*key), version)
+
+
+class FollowEndpointTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create(username="test")
+        cls.author = User.objects.create(username="author")
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(FollowEndpointTests.user)
+
+    def url(self, name: str, username: str = "author") -> str:
+        return reverse(f"{APP_NAME}:{name}", args=[username])
+
+    def assertFollowers(self, count: int):
+        stats = UserStats.objects.get(user=FollowEndpointTests.author)
+
+        self.assertEqual(
+            Follow.objects.filter(author=FollowEndpointTests.author).count(),
+            count,
+        )
+        self.assertEqual(stats.followers_count, count)
+
+    def test_repeat(self):
+        """Повторные подписка и отписка не прерывают транзакцию."""
+        user_id = FollowEndpointTests.user.pk
+        author_id = FollowEndpointTests.author.pk
+
+        with transaction.atomic():
+            self.assertTrue(follows.follow(user_id, author_id))
+            self.assertFalse(follows.follow(user_id, author_id))
+            self.assertFollowers(1)
+
+            self.assertTrue(follows.unfollow(user_id, author_id))
+            self.assertFalse(follows.unfollow(user_id, author_id))
+            self.assertFollowers(0)
+
+    def test_responses(self):
+        """JSON для скриптов, редирект на профиль для форм."""
+        profile_url = reverse(f"{APP_NAME}:profile", args=["author"])
+        requests = (
+            ("profile_follow", True, True),
+            ("profile_follow", True, False),
+            ("profile_unfollow", False, True),
+            ("profile_unfollow", False, False),
+        )
+
+        for name, following, changed in requests:
+            with self.subTest(name=name, changed=changed):
+                response = self.client.post(
+                    self.url(name), HTTP_ACCEPT="application/json"
+                )
+                self.assertEqual(
+                    response.json(),
+                    {"following": following, "changed": changed},
+                )
+
+        with self.subTest("Редирект"):
+            response = self.client.post(self.url("profile_follow"))
+            self.assertRedirects(response, profile_url)
+            self.assertFollowers(1)
+
+        with self.subTest("Неизвестный автор"):
+            response = self.client.post(self.url("profile_follow", "nobody"))
+            self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+        with self.subTest("На себя"):
+            response = self.client.post(
+                self.url("profile_follow", "test"),
+                HTTP_ACCEPT="application/json",
+            )
+            self.assertEqual(
+                response.json(), {"following": False, "changed": False}
+            )
+
+    def test_single_query(self):
+        """Повторная подписка — один запрос к подпискам, без выборки."""
+        self.client.post(self.url("profile_follow"))
+
+        with CaptureQueriesContext(connection) as context:
+            self.client.post(self.url("profile_follow"))
+
+        self.assertEqual(
+            len(
+                [
+                    query["sql"]
+                    for query in context
+                    if '"posts_follow"' in query["sql"]
+                ]
+            ),
+            1,
+        )
+
+
+class ConcurrentFollowTests(TransactionTestCase):
+    """
+    Одновременные запросы из разных потоков (и соединений с БД).
+    Тестовая БД SQLite по умолчанию — файл (см. `yatube.database`).
+    """
+
+    def setUp(self):
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            self.skipTest(
+                "SQLite в памяти не ждет блокировок, "
+                "задайте DATABASE_TEST_NAME с именем файла"
+            )
+
+        cache.clear()
+        self.user = User.objects.create(username="test")
+        self.author = User.objects.create(username="author")
+
+    def run_concurrently(self, action) -> list:
+        barrier = threading.Barrier(CONCURRENT_REQUESTS)
+        results = []
+        errors = []
+
+        def worker():
+            try:
+                barrier.wait()
+                results.append(action(self.user.pk, self.author.pk))
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        workers = [
+            threading.Thread(target=worker)
+            for _ in range(CONCURRENT_REQUESTS)
+        ]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+
+        self.assertEqual(errors, [])
+
+        return results
+
+    def test_double_click(self):
+        """Из одновременных подписок и отписок срабатывает по одной."""
+        for action, count in ((follows.follow, 1), (follows.unfollow, 0)):
+            with self.subTest(action=action.__name__):
+                results = self.run_concurrently(action)
+                stats = UserStats.objects.get(user=self.author)
+
+                self.assertEqual(results.count(True), 1)
+                self.assertEqual(
+                    Follow.objects.filter(author=self.author).count(), count
+                )
+                self.assertEqual(stats.followers_count, count)
@@ -1,10 +1,13 @@
+import hashlib
 import shutil
 import tempfile
 from http import HTTPStatus
 
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from ..models import Comment, Post, User
@@ -14,7 +17,7 @@ APP_NAME = "posts"
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POSTS_THUMBNAIL_WORKERS=0)
 class FormTests(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -70,10 +73,13 @@ class FormTests(TestCase):
 
         self.assertEqual(response.status_code, HTTPStatus.OK)
 
+        # Изображения хранятся под именем из хэша содержимого.
+        digest = hashlib.sha256(FormTests.post_image_small_gif).hexdigest()
+
         self.assertTrue(
             Post.objects.filter(
                 text=FormTests.post_image_text,
-                image=f"{APP_NAME}/{image.name}",
+                image=f"{APP_NAME}/{digest[:2]}/{digest}.gif",
             ).exists()
         )
 
@@ -128,3 +134,48 @@ class FormTests(TestCase):
         Отправка валидной формы со страницы редактирования поста.
         """
         self.entities_modification_post()
+
+    def test_comment_write_path(self):
+        """
+        Отправка комментария не загружает комментарии поста, форма
+        с ошибками выводится на странице поста.
+        """
+        url = reverse(
+            f"{APP_NAME}:add_comment", kwargs={"pk": FormTests.post.id}
+        )
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(url, {"text": "Без выборки"})
+
+        with self.subTest("Перенаправление на пост"):
+            self.assertRedirects(
+                response,
+                reverse(
+                    f"{APP_NAME}:post_detail", kwargs={"pk": FormTests.post.id}
+                ),
+            )
+
+        with self.subTest("Комментарии не загружаются"):
+            self.assertFalse(
+                [
+                    query["sql"]
+                    for query in context
+                    if query["sql"].startswith("SELECT")
+                    and 'FROM "posts_comment"' in query["sql"]
+                ]
+            )
+
+        with self.subTest("Форма с ошибками"):
+            response = self.client.post(url, {"text": ""})
+
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+            self.assertTemplateUsed(response, "posts/post_detail.html")
+            self.assertTrue(response.context["form"].errors)
+
+        with self.subTest("Несуществующий пост"):
+            response = self.client.post(
+                reverse(f"{APP_NAME}:add_comment", kwargs={"pk": 0}),
+                {"text": "Текст"},
+            )
+
+            self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
@@ -0,0 +1,243 @@
+import io
+import json
+import os
+import tempfile
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from .. import bulk_import, export, search
+from ..models import (
+    COMMENT_MAX_DEPTH,
+    Comment,
+    Follow,
+    Group,
+    Post,
+    TimelineEntry,
+    User,
+)
+
+
+class ImportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create(username="author")
+        cls.follower = User.objects.create(username="follower")
+        cls.group = Group.objects.create(title="Группа", slug="group")
+        cls.post = Post.objects.create(text="Пост", author=cls.author)
+        Follow.objects.create(user=cls.follower, author=cls.author)
+
+    def import_file(self, model: str, content: str, *args) -> str:
+        with tempfile.NamedTemporaryFile(
+            "w", suffix=".csv", delete=False, encoding="utf-8"
+        ) as file:
+            file.write(content)
+
+        self.addCleanup(os.remove, file.name)
+        output = io.StringIO()
+        call_command(
+            "import_data",
+            model,
+            file.name,
+            *args,
+            stdout=output,
+            stderr=output,
+        )
+
+        return output.getvalue()
+
+    def test_posts(self):
+        """Импорт постов из CSV: даты, группы и производные данные."""
+        content = (
+            "id,created,author,group,text,image\n"
+            "101,2020-01-02T03:04:05+00:00,author,group,Импортный пост,\n"
+            "102,,author,,Ещё один пост,\n"
+            "103,,author,missing,Пост чужой группы,\n"
+            "104,,nobody,,Пост без автора,\n"
+            "105,,author,,,\n"
+            f"{ImportTests.post.pk},,author,,Пост с занятым id,\n"
+        )
+        output = self.import_file("posts", content, "--chunk-size=2")
+
+        posts = Post.objects.filter(text__contains="пост").order_by("pk")
+        author = User.objects.select_related("stats").get(username="author")
+
+        with self.subTest("Созданы только корректные строки"):
+            self.assertEqual(posts.count(), 2)
+            self.assertIn("Создано: 2, с ошибками: 4", output)
+            self.assertIn("строка 3: нет группы missing", output)
+            self.assertIn(
+                f"строка 6: id {ImportTests.post.pk} уже занят", output
+            )
+
+        with self.subTest("Дата и группа из файла"):
+            self.assertEqual(posts[0].created.year, 2020)
+            self.assertEqual(posts[0].group, ImportTests.group)
+
+        with self.subTest("Счетчики"):
+            self.assertEqual(author.stats.posts_count, 3)
+
+        with self.subTest("Поисковый индекс"):
+            self.assertEqual(search.search_posts("импортный").count(), 1)
+            self.assertEqual(search.search_posts("еще").count(), 1)
+
+        with self.subTest("Ленты подписчиков"):
+            self.assertEqual(
+                TimelineEntry.objects.filter(
+                    user=ImportTests.follower
+                ).count(),
+                3,
+            )
+
+    def test_keep_ids(self):
+        """
+        Id постов из выгрузки сохраняются, и комментарии из той же
+        выгрузки попадают к своим постам.
+        """
+        Post.objects.create(
+            id=1000, text="Поздний пост", author=ImportTests.author
+        )
+
+        self.import_file(
+            "posts", "id,author,text\n900,author,Перенесенный\n"
+        )
+        self.import_file(
+            "comments",
+            json.dumps({"post": 900, "author": "author", "text": "Ответ"}),
+            "--format=jsonl",
+        )
+
+        with self.subTest("Комментарий у своего поста"):
+            self.assertEqual(
+                Comment.objects.get(text="Ответ").post.text, "Перенесенный"
+            )
+
+        with self.subTest("Поисковый индекс"):
+            self.assertEqual(search.search_posts("перенесенный").count(), 1)
+
+        with self.subTest("Новые id после импортированных"):
+            post = Post.objects.create(
+                text="Новый пост", author=ImportTests.author
+            )
+            self.assertGreater(post.pk, 1000)
+
+    def test_post_created_during_import(self):
+        """Пост, созданный на сайте между порциями, не ломает индексацию."""
+
+        def create_post(created: int, speed: float):
+            if created == 1:
+                Post.objects.create(
+                    text="Сайтовый пост", author=ImportTests.author
+                )
+
+        rows = [
+            {"author": "author", "text": "Импортный первый"},
+            {"author": "author", "text": "Импортный второй"},
+        ]
+
+        result = bulk_import.import_rows(
+            "posts", rows, chunk_size=1, progress=create_post
+        )
+
+        self.assertEqual((result.created, result.invalid), (2, 0))
+        self.assertEqual(search.search_posts("сайтовый").count(), 1)
+        self.assertEqual(search.search_posts("импортный").count(), 2)
+
+    def test_create_authors(self):
+        """Недостающие авторы создаются по флагу `--create-authors`."""
+        content = "author,text\nnewcomer,Текст\n"
+
+        self.import_file("posts", content)
+        self.assertFalse(User.objects.filter(username="newcomer").exists())
+
+        self.import_file("posts", content, "--create-authors")
+        newcomer = User.objects.get(username="newcomer")
+
+        self.assertFalse(newcomer.has_usable_password())
+        self.assertEqual(newcomer.posts.count(), 1)
+
+    def test_comments(self):
+        """Импорт комментариев из JSON lines пересчитывает их количество."""
+        rows = [
+            {"post": ImportTests.post.pk, "author": "follower", "text": "Да"},
+            {"post": ImportTests.post.pk, "author": "author", "text": "Нет"},
+            {"post": 0, "author": "author", "text": "Мимо"},
+        ]
+        content = "".join(json.dumps(row) + "\n" for row in rows)
+
+        output = self.import_file("comments", content, "--format=jsonl")
+        ImportTests.post.refresh_from_db()
+
+        self.assertIn("Создано: 2, с ошибками: 1", output)
+        self.assertEqual(Comment.objects.count(), 2)
+        self.assertEqual(ImportTests.post.comments_count, 2)
+
+        for comment in Comment.objects.all():
+            with self.subTest("Путь корня ветки", pk=comment.pk):
+                self.assertEqual(comment.path, f"{comment.pk:010d}/")
+
+    def test_comment_threads(self):
+        """Ветки комментариев переживают выгрузку и импорт."""
+        author = ImportTests.author
+        parent = Comment.objects.create(
+            text="Корень", author=author, post=ImportTests.post
+        )
+        for i in range(COMMENT_MAX_DEPTH + 1):
+            parent = Comment.objects.create(
+                text=f"Ответ {i}",
+                author=author,
+                post=ImportTests.post,
+                parent=parent,
+            )
+        comments = Comment.objects.order_by("pk")
+        expected = list(comments.values_list("pk", "parent_id", "path"))
+        content = "".join(export.export_lines("comments", comments, "csv"))
+        Comment.objects.all().delete()
+
+        output = self.import_file("comments", content)
+
+        self.assertIn(f"Создано: {len(expected)}, с ошибками: 0", output)
+        self.assertEqual(
+            list(comments.values_list("pk", "parent_id", "path")), expected
+        )
+
+        with self.subTest("Некорректные ответы"):
+            root_id = expected[0][0]
+            other = Post.objects.create(text="Другой", author=author)
+            rows = [
+                {"post": ImportTests.post.pk, "parent": root_id},
+                {"id": 5000, "post": ImportTests.post.pk, "parent": 4000},
+                {"id": 5001, "post": other.pk, "parent": root_id},
+            ]
+            content = "".join(
+                json.dumps({**row, "author": "author", "text": "Да"}) + "\n"
+                for row in rows
+            )
+
+            output = self.import_file("comments", content, "--format=jsonl")
+
+            self.assertIn("строка 1: у ответа нет id", output)
+            self.assertIn("строка 2: нет комментария 4000", output)
+            self.assertIn(
+                f"строка 3: комментарий {root_id} к другому посту", output
+            )
+
+    def test_invalid_lines(self):
+        """Некорректные строки JSON lines отклоняются, не прерывая импорт."""
+        content = (
+            '{"author": "author", "text": "Первый"}\n'
+            "{не JSON\n"
+            '["author", "text"]\n'
+            '{"author": "author", "text": 5}\n'
+        )
+        output = self.import_file("posts", content, "--format=jsonl")
+
+        self.assertIn("Создано: 2, с ошибками: 2", output)
+        self.assertIn("строка 2: некорректный JSON", output)
+        self.assertIn("строка 3: строка не объект JSON", output)
+
+        with self.subTest("Размер порции"):
+            with self.assertRaises(CommandError):
+                self.import_file("posts", content, "--chunk-size=0")
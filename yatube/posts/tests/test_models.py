@@ -1,6 +1,10 @@
+import io
+
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
 
-from ..models import Group, Post, User
+from ..models import Comment, Follow, Group, Post, User, UserStats
 
 FIELDS_POST = {
     "text": {
@@ -99,3 +103,110 @@ class ModelTests(TestCase):
                             ),
                             attr_expected_value,
                         )
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create(username="test_author")
+        cls.user = User.objects.create(username="test")
+
+    def assert_counters(self, post: Post, expected: dict):
+        stats = UserStats.objects.get(user=CountersTests.author)
+        post.refresh_from_db()
+
+        for field, value in expected.items():
+            with self.subTest(field):
+                obj = post if field == "comments_count" else stats
+                self.assertEqual(getattr(obj, field), value)
+
+    def test_counters_follow_changes(self):
+        """Счетчики обновляются при создании и удалении объектов."""
+        author = CountersTests.author
+        user = CountersTests.user
+
+        post = Post.objects.create(text="Текст", author=author)
+        comment = Comment.objects.create(text="Текст", post=post, author=user)
+        follow = Follow.objects.create(user=user, author=author)
+
+        self.assert_counters(
+            post, {"posts_count": 1, "followers_count": 1, "comments_count": 1}
+        )
+        self.assertEqual(UserStats.objects.get(user=user).following_count, 1)
+
+        comment.delete()
+        follow.delete()
+
+        self.assert_counters(
+            post, {"posts_count": 1, "followers_count": 0, "comments_count": 0}
+        )
+        self.assertEqual(UserStats.objects.get(user=user).following_count, 0)
+
+    def test_delete_user(self):
+        """
+        Удаление пользователя с постами, комментариями и подписками
+        в обе стороны оставляет верными счетчики остальных.
+        """
+        author = CountersTests.author
+        user = CountersTests.user
+        removed = User.objects.create(username="removed")
+
+        post = Post.objects.create(text="Текст", author=author)
+        removed_post = Post.objects.create(text="Текст", author=removed)
+        Comment.objects.create(text="Текст", post=post, author=removed)
+        Comment.objects.create(text="Текст", post=removed_post, author=user)
+        for follower, followed in (
+            (removed, author),
+            (author, removed),
+            (user, removed),
+        ):
+            Follow.objects.create(user=follower, author=followed)
+
+        removed.delete()
+        connection.check_constraints()
+
+        self.assertFalse(UserStats.objects.filter(user_id=removed.pk))
+        self.assert_counters(
+            post,
+            {
+                "posts_count": 1,
+                "followers_count": 0,
+                "following_count": 0,
+                "comments_count": 0,
+            },
+        )
+        self.assertEqual(UserStats.objects.get(user=user).following_count, 0)
+
+    def test_counters_not_negative(self):
+        """Разошедшийся счетчик не уходит ниже нуля при удалении."""
+        follow = Follow.objects.create(
+            user=CountersTests.user, author=CountersTests.author
+        )
+        UserStats.objects.filter(user=CountersTests.author).update(
+            followers_count=0
+        )
+
+        follow.delete()
+
+        self.assertEqual(
+            UserStats.objects.get(user=CountersTests.author).followers_count,
+            0,
+        )
+
+    def test_recount_command(self):
+        """Команда `recount_counters` восстанавливает счетчики."""
+        author = CountersTests.author
+
+        post = Post.objects.create(text="Текст", author=author)
+        Comment.objects.create(text="Текст", post=post, author=author)
+
+        UserStats.objects.all().delete()
+        Post.objects.update(comments_count=0)
+
+        call_command("recount_counters", stdout=io.StringIO())
+
+        self.assert_counters(
+            post, {"posts_count": 1, "followers_count": 0, "comments_count": 1}
+        )
@@ -0,0 +1,188 @@
+import io
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..cache import FEED_GROUP, feed_count_key
+from ..models import Comment, Follow, Group, Post, TimelineEntry, User
+from ..search import SearchResults
+
+APP_NAME = "posts"
+
+SPAM_COUNT = 7
+CHUNK_SIZE = 3
+
+
+class ModerationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.admin = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="admin"
+        )
+        cls.spammer = User.objects.create(username="spammer")
+        cls.author = User.objects.create(username="author")
+        cls.reader = User.objects.create(username="reader")
+        cls.group = Group.objects.create(
+            title="Группа", slug="group", description="Описание"
+        )
+        cls.group_another = Group.objects.create(
+            title="Другая группа", slug="another", description="Описание"
+        )
+
+    def setUp(self):
+        cache.clear()
+
+        Follow.objects.create(
+            user=ModerationTests.reader, author=ModerationTests.spammer
+        )
+        self.spam = [
+            Post.objects.create(
+                text=f"Спам {i}",
+                author=ModerationTests.spammer,
+                group=ModerationTests.group,
+            )
+            for i in range(SPAM_COUNT)
+        ]
+        self.post = Post.objects.create(
+            text="Пост", author=ModerationTests.author
+        )
+        for post in self.spam:
+            Comment.objects.create(
+                text="Комментарий", author=ModerationTests.author, post=post
+            )
+        Comment.objects.create(
+            text="Спам", author=ModerationTests.spammer, post=self.post
+        )
+
+        self.client = Client()
+        self.client.force_login(ModerationTests.admin)
+
+    def run_command(self, *args) -> str:
+        output = io.StringIO()
+        call_command(
+            *args, chunk_size=CHUNK_SIZE, stdout=output, stderr=io.StringIO()
+        )
+
+        return output.getvalue()
+
+    def test_delete_author_posts(self):
+        """Посты автора удаляются со всеми связанными данными."""
+        group_page = reverse(
+            f"{APP_NAME}:group_list", kwargs={"slug": "group"}
+        )
+        self.client.get(group_page)
+
+        output = self.run_command("delete_author_posts", "spammer")
+
+        with self.subTest("Прогресс по порциям"):
+            self.assertIn(f"{CHUNK_SIZE}/{SPAM_COUNT}", output)
+            self.assertIn(f"Удалено постов: {SPAM_COUNT}", output)
+
+        with self.subTest("Посты, комментарии и ленты подписок"):
+            self.assertEqual(list(Post.objects.all()), [self.post])
+            self.assertEqual(Comment.objects.count(), 1)
+            self.assertFalse(TimelineEntry.objects.exists())
+            self.assertEqual(SearchResults("спам").count(), 0)
+
+        with self.subTest("Счетчики и кэш лент"):
+            ModerationTests.spammer.stats.refresh_from_db()
+            self.assertEqual(ModerationTests.spammer.stats.posts_count, 0)
+
+            response = self.client.get(group_page)
+            self.assertEqual(len(response.context["page_obj"]), 0)
+
+    def test_move_posts(self):
+        """Посты переносятся в другую группу со сбросом количеств."""
+        for group in (ModerationTests.group, ModerationTests.group_another):
+            self.client.get(
+                reverse(
+                    f"{APP_NAME}:group_list", kwargs={"slug": group.slug}
+                )
+            )
+
+        self.run_command("move_group_posts", "group", "another")
+
+        self.assertEqual(
+            Post.objects.filter(group=ModerationTests.group_another).count(),
+            SPAM_COUNT,
+        )
+
+        for group in (ModerationTests.group, ModerationTests.group_another):
+            with self.subTest(group=group.slug):
+                self.assertIsNone(
+                    cache.get(feed_count_key(FEED_GROUP, group.id))
+                )
+
+    def test_purge_comments(self):
+        """Комментарии за период удаляются, их количество пересчитывается."""
+        Comment.objects.filter(post=self.post).update(
+            created="2000-01-01T12:00:00Z"
+        )
+
+        output = self.run_command(
+            "purge_comments", "2000-01-01", "2000-01-01"
+        )
+
+        self.assertIn("Удалено комментариев: 1", output)
+        self.assertEqual(Comment.objects.count(), SPAM_COUNT)
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 0)
+
+    def test_admin_actions(self):
+        """Массовые действия в админке."""
+        changelist = reverse("admin:posts_post_changelist")
+
+        response = self.client.post(
+            changelist,
+            {
+                "action": "move_to_group",
+                "group": ModerationTests.group_another.pk,
+                "_selected_action": [self.post.pk],
+            },
+            follow=True,
+        )
+
+        with self.subTest("Перенос в группу"):
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+            self.post.refresh_from_db()
+            self.assertEqual(self.post.group, ModerationTests.group_another)
+
+        data = {
+            "action": "delete_authors_posts",
+            "_selected_action": [self.spam[0].pk],
+        }
+        response = self.client.post(changelist, data)
+
+        with self.subTest("Подтверждение удаления постов авторов"):
+            self.assertTemplateUsed(
+                response,
+                "admin/posts/post/delete_authors_posts_confirmation.html",
+            )
+            self.assertContains(response, f"spammer: постов — {SPAM_COUNT}")
+            self.assertEqual(Post.objects.count(), SPAM_COUNT + 1)
+
+        self.client.post(changelist, {**data, "post": "yes"})
+
+        with self.subTest("Удаление постов авторов"):
+            self.assertEqual(list(Post.objects.all()), [self.post])
+
+        self.client.post(
+            reverse("admin:posts_comment_changelist"),
+            {
+                "action": "purge_comments",
+                "_selected_action": list(
+                    Comment.objects.values_list("pk", flat=True)
+                ),
+            },
+        )
+
+        with self.subTest("Очистка комментариев"):
+            self.assertFalse(Comment.objects.exists())
+            self.post.refresh_from_db()
+            self.assertEqual(self.post.comments_count, 0)
@@ -0,0 +1,182 @@
+from core.paginator import (
+    CachedCountPaginator,
+    CursorPage,
+    CursorPaginator,
+    page_window,
+)
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..cache import FEED_ALL, FEED_AUTHOR, feed_count_key
+from ..models import Post, User
+
+APP_NAME = "posts"
+
+POSTS_LIMIT = 10
+POSTS_COUNT = POSTS_LIMIT * 2 + 5
+
+
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create(username="test")
+
+        for i in range(POSTS_COUNT):
+            Post.objects.create(text=f"Текст {i}", author=cls.user)
+
+        # Половина постов с одинаковой датой — порядок задает `id`.
+        Post.objects.filter(pk__in=Post.objects.values("pk")[:10]).update(
+            created=timezone.now()
+        )
+
+        cls.ids_expected = list(
+            Post.objects.order_by("-created", "-pk").values_list(
+                "pk", flat=True
+            )
+        )
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_walk_forward_and_backward(self):
+        """Обход всех страниц по курсорам в обе стороны."""
+        paginator = CursorPaginator(Post.objects.all(), POSTS_LIMIT)
+
+        pages = [paginator.get_page(None)]
+        while pages[-1].has_next():
+            pages.append(paginator.get_page(pages[-1].next_cursor))
+
+        with self.subTest("Вперед"):
+            self.assertEqual(
+                [post.pk for page in pages for post in page],
+                self.ids_expected,
+            )
+
+        with self.subTest("Крайние страницы"):
+            self.assertFalse(pages[0].has_previous())
+            self.assertFalse(pages[-1].has_next())
+
+        backward = [pages[-1]]
+        while backward[-1].has_previous():
+            backward.append(paginator.get_page(backward[-1].previous_cursor))
+
+        with self.subTest("Назад"):
+            self.assertEqual(
+                [post.pk for page in reversed(backward) for post in page],
+                self.ids_expected,
+            )
+
+    def test_invalid_cursor_is_first_page(self):
+        """Некорректный курсор ведет на первую страницу."""
+        paginator = CursorPaginator(Post.objects.all(), POSTS_LIMIT)
+
+        for cursor in ("", "!!!", "eDEyMw", "bjEy"):
+            with self.subTest(cursor):
+                page = paginator.get_page(cursor)
+                self.assertEqual(
+                    [post.pk for post in page],
+                    self.ids_expected[:POSTS_LIMIT],
+                )
+
+    def test_feed_cursor_mode(self):
+        """Лента с параметром `cursor` выводится по курсору."""
+        response = self.client.get(
+            reverse(f"{APP_NAME}:index"), {"cursor": ""}
+        )
+        page_obj = response.context.get("page_obj")
+
+        self.assertIsInstance(page_obj, CursorPage)
+        self.assertEqual(len(page_obj), POSTS_LIMIT)
+        self.assertTemplateUsed(
+            response, "posts/includes/cursor_paginator.html"
+        )
+        self.assertContains(response, f"?cursor={page_obj.next_cursor}")
+
+
+class CachedCountPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create(username="test")
+
+        for i in range(POSTS_COUNT):
+            Post.objects.create(text=f"Текст {i}", author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def get_count(self, feed: str, object_id=None) -> int:
+        return CachedCountPaginator(
+            Post.objects.all(), POSTS_LIMIT, feed_count_key(feed, object_id)
+        ).count
+
+    def test_count_is_cached(self):
+        """Повторный подсчет берется из кэша без запроса к БД."""
+        self.assertEqual(self.get_count(FEED_ALL), POSTS_COUNT)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_count(FEED_ALL), POSTS_COUNT)
+
+    def test_count_follows_posts(self):
+        """Закэшированные количества меняются при создании и удалении."""
+        user = CachedCountPaginatorTests.user
+        self.get_count(FEED_ALL)
+        self.get_count(FEED_AUTHOR, user.id)
+
+        post = Post.objects.create(text="Новый", author=user)
+        keys = (feed_count_key(FEED_ALL), feed_count_key(FEED_AUTHOR, user.id))
+
+        for key in keys:
+            with self.subTest(f"Создание поста {key}"):
+                self.assertEqual(cache.get(key), POSTS_COUNT + 1)
+
+        post.delete()
+
+        for key in keys:
+            with self.subTest(f"Удаление поста {key}"):
+                self.assertEqual(cache.get(key), POSTS_COUNT)
+
+    def test_page_window(self):
+        """Окно номеров страниц вокруг текущей."""
+        paginator = Paginator(range(100), 1)
+        pages_expected = {
+            1: [1, 2, 3, None, 100],
+            4: [1, 2, 3, 4, 5, 6, None, 100],
+            50: [1, None, 48, 49, 50, 51, 52, None, 100],
+            100: [1, None, 98, 99, 100],
+        }
+
+        for number, pages in pages_expected.items():
+            with self.subTest(number):
+                self.assertEqual(page_window(paginator.page(number)), pages)
+
+    def test_prefetch(self):
+        """Объекты страницы передаются в `prefetch` при первом обращении."""
+        prefetched = []
+        paginator = CachedCountPaginator(
+            Post.objects.order_by("-pk"),
+            POSTS_LIMIT,
+            feed_count_key(FEED_ALL),
+            prefetch=prefetched.append,
+        )
+
+        paginator.count
+
+        with self.assertNumQueries(0):
+            page = paginator.get_page(2)
+
+        with self.subTest("Без обращения к странице"):
+            self.assertEqual(prefetched, [])
+
+        posts = list(page)
+        list(page)
+
+        with self.subTest("Один вызов со всей страницей"):
+            self.assertEqual(prefetched, [posts])
+            self.assertEqual(len(posts), POSTS_LIMIT)
@@ -0,0 +1,75 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Follow, Group, Post, User
+
+APP_NAME = "posts"
+
+POSTS_LIMIT = 10
+
+# Сессия, пользователь, COUNT паджинатора, страница постов и т.п.
+FEED_QUERIES_LIMIT = 8
+
+
+class FeedQueriesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create(
+            username="test_author", first_name="Имя", last_name="Фамилия"
+        )
+        cls.user = User.objects.create(username="test")
+        cls.group = Group.objects.create(title="Название", slug="test")
+
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+        cls.urls = (
+            reverse(f"{APP_NAME}:index"),
+            reverse(f"{APP_NAME}:group_list", kwargs={"slug": "test"}),
+            reverse(
+                f"{APP_NAME}:profile", kwargs={"username": "test_author"}
+            ),
+            reverse(f"{APP_NAME}:follow_index"),
+        )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(FeedQueriesTests.user)
+
+    def create_posts(self, count: int):
+        for i in range(count):
+            Post.objects.create(
+                text=f"Текст {i}",
+                author=FeedQueriesTests.author,
+                group=FeedQueriesTests.group,
+            )
+
+    def count_queries(self, url: str) -> int:
+        cache.clear()
+
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url)
+
+        return len(context)
+
+    def test_feed_queries_do_not_depend_on_page_size(self):
+        """
+        Число запросов страницы ленты не зависит от количества постов.
+        """
+        self.create_posts(1)
+        queries_single = {url: self.count_queries(url) for url in self.urls}
+
+        self.create_posts(POSTS_LIMIT * 2)
+
+        for url in self.urls:
+            queries_full = self.count_queries(url)
+
+            with self.subTest(f"{url} queries limit"):
+                self.assertLessEqual(queries_full, FEED_QUERIES_LIMIT)
+
+            with self.subTest(f"{url} queries count"):
+                self.assertEqual(queries_full, queries_single[url])
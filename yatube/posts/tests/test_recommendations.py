@@ -0,0 +1,117 @@
+import io
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import follows, recommendations
+from ..models import Follow, Recommendation, User
+
+APP_NAME = "posts"
+
+
+class RecommendationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        names = ("reader", "first", "second", "third", "x", "y", "z")
+        cls.users = {
+            name: User.objects.create(username=name) for name in names
+        }
+        graph = {
+            "reader": ("first", "second", "third"),
+            "first": ("x", "y", "third"),
+            "second": ("x", "y", "reader"),
+            "third": ("x", "z"),
+        }
+        for user, authors in graph.items():
+            for author in authors:
+                Follow.objects.create(
+                    user=cls.users[user], author=cls.users[author]
+                )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(RecommendationTests.users["reader"])
+
+    def scores(self, user: str):
+        return list(
+            Recommendation.objects.filter(
+                user=RecommendationTests.users[user]
+            )
+            .order_by("-score", "author__username")
+            .values_list("author__username", "score")
+        )
+
+    def test_compute(self):
+        """Вес — число подписок читателя, подписанных на автора."""
+        stale = Recommendation.objects.create(
+            user=RecommendationTests.users["z"],
+            author=RecommendationTests.users["x"],
+            score=1,
+        )
+
+        for batch_size in (1, 100):
+            with self.subTest(batch_size=batch_size):
+                recommendations.compute_recommendations(
+                    batch_size=batch_size
+                )
+
+                self.assertEqual(
+                    self.scores("reader"), [("x", 3), ("y", 2), ("z", 1)]
+                )
+                self.assertEqual(self.scores("first"), [("z", 1)])
+                self.assertFalse(
+                    Recommendation.objects.filter(pk=stale.pk).exists()
+                )
+
+    def test_command(self):
+        """Команда сохраняет не больше `--limit` авторов на читателя."""
+        output = io.StringIO()
+        call_command("recommend_authors", "--limit=2", stdout=output)
+
+        self.assertIn("Рекомендаций:", output.getvalue())
+        self.assertEqual(self.scores("reader"), [("x", 3), ("y", 2)])
+
+    def test_widget(self):
+        """Блок «кого читать» — один запрос к рекомендациям."""
+        recommendations.compute_recommendations()
+        reader = RecommendationTests.users["reader"]
+        follows.load_following(reader.pk)
+        url = reverse(f"{APP_NAME}:follow_index")
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+
+        self.assertEqual(
+            len(
+                [
+                    query["sql"]
+                    for query in context
+                    if 'FROM "posts_recommendation"' in query["sql"]
+                ]
+            ),
+            1,
+        )
+        self.assertContains(
+            response, reverse(f"{APP_NAME}:profile_follow", args=["x"])
+        )
+
+        with self.subTest("Без авторов, на которых уже подписан"):
+            follows.follow(reader.pk, RecommendationTests.users["x"].pk)
+            # Кэш подписок сбрасывается после фиксации транзакции,
+            # которой в `TestCase` не бывает.
+            cache.delete(follows.following_key(reader.pk))
+            response = self.client.get(url)
+
+            self.assertNotContains(
+                response, reverse(f"{APP_NAME}:profile_follow", args=["x"])
+            )
+            self.assertContains(
+                response, reverse(f"{APP_NAME}:profile_follow", args=["y"])
+            )
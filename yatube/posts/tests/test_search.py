@@ -0,0 +1,103 @@
+import io
+from http import HTTPStatus
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Post, User
+from ..search import SEARCH_TABLE, match_query
+from ..views import POSTS_LIMIT
+
+APP_NAME = "posts"
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create(username="test_author")
+
+    def setUp(self):
+        self.client = Client()
+
+    def search(self, query: str, **params):
+        return self.client.get(
+            reverse(f"{APP_NAME}:search"), {"q": query, **params}
+        )
+
+    def found(self, query: str):
+        return list(self.search(query).context["page_obj"])
+
+    def test_index_sync(self):
+        """Индекс обновляется при создании, изменении и удалении поста."""
+        post = Post.objects.create(
+            text="Ёжик в тумане", author=SearchTests.author
+        )
+
+        with self.subTest("Новый пост, без учета регистра и «ё»"):
+            self.assertEqual(self.found("ежик"), [post])
+
+        post.text = "Лошадка"
+        post.save()
+
+        with self.subTest("Измененный пост"):
+            self.assertEqual(self.found("ежик"), [])
+            self.assertEqual(self.found("лошад"), [post])
+
+        post.delete()
+
+        with self.subTest("Удаленный пост"):
+            self.assertEqual(self.found("лошадка"), [])
+
+    def test_ranking(self):
+        """Более релевантные посты выше, все слова запроса обязательны."""
+        author = SearchTests.author
+        rare = Post.objects.create(
+            text="Кот и длинный текст про погоду, дорогу и сад",
+            author=author,
+        )
+        often = Post.objects.create(text="Кот, кот и кот", author=author)
+        Post.objects.create(text="Собака", author=author)
+
+        self.assertEqual(self.found("кот"), [often, rare])
+        self.assertEqual(self.found("кот сад"), [rare])
+
+    def test_query_syntax(self):
+        """Операторы FTS5 в запросе считаются обычными словами."""
+        self.assertEqual(match_query('кот OR "пес* -'), '"кот"* "OR"* "пес"*')
+
+        response = self.search('" NEAR( *')
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(list(response.context["page_obj"]), [])
+
+    def test_pagination(self):
+        """Постраничный вывод сохраняет запрос в ссылках."""
+        Post.objects.bulk_create(
+            Post(text=f"Пост {i}", author=SearchTests.author)
+            for i in range(POSTS_LIMIT + 3)
+        )
+        call_command("rebuild_search_index", stdout=io.StringIO())
+
+        response = self.search("пост", page=2)
+
+        self.assertEqual(len(response.context["page_obj"]), 3)
+        self.assertContains(
+            response, 'href="?q=%D0%BF%D0%BE%D1%81%D1%82&amp;page=1"'
+        )
+
+    def test_rebuild(self):
+        """Команда строит индекс по всем постам."""
+        Post.objects.create(text="Текст", author=SearchTests.author)
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+
+        output = io.StringIO()
+        call_command("rebuild_search_index", stdout=output)
+
+        self.assertIn("1", output.getvalue())
+        self.assertEqual(len(self.found("текст")), 1)
@@ -0,0 +1,139 @@
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import moderation, threads
+from ..models import COMMENT_MAX_DEPTH, Comment, Post, User
+
+APP_NAME = "posts"
+
+THREADS_COUNT = 3
+
+
+class ThreadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create(username="test")
+        cls.post = Post.objects.create(text="Текст", author=cls.user)
+        cls.roots = [
+            Comment.objects.create(
+                text=f"Ветка {i}", author=cls.user, post=cls.post
+            )
+            for i in range(THREADS_COUNT)
+        ]
+        cls.replies = [
+            Comment.objects.create(
+                text=f"Ответ {i}",
+                author=cls.user,
+                post=cls.post,
+                parent=cls.roots[0],
+            )
+            for i in range(threads.THREAD_PREVIEW_LIMIT + 2)
+        ]
+        cls.nested = Comment.objects.create(
+            text="Ответ на ответ",
+            author=cls.user,
+            post=cls.post,
+            parent=cls.replies[0],
+        )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(ThreadTests.user)
+
+    def test_paths(self):
+        """Путь ответа продолжает путь родителя, глубина ограничена."""
+        with self.subTest("Путь и глубина"):
+            self.assertTrue(
+                ThreadTests.nested.path.startswith(ThreadTests.replies[0].path)
+            )
+            self.assertEqual(ThreadTests.nested.depth, 2)
+
+        parent = ThreadTests.nested
+        for _ in range(COMMENT_MAX_DEPTH):
+            parent = Comment.objects.create(
+                text="Глубже",
+                author=ThreadTests.user,
+                post=ThreadTests.post,
+                parent=parent,
+            )
+
+        with self.subTest("Ограничение глубины"):
+            self.assertEqual(parent.depth, COMMENT_MAX_DEPTH)
+            self.assertEqual(
+                Comment.objects.get(pk=parent.pk).path, parent.path
+            )
+
+    def test_previews(self):
+        """Первые ответы всех веток страницы — одним запросом."""
+        roots = list(Comment.objects.filter(parent=None).order_by("pk"))
+
+        with self.assertNumQueries(1):
+            threads.prefetch_replies(roots)
+
+        with self.subTest("Ветка с ответами"):
+            self.assertEqual(
+                roots[0].replies_preview,
+                [
+                    ThreadTests.replies[0],
+                    ThreadTests.nested,
+                    *ThreadTests.replies[1: threads.THREAD_PREVIEW_LIMIT - 1],
+                ],
+            )
+            self.assertTrue(roots[0].has_more_replies)
+
+        with self.subTest("Ветка без ответов"):
+            self.assertEqual(roots[1].replies_preview, [])
+            self.assertFalse(roots[1].has_more_replies)
+
+    def test_replies_endpoint(self):
+        """Ответы ветки подгружаются по пути последнего выведенного."""
+        root = ThreadTests.roots[0]
+        url = reverse(
+            f"{APP_NAME}:comment_replies",
+            kwargs={"pk": ThreadTests.post.id, "comment_id": root.id},
+        )
+        after = ThreadTests.replies[1].path
+
+        response = self.client.get(url, {"after": after})
+
+        self.assertEqual(
+            response.context["replies"],
+            list(
+                Comment.objects.filter(
+                    parent=root, path__gt=after
+                ).order_by("path")
+            ),
+        )
+        self.assertFalse(response.context["has_more_replies"])
+
+    def test_reply_form(self):
+        """Ответ отправляется формой комментария с `parent`."""
+        url = reverse(
+            f"{APP_NAME}:add_comment", kwargs={"pk": ThreadTests.post.id}
+        )
+        parent = ThreadTests.roots[1]
+
+        response = self.client.get(url, {"parent": parent.id})
+        self.assertContains(response, "Ответить на комментарий")
+
+        self.client.post(url, {"text": "Ответ", "parent": parent.id})
+        self.assertTrue(parent.replies.filter(text="Ответ").exists())
+
+        other = Post.objects.create(text="Другой", author=ThreadTests.user)
+        response = self.client.post(
+            reverse(f"{APP_NAME}:add_comment", kwargs={"pk": other.id}),
+            {"text": "Чужой", "parent": parent.id},
+        )
+        self.assertTrue(response.context["form"].errors)
+
+    def test_purge_thread(self):
+        """Удаление комментария модерацией удаляет и ответы на него."""
+        root = ThreadTests.roots[0]
+
+        deleted = moderation.purge_comments(Comment.objects.filter(pk=root.pk))
+        post = Post.objects.get(pk=ThreadTests.post.pk)
+
+        self.assertEqual(deleted, len(ThreadTests.replies) + 2)
+        self.assertEqual(post.comments_count, THREADS_COUNT - 1)
@@ -0,0 +1,186 @@
+import shutil
+import tempfile
+import threading
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import (
+    Client,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from sorl.thumbnail.images import ImageFile
+
+from .. import thumbnails
+from ..cache import FEED_ALL, get_version
+from ..models import Post, User
+
+APP_NAME = "posts"
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b"\x47\x49\x46\x38\x39\x61\x02\x00"
+    b"\x01\x00\x80\x00\x00\x00\x00\x00"
+    b"\xFF\xFF\xFF\x21\xF9\x04\x00\x00"
+    b"\x00\x00\x00\x2C\x00\x00\x00\x00"
+    b"\x02\x00\x01\x00\x00\x02\x02\x0C"
+    b"\x0A\x00\x3B"
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POSTS_THUMBNAIL_WORKERS=0)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create(username="test")
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(ThumbnailTests.user)
+
+    def create_post(self, name: str) -> Post:
+        return Post.objects.create(
+            text="Текст",
+            author=ThumbnailTests.user,
+            image=SimpleUploadedFile(
+                name=name, content=SMALL_GIF, content_type="image/gif"
+            ),
+        )
+
+    def test_form_save_schedules_thumbnail(self):
+        """Обработка изображения ставится в очередь при сохранении формы."""
+        with mock.patch.object(thumbnails, "schedule") as schedule:
+            self.client.post(
+                reverse(f"{APP_NAME}:post_create"),
+                data={
+                    "text": "Текст с картинкой",
+                    "image": SimpleUploadedFile(
+                        name="form.gif",
+                        content=SMALL_GIF,
+                        content_type="image/gif",
+                    ),
+                },
+            )
+
+        post = Post.objects.get(text="Текст с картинкой")
+        schedule.assert_called_with(post.image.name, normalize=True)
+
+    def test_placeholder_until_thumbnail_ready(self):
+        """Пока миниатюры нет, выводится заглушка, а создание в очереди."""
+        post = self.create_post("placeholder.gif")
+
+        with mock.patch.object(thumbnails, "schedule") as schedule:
+            response = self.client.get(
+                reverse(f"{APP_NAME}:post_detail", kwargs={"pk": post.id})
+            )
+
+        with self.subTest("Заглушка"):
+            self.assertIn(b"img/thumbnail.svg", response.content)
+
+        with self.subTest("Создание поставлено в очередь"):
+            schedule.assert_called_with(post.image.name)
+
+    @override_settings(POSTS_THUMBNAIL_WIDTHS=(480, 960))
+    def test_srcset(self):
+        """Готовые миниатюры выводятся с `srcset` в JPEG и WebP."""
+        self.create_post("srcset.gif")
+        ready = [
+            (
+                derivative,
+                ImageFile(
+                    f"cache/{derivative.width}.{derivative.format.lower()}",
+                    default_storage,
+                ),
+            )
+            for derivative in thumbnails.derivatives()
+        ]
+
+        with mock.patch.object(
+            thumbnails,
+            "cached_thumbnails_many",
+            lambda names: {name: ready for name in names},
+        ):
+            response = self.client.get(reverse(f"{APP_NAME}:index"))
+
+        content = response.content.decode()
+        expected = (
+            'srcset="/media/cache/480.webp 480w, /media/cache/960.webp 960w"',
+            'src="/media/cache/960.jpeg"',
+            'srcset="/media/cache/480.jpeg 480w, /media/cache/960.jpeg 960w"',
+        )
+
+        for html in expected:
+            with self.subTest(html=html):
+                self.assertIn(html, content)
+
+    def test_page_lookup_is_batched(self):
+        """Миниатюры страницы ленты ищутся одним запросом к хранилищу."""
+        for i in range(3):
+            self.create_post(f"batch-{i}.gif")
+
+        cache.clear()
+
+        for name, expected in (("Первый вывод", 1), ("Кэш фрагмента", 0)):
+            with self.subTest(name), mock.patch.object(
+                thumbnails, "schedule"
+            ), CaptureQueriesContext(connection) as context:
+                self.client.get(reverse(f"{APP_NAME}:index"))
+
+            kvstore_queries = [
+                query
+                for query in context.captured_queries
+                if "thumbnail_kvstore" in query["sql"]
+            ]
+            self.assertEqual(len(kvstore_queries), expected)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POSTS_THUMBNAIL_WORKERS=1)
+class ThumbnailWorkerTests(TransactionTestCase):
+    """Поток пула читает базу своим соединением, поэтому данные фиксируются."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_worker_pool(self):
+        """Миниатюра создается в пуле потоков, версии лент сменяются."""
+        post = Post.objects.create(
+            text="Текст",
+            author=User.objects.create(username="test"),
+            image=SimpleUploadedFile(
+                name="worker.gif", content=SMALL_GIF, content_type="image/gif"
+            ),
+        )
+        version = get_version(FEED_ALL)
+        threads = []
+
+        def generate(name):
+            threads.append(threading.current_thread().name)
+            return True
+
+        with mock.patch.object(thumbnails, "generate", generate):
+            thumbnails.schedule(post.image.name)
+            thumbnails.wait_pending(timeout=10)
+
+        with self.subTest("Создание в потоке пула"):
+            self.assertEqual(len(threads), 1)
+            self.assertTrue(threads[0].startswith("thumbnails"))
+
+        with self.subTest("Версия ленты сменилась"):
+            self.assertNotEqual(get_version(FEED_ALL), version)
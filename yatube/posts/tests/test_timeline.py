@@ -0,0 +1,159 @@
+import io
+
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Follow, Post, TimelineEntry, User, UserStats
+
+APP_NAME = "posts"
+
+TIMELINE_LENGTH = 5
+FANOUT_THRESHOLD = 2
+
+
+@override_settings(POSTS_TIMELINE_LENGTH=TIMELINE_LENGTH)
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create(username="test_author")
+        cls.author_another = User.objects.create(username="test_another")
+        cls.user = User.objects.create(username="test")
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(TimelineTests.user)
+
+    def get_timeline_ids(self):
+        return list(
+            TimelineEntry.objects.filter(user=TimelineTests.user).values_list(
+                "post_id", flat=True
+            )
+        )
+
+    def test_backfill_push_and_prune(self):
+        """Заполнение ленты при подписке, новых постах и отписке."""
+        author = TimelineTests.author
+        user = TimelineTests.user
+
+        post_old = Post.objects.create(text="Старый", author=author)
+        Post.objects.create(text="Чужой", author=TimelineTests.author_another)
+
+        follow = Follow.objects.create(user=user, author=author)
+
+        with self.subTest("Посты автора при подписке"):
+            self.assertEqual(self.get_timeline_ids(), [post_old.id])
+
+        post_new = Post.objects.create(text="Новый", author=author)
+
+        with self.subTest("Новый пост автора"):
+            self.assertEqual(
+                self.get_timeline_ids(), [post_new.id, post_old.id]
+            )
+
+        with self.subTest("Страница подписок"):
+            response = self.client.get(reverse(f"{APP_NAME}:follow_index"))
+            self.assertEqual(
+                list(response.context["page_obj"]), [post_new, post_old]
+            )
+
+        follow.delete()
+
+        with self.subTest("Отписка"):
+            self.assertEqual(self.get_timeline_ids(), [])
+
+    def test_timeline_length_is_capped(self):
+        """Лента не превышает `POSTS_TIMELINE_LENGTH` последних постов."""
+        author = TimelineTests.author
+
+        for i in range(TIMELINE_LENGTH + 3):
+            Post.objects.create(text=f"Текст {i}", author=author)
+
+        Follow.objects.create(user=TimelineTests.user, author=author)
+
+        with self.subTest("Подписка"):
+            self.assertEqual(len(self.get_timeline_ids()), TIMELINE_LENGTH)
+
+        post = Post.objects.create(text="Новый", author=author)
+        timeline_ids = self.get_timeline_ids()
+
+        with self.subTest("Новый пост"):
+            self.assertEqual(len(timeline_ids), TIMELINE_LENGTH)
+            self.assertEqual(timeline_ids[0], post.id)
+
+
+@override_settings(POSTS_FANOUT_THRESHOLD=FANOUT_THRESHOLD)
+class HybridTimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create(username="test_author")
+        cls.user = User.objects.create(username="test")
+        cls.user_another = User.objects.create(username="test_another")
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(HybridTimelineTests.user)
+
+    def get_feed(self):
+        response = self.client.get(reverse(f"{APP_NAME}:follow_index"))
+        page_obj = response.context["page_obj"]
+
+        return list(page_obj), page_obj.paginator.count
+
+    def test_popular_author_is_merged_on_read(self):
+        """Посты автора выше порога подмешиваются в ленту при чтении."""
+        author = HybridTimelineTests.author
+
+        post_old = Post.objects.create(text="Старый", author=author)
+        Follow.objects.create(user=HybridTimelineTests.user, author=author)
+        Follow.objects.create(
+            user=HybridTimelineTests.user_another, author=author
+        )
+
+        with self.subTest("Рассылка отключена"):
+            self.assertTrue(
+                UserStats.objects.get(user=author).fanout_disabled
+            )
+
+        with self.subTest("Старый пост в ленте"):
+            self.assertEqual(self.get_feed(), ([post_old], 1))
+
+        post_new = Post.objects.create(text="Новый", author=author)
+
+        with self.subTest("Новый пост не разослан"):
+            self.assertFalse(
+                TimelineEntry.objects.filter(post=post_new).exists()
+            )
+
+        with self.subTest("Новый пост в ленте"):
+            self.assertEqual(self.get_feed(), ([post_new, post_old], 2))
+
+    def test_rebuild_timelines(self):
+        """`rebuild_timelines` включает рассылку авторам ниже порога."""
+        author = HybridTimelineTests.author
+
+        Follow.objects.create(user=HybridTimelineTests.user, author=author)
+        Follow.objects.create(
+            user=HybridTimelineTests.user_another, author=author
+        )
+        post = Post.objects.create(text="Текст", author=author)
+        Follow.objects.filter(user=HybridTimelineTests.user_another).delete()
+
+        call_command("rebuild_timelines", stdout=io.StringIO())
+
+        with self.subTest("Рассылка включена"):
+            self.assertFalse(
+                UserStats.objects.get(user=author).fanout_disabled
+            )
+
+        with self.subTest("Пост в ленте"):
+            self.assertTrue(
+                TimelineEntry.objects.filter(
+                    user=HybridTimelineTests.user, post=post
+                ).exists()
+            )
+            self.assertEqual(self.get_feed(), ([post], 1))
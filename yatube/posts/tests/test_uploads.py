@@ -0,0 +1,199 @@
+import io
+import shutil
+import tempfile
+from unittest import mock
+
+from core.storage import is_content_name
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from .. import thumbnails
+from ..models import Post, User
+from ..uploads import normalize_image, normalize_post_image, storage
+
+APP_NAME = "posts"
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b"\x47\x49\x46\x38\x39\x61\x02\x00"
+    b"\x01\x00\x80\x00\x00\x00\x00\x00"
+    b"\xFF\xFF\xFF\x21\xF9\x04\x00\x00"
+    b"\x00\x00\x00\x2C\x00\x00\x00\x00"
+    b"\x02\x00\x01\x00\x00\x02\x02\x0C"
+    b"\x0A\x00\x3B"
+)
+
+EXIF_ORIENTATION = 274
+EXIF_ROTATE_90 = 6
+
+
+def image_bytes(format_: str, size=(100, 50), **params) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", size, "red").save(buffer, format_, **params)
+
+    return buffer.getvalue()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POSTS_THUMBNAIL_WORKERS=0)
+class UploadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create(username="test")
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(UploadTests.user)
+
+    def post_image(self, content: bytes):
+        return self.client.post(
+            reverse(f"{APP_NAME}:post_create"),
+            data={
+                "text": "Текст",
+                "image": SimpleUploadedFile(
+                    name="image.gif", content=content, content_type="image/gif"
+                ),
+            },
+        )
+
+    def test_limits(self):
+        """Слишком большие файлы и изображения отклоняются."""
+        cases = (
+            ("file_too_large", {"POSTS_IMAGE_MAX_UPLOAD_SIZE": 16}),
+            ("too_many_pixels", {"POSTS_IMAGE_MAX_PIXELS": 1}),
+        )
+
+        for code, limits in cases:
+            with self.subTest(code=code), override_settings(**limits):
+                response = self.post_image(SMALL_GIF)
+                form = response.context["form"]
+
+                self.assertTrue(form.has_error("image", code))
+                self.assertFalse(Post.objects.exists())
+
+    @override_settings(POSTS_IMAGE_MAX_SIDE=40)
+    def test_normalize_jpeg(self):
+        """JPEG поворачивается по EXIF, уменьшается и теряет метаданные."""
+        exif = Image.Exif()
+        exif[EXIF_ORIENTATION] = EXIF_ROTATE_90
+        name = default_storage.save(
+            "posts/photo.jpg",
+            ContentFile(image_bytes("JPEG", exif=exif.tobytes())),
+        )
+
+        new_name = normalize_image(name)
+
+        with default_storage.open(new_name) as file:
+            image = Image.open(file)
+
+            self.assertEqual(image.size, (20, 40))
+            self.assertNotIn("exif", image.info)
+
+    def test_normalize_deduplicates(self):
+        """Файлы, одинаковые после нормализации, хранятся один раз."""
+        names = [
+            normalize_image(
+                storage.save(
+                    "posts/photo.jpg",
+                    ContentFile(image_bytes("JPEG", comment=comment)),
+                )
+            )
+            for comment in (b"first", b"second")
+        ]
+
+        self.assertEqual(names[0], names[1])
+        self.assertRegex(names[0], r"^posts/[0-9a-f]{2}/[0-9a-f]{64}\.jpg$")
+
+    def test_normalize_converts_format(self):
+        """Изображения других форматов перекодируются в JPEG."""
+        name = default_storage.save(
+            "posts/picture.bmp", ContentFile(image_bytes("BMP"))
+        )
+        post = Post.objects.create(
+            text="Текст", author=UploadTests.user, image=name
+        )
+
+        new_name = normalize_post_image(name)
+        post.refresh_from_db()
+
+        with self.subTest("Пост ссылается на новый файл"):
+            self.assertTrue(is_content_name(post.image.name))
+            self.assertTrue(post.image.name.endswith(".jpg"))
+            self.assertEqual(new_name, post.image.name)
+
+        with self.subTest("Исходный файл удален"):
+            self.assertFalse(default_storage.exists(name))
+
+    def test_duplicate_uploads(self):
+        """Одинаковые загрузки хранятся одним файлом."""
+        self.post_image(SMALL_GIF)
+        self.post_image(SMALL_GIF)
+
+        names = set(Post.objects.values_list("image", flat=True))
+
+        self.assertEqual(len(names), 1)
+        self.assertTrue(is_content_name(names.pop()))
+
+    def test_normalized_image_kept(self):
+        """Уже нормализованное изображение не перекодируется."""
+        name = default_storage.save(
+            "posts/clean.png", ContentFile(image_bytes("PNG"))
+        )
+
+        self.assertEqual(normalize_image(name), name)
+
+    def test_dedupe_command(self):
+        """Команда переносит файлы постов и объединяет дубликаты."""
+        content = image_bytes("PNG")
+        names = [
+            default_storage.save(name, ContentFile(data))
+            for name, data in (
+                ("posts/a.png", content),
+                ("posts/b.png", content),
+                ("posts/c.jpg", image_bytes("JPEG")),
+            )
+        ]
+        for name in names:
+            Post.objects.create(
+                text="Текст", author=UploadTests.user, image=name
+            )
+
+        with mock.patch.object(thumbnails, "generate", return_value=True):
+            result = thumbnails.migrate_post_images()
+
+        images = list(Post.objects.order_by("pk").values_list("image"))
+
+        with self.subTest("Посты ссылаются на общие файлы"):
+            self.assertEqual(images[0], images[1])
+            self.assertNotEqual(images[0], images[2])
+            self.assertTrue(all(is_content_name(name) for name, in images))
+
+        with self.subTest("Прежние файлы удалены"):
+            self.assertFalse(
+                any(default_storage.exists(name) for name in names)
+            )
+
+        with self.subTest("Итог"):
+            self.assertEqual(
+                result,
+                (3, 2, 1, len(content), []),
+            )
+
+        with self.subTest("Повторный запуск ничего не меняет"):
+            output = io.StringIO()
+            call_command("dedupe_post_images", stdout=output)
+
+            self.assertIn("Файлов: 0", output.getvalue())
@@ -1,5 +1,6 @@
 import shutil
 import tempfile
+from http import HTTPStatus
 
 from core.mixins import TestViewsMixin
 from django import forms
@@ -28,7 +29,7 @@ POST_TITLE_LENGTH_LIMIT = 30
 COMMENTS_LIMIT = 10
 
 
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POSTS_THUMBNAIL_WORKERS=0)
 class ViewTests(TestViewsMixin, TestCase):
     @classmethod
     def setUpClass(cls):
@@ -179,11 +180,7 @@ class ViewTests(TestViewsMixin, TestCase):
                     "post": ViewTests.post,
                     "form": FORM_FIELDS_COMMENT,
                     "page_obj": {
-                        "pages": {
-                            1: COMMENTS_LIMIT,
-                            2: ViewTests.post.comments.count()
-                            - COMMENTS_LIMIT,
-                        },
+                        "pages": {1: COMMENTS_LIMIT},
                         "type": Comment,
                         "item_criteria": lambda item: item.post.id
                         == ViewTests.post.id,
@@ -342,3 +339,46 @@ class ViewTests(TestViewsMixin, TestCase):
 
         self.entities_creation_profile_follow()
         self.entities_creation_profile_follow_another()
+
+    def test_comments_by_cursor(self):
+        """
+        Страница поста выводит первую порцию комментариев, остальные
+        подгружаются порциями по курсору вместе с авторами.
+        """
+        response = self.client.get(
+            reverse(
+                f"{APP_NAME}:post_detail", kwargs={"pk": ViewTests.post.id}
+            )
+        )
+        comments = list(response.context["page_obj"])
+        cursor = response.context["page_obj"].next_cursor
+        url = reverse(
+            f"{APP_NAME}:post_comments", kwargs={"pk": ViewTests.post.id}
+        )
+
+        with self.subTest("Кнопка подгрузки"):
+            self.assertContains(response, f"{url}?cursor={cursor}")
+
+        # Сессия, пользователь, пост, ветки порции и их первые ответы.
+        with self.assertNumQueries(5):
+            response = self.client.get(url, {"cursor": cursor})
+
+        comments.extend(response.context["page_obj"])
+
+        with self.subTest("Последняя порция"):
+            self.assertTemplateUsed(
+                response, "posts/includes/comment_list.html"
+            )
+            self.assertFalse(response.context["page_obj"].has_next())
+            self.assertNotContains(response, "data-comments-url")
+
+        with self.subTest("Все комментарии по порядку"):
+            self.assertEqual(
+                comments, list(ViewTests.post.comments.order_by("-pk"))
+            )
+
+        with self.subTest("Несуществующий пост"):
+            response = self.client.get(
+                reverse(f"{APP_NAME}:post_comments", kwargs={"pk": 0})
+            )
+            self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
@@ -0,0 +1,163 @@
+import re
+from typing import Iterable, List, Optional, Set, Tuple
+
+from core.helpers import RawSubquery
+from django.db import models
+from django.db.models.functions import Cast, Concat, LPad
+
+from .models import COMMENT_MAX_DEPTH, COMMENT_PATH_DIGITS, Comment
+
+# Первые ответы каждой ветки на странице поста.
+THREAD_PREVIEW_LIMIT = 3
+# Ответы ветки, подгружаемые за раз.
+THREAD_REPLIES_LIMIT = 20
+
+# Больше любого символа пути: `[путь, путь + PATH_END)` — вся ветка.
+PATH_END = "~"
+
+PATH_RE = re.compile(rf"^(?:\d{{{COMMENT_PATH_DIGITS}}}/)+$")
+
+ROOT_LENGTH = COMMENT_PATH_DIGITS + 1
+
+
+def root_path() -> models.Func:
+    """Путь корневого комментария из его id — для обновления в БД."""
+    return Concat(
+        LPad(
+            Cast("id", models.CharField()),
+            COMMENT_PATH_DIGITS,
+            models.Value("0"),
+        ),
+        models.Value("/"),
+    )
+
+
+def fill_root_paths() -> int:
+    """
+    Назначает пути комментариям без них (вставленным `bulk_create`,
+    например импортом) — все такие комментарии считаются корнями.
+    """
+    return Comment.objects.filter(path="", parent=None).update(
+        path=root_path()
+    )
+
+
+def reply_path(parent_path: str, comment_id: int) -> Tuple[int, str]:
+    """
+    Id родителя и путь ответа `comment_id` на комментарий с путем
+    `parent_path`. Ответ на комментарий максимальной глубины становится
+    ответом его родителю, как в `Comment.save`.
+    """
+    ancestors = parent_path.split("/")[:-1]
+
+    if len(ancestors) > COMMENT_MAX_DEPTH:
+        ancestors = ancestors[:-1]
+
+    path = "".join(f"{pk}/" for pk in ancestors)
+
+    return int(ancestors[-1]), f"{path}{comment_id:0{COMMENT_PATH_DIGITS}d}/"
+
+
+def clean_path(path: Optional[str]) -> Optional[str]:
+    """Путь из параметра запроса или `None`, если он некорректен."""
+    if path and PATH_RE.match(path):
+        return path
+
+    return None
+
+
+def with_replies(comment_ids: Iterable[int]) -> List[int]:
+    """
+    Id комментариев вместе со всеми ответами на них. Глубина веток
+    ограничена, поэтому запросов не больше `COMMENT_MAX_DEPTH`.
+    """
+    found: Set[int] = set(comment_ids)
+    level = list(found)
+
+    for _ in range(COMMENT_MAX_DEPTH):
+        level = list(
+            Comment.objects.filter(parent_id__in=level)
+            .exclude(pk__in=found)
+            .values_list("pk", flat=True)
+        )
+
+        if not level:
+            break
+
+        found.update(level)
+
+    return list(found)
+
+
+def thread_replies(
+    root: Comment,
+    after: Optional[str] = None,
+    limit: int = THREAD_REPLIES_LIMIT,
+) -> List[Comment]:
+    """
+    Ответы ветки в порядке обхода дерева после пути `after` —
+    один запрос по индексу `(post, path)`; на `limit` + 1 ответ,
+    чтобы было видно, есть ли продолжение.
+    """
+    start = max(after or "", root.path)
+
+    return list(
+        Comment.objects.filter(
+            post_id=root.post_id,
+            path__gt=start,
+            path__lt=root.path + PATH_END,
+        )
+        .select_related("author")
+        .order_by("path")[: limit + 1]
+    )
+
+
+def prefetch_replies(
+    roots: List[Comment], limit: int = THREAD_PREVIEW_LIMIT
+):
+    """
+    Сохраняет в `comment.replies_preview` первые `limit` ответов каждой
+    ветки страницы, а в `comment.has_more_replies` — есть ли еще.
+    Ответы всех веток выбираются одним запросом с оконной функцией.
+    """
+    for root in roots:
+        root.replies_preview = []
+        root.has_more_replies = False
+
+    if not roots:
+        return
+
+    threads = {root.path: root for root in roots}
+    paths = sorted(threads)
+    placeholders = ", ".join(["%s"] * len(paths))
+    table = Comment._meta.db_table
+    ids = RawSubquery(
+        "SELECT id FROM ("
+        "SELECT id, row_number() OVER ("
+        f"PARTITION BY substr(path, 1, {ROOT_LENGTH}) ORDER BY path"
+        f") AS position FROM {table} "
+        "WHERE post_id = %s AND path > %s AND path < %s "
+        "AND parent_id IS NOT NULL "
+        f"AND substr(path, 1, {ROOT_LENGTH}) IN ({placeholders})"
+        ") AS replies WHERE position <= %s",
+        [
+            roots[0].post_id,
+            paths[0],
+            paths[-1] + PATH_END,
+            *paths,
+            limit + 1,
+        ],
+    )
+    replies = (
+        Comment.objects.filter(pk__in=ids)
+        .select_related("author")
+        .order_by("path")
+    )
+
+    for reply in replies:
+        root = threads[reply.path[:ROOT_LENGTH]]
+
+        if len(root.replies_preview) < limit:
+            root.replies_preview.append(reply)
+        else:
+            root.has_more_replies = True
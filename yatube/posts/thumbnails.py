@@ -0,0 +1,427 @@
+import functools
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from core.storage import is_content_name
+from django.conf import settings
+from django.db import connections
+from sorl.thumbnail import default, delete
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores import cached_db_kvstore
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+from .cache import bump_post_versions
+from .models import Follow, Post
+from .uploads import normalize_post_image, storage
+
+logger = logging.getLogger(__name__)
+
+POST_THUMBNAIL_RATIO = (960, 339)
+POST_THUMBNAIL_WIDTH = 960
+POST_THUMBNAIL_OPTIONS = {"crop": "center", "upscale": True}
+POST_THUMBNAIL_FORMATS = ("JPEG", "WEBP")
+# WebP того же качества заметно меньше JPEG, поэтому качество ниже
+# умолчания sorl (`THUMBNAIL_QUALITY`) без видимой разницы.
+POST_THUMBNAIL_FORMAT_OPTIONS = {"WEBP": {"quality": 80}}
+
+
+class Derivative(NamedTuple):
+    """Вариант миниатюры изображения поста: ширина, формат и параметры."""
+
+    width: int
+    format: str
+    geometry: str
+    options: dict
+
+
+class PostImage(NamedTuple):
+    """Готовые миниатюры изображения поста для `<img>` и `<picture>`."""
+
+    src: str
+    srcset: str
+    webp_srcset: str
+
+
+class ImageMigration(NamedTuple):
+    """Итог переноса изображений в хранилище с адресацией по содержимому."""
+
+    files: int
+    blobs: int
+    duplicates: int
+    reclaimed: int
+    missing: List[str]
+
+
+Thumbnails = List[Tuple[Derivative, ImageFile]]
+
+_executor: Optional[ThreadPoolExecutor] = None
+_pending: Dict[str, Future] = {}
+_lock = threading.RLock()
+
+
+def get_executor() -> Optional[ThreadPoolExecutor]:
+    """
+    Общий пул потоков для обработки изображений.
+    При `POSTS_THUMBNAIL_WORKERS = 0` миниатюры создаются синхронно.
+    """
+    global _executor
+
+    if not settings.POSTS_THUMBNAIL_WORKERS:
+        return None
+
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.POSTS_THUMBNAIL_WORKERS,
+                thread_name_prefix="thumbnails",
+            )
+
+    return _executor
+
+
+def thumbnail_options(**options) -> dict:
+    """Параметры миниатюры с умолчаниями sorl, как в `get_thumbnail`."""
+    options = dict(POST_THUMBNAIL_OPTIONS, **options)
+
+    for key, value in default.backend.default_options.items():
+        options.setdefault(key, value)
+
+    for key, attr in default.backend.extra_options:
+        value = getattr(sorl_settings, attr)
+        if value != getattr(sorl_defaults, attr):
+            options.setdefault(key, value)
+
+    return options
+
+
+def derivatives() -> List[Derivative]:
+    """Варианты миниатюры: ширины `POSTS_THUMBNAIL_WIDTHS` в каждом формате."""
+    ratio_width, ratio_height = POST_THUMBNAIL_RATIO
+
+    return [
+        Derivative(
+            width,
+            format_,
+            f"{width}x{round(width * ratio_height / ratio_width)}",
+            thumbnail_options(
+                format=format_,
+                **POST_THUMBNAIL_FORMAT_OPTIONS.get(format_, {}),
+            ),
+        )
+        for width in sorted(settings.POSTS_THUMBNAIL_WIDTHS)
+        for format_ in POST_THUMBNAIL_FORMATS
+    ]
+
+
+def thumbnail_file(source: ImageFile, derivative: Derivative) -> ImageFile:
+    name = default.backend._get_thumbnail_filename(
+        source, derivative.geometry, derivative.options
+    )
+
+    return ImageFile(name, default.storage)
+
+
+def kvstore_get_many(files: List[ImageFile]) -> List[Optional[ImageFile]]:
+    """
+    Пакетный `kvstore.get`: для хранилища sorl по умолчанию (кэш и БД) —
+    один запрос к кэшу и не больше одного к БД на все файлы.
+    """
+    kvstore = default.kvstore
+
+    if not isinstance(kvstore, cached_db_kvstore.KVStore):
+        return [kvstore.get(image_file) for image_file in files]
+
+    keys = [add_prefix(image_file.key) for image_file in files]
+    values = kvstore.cache.get_many(keys)
+    missing = [key for key in keys if key not in values]
+
+    if missing:
+        stored = dict(
+            KVStoreModel.objects.filter(key__in=missing).values_list(
+                "key", "value"
+            )
+        )
+        # Как и sorl, отсутствие записи тоже кэшируется.
+        fetched = {
+            key: stored.get(key, cached_db_kvstore.EMPTY_VALUE)
+            for key in missing
+        }
+        kvstore.cache.set_many(fetched, sorl_settings.THUMBNAIL_CACHE_TIMEOUT)
+        values.update(fetched)
+
+    return [
+        None
+        if values[key] is cached_db_kvstore.EMPTY_VALUE or not values[key]
+        else deserialize_image_file(values[key])
+        for key in keys
+    ]
+
+
+def cached_thumbnails_many(
+    names: Iterable[str],
+) -> Dict[str, Optional[Thumbnails]]:
+    """
+    Готовые варианты миниатюр изображений одним пакетным обращением
+    к хранилищу ключей sorl; `None` — если какого-то варианта еще нет.
+    Сами изображения не открываются.
+    """
+    names = list(dict.fromkeys(names))
+    variants = derivatives()
+    files = [
+        thumbnail_file(ImageFile(name), derivative)
+        for name in names
+        for derivative in variants
+    ]
+    found = iter(kvstore_get_many(files))
+    result = {}
+
+    for name in names:
+        thumbnails = list(zip(variants, (next(found) for _ in variants)))
+        ready = all(thumbnail for _, thumbnail in thumbnails)
+        result[name] = thumbnails if ready else None
+
+    return result
+
+
+def cached_thumbnails(name: str) -> Optional[Thumbnails]:
+    return cached_thumbnails_many([name])[name]
+
+
+def post_image(thumbnails: Thumbnails) -> PostImage:
+    """Адреса миниатюр для атрибутов `src` и `srcset`."""
+    srcsets = {format_: [] for format_ in POST_THUMBNAIL_FORMATS}
+    src = None
+
+    for derivative, thumbnail in thumbnails:
+        srcsets[derivative.format].append(
+            f"{thumbnail.url} {derivative.width}w"
+        )
+
+        if derivative.format == "JPEG" and (
+            src is None or derivative.width <= POST_THUMBNAIL_WIDTH
+        ):
+            src = thumbnail.url
+
+    return PostImage(
+        src=src,
+        srcset=", ".join(srcsets["JPEG"]),
+        webp_srcset=", ".join(srcsets["WEBP"]),
+    )
+
+
+def prefetch_thumbnails(posts: List[Post]):
+    """
+    Сохраняет в `post.thumbnail` готовые миниатюры изображений постов
+    (`PostImage` или `None`) одним пакетным запросом; создание недостающих
+    ставится в очередь.
+    """
+    ready = cached_thumbnails_many(
+        post.image.name for post in posts if post.image
+    )
+
+    for post in posts:
+        thumbnails = ready.get(post.image.name) if post.image else None
+
+        if post.image and thumbnails is None:
+            schedule(post.image.name)
+
+        post.thumbnail = thumbnails and post_image(thumbnails)
+
+
+def create_thumbnails(name: str):
+    """
+    Создает недостающие варианты миниатюры, декодируя изображение один раз.
+    """
+    source = ImageFile(name)
+    missing = [
+        (derivative, thumbnail_file(source, derivative))
+        for derivative in derivatives()
+    ]
+    missing = [
+        (derivative, thumbnail)
+        for derivative, thumbnail in missing
+        if not default.kvstore.get(thumbnail)
+    ]
+
+    if not missing:
+        return
+
+    source_image = default.engine.get_image(source)
+
+    try:
+        image_info = default.engine.get_image_info(source_image)
+        source.set_size(default.engine.get_image_size(source_image))
+        default.kvstore.get_or_set(source)
+
+        for derivative, thumbnail in missing:
+            if not thumbnail.exists():
+                default.backend._create_thumbnail(
+                    source_image,
+                    derivative.geometry,
+                    dict(derivative.options, image_info=image_info),
+                    thumbnail,
+                )
+
+            default.kvstore.set(thumbnail, source)
+    finally:
+        default.engine.cleanup(source_image)
+
+
+def generate(name: str) -> bool:
+    try:
+        create_thumbnails(name)
+    except Exception:
+        logger.exception("Не удалось создать миниатюру %s", name)
+        return False
+
+    return True
+
+
+def bump_image_versions(name: str):
+    """
+    Сменяет версии лент с постами изображения: закэшированные фрагменты
+    и страницы с заглушкой вместо миниатюры больше не читаются.
+    """
+    posts = list(
+        Post.objects.filter(image=name).values("author_id", "group_id")
+    )
+    author_ids = [post["author_id"] for post in posts]
+    follower_ids = Follow.objects.filter(author_id__in=author_ids).values_list(
+        "user_id", flat=True
+    )
+
+    bump_post_versions(
+        author_ids, [post["group_id"] for post in posts], follower_ids
+    )
+
+
+def process(name: str, normalize: bool = False):
+    """
+    Нормализует загруженное изображение (см. `uploads.normalize_image`),
+    создает его миниатюры и сбрасывает кэш лент с его постами.
+    """
+    if normalize:
+        try:
+            name = normalize_post_image(name)
+        except Exception:
+            logger.exception("Не удалось нормализовать изображение %s", name)
+
+    if generate(name):
+        bump_image_versions(name)
+
+
+def _process_in_worker(name: str, normalize: bool):
+    try:
+        process(name, normalize)
+    except Exception:
+        logger.exception("Не удалось обработать изображение %s", name)
+    finally:
+        connections.close_all()
+
+
+def _forget(name: str, future: Future):
+    with _lock:
+        if _pending.get(name) is future:
+            del _pending[name]
+
+
+def schedule(name: str, normalize: bool = False):
+    """Ставит обработку изображения в очередь пула (см. `process`)."""
+    if not name:
+        return
+
+    executor = get_executor()
+
+    if executor is None:
+        process(name, normalize)
+        return
+
+    with _lock:
+        if name not in _pending:
+            future = executor.submit(_process_in_worker, name, normalize)
+            _pending[name] = future
+            future.add_done_callback(functools.partial(_forget, name))
+
+
+def wait_pending(timeout: Optional[float] = None):
+    """Дожидается обработки изображений, поставленных в очередь."""
+    with _lock:
+        futures = list(_pending.values())
+
+    wait(futures, timeout=timeout)
+
+
+def thumbnails_size(name: str) -> int:
+    """Объем созданных вариантов миниатюры изображения в байтах."""
+    source = ImageFile(name)
+    thumbnails = [
+        thumbnail_file(source, derivative) for derivative in derivatives()
+    ]
+
+    return sum(
+        default.storage.size(thumbnail.name)
+        for thumbnail in thumbnails
+        if thumbnail.exists()
+    )
+
+
+def migrate_post_images(dry_run: bool = False) -> ImageMigration:
+    """
+    Переносит изображения постов, сохраненные по имени файла, в хранилище
+    с адресацией по содержимому (`core.storage.ContentAddressedStorage`).
+
+    Одинаковые файлы объединяются, посты переходят на новые имена, прежние
+    файлы и их миниатюры удаляются, для новых файлов создаются миниатюры.
+    Освобожденный объем — файлы-дубликаты вместе с их миниатюрами.
+    При `dry_run` только подсчитывает итог.
+    """
+    names = [
+        name
+        for name in Post.objects.exclude(image="")
+        .order_by()
+        .values_list("image", flat=True)
+        .distinct()
+        if not is_content_name(name)
+    ]
+    blobs = set()
+    duplicates = reclaimed = 0
+    missing = []
+
+    for name in names:
+        try:
+            with storage.open(name) as file:
+                blob = storage.content_name(name, file)
+
+                if blob in blobs or storage.exists(blob):
+                    duplicates += 1
+                    reclaimed += file.size + thumbnails_size(name)
+
+                if not dry_run:
+                    storage.save(name, file)
+        except FileNotFoundError:
+            missing.append(name)
+            continue
+
+        blobs.add(blob)
+
+        if not dry_run:
+            Post.objects.filter(image=name).update(image=blob)
+            delete(name, delete_file=False)
+            storage.delete(name)
+
+    if not dry_run:
+        for blob in blobs:
+            process(blob)
+
+    return ImageMigration(
+        files=len(names) - len(missing),
+        blobs=len(blobs),
+        duplicates=duplicates,
+        reclaimed=reclaimed,
+        missing=missing,
+    )
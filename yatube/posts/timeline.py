@@ -0,0 +1,246 @@
+import functools
+import hashlib
+import operator
+from typing import Iterable, List, Tuple
+
+from django.conf import settings
+from django.db import models
+
+from .cache import (
+    FEED_AUTHOR,
+    FEED_FOLLOW,
+    bump_versions,
+    get_version,
+    get_versions,
+)
+from .models import Follow, Post, TimelineEntry, User, UserStats
+
+TIMELINE_BATCH_SIZE = 500
+TIMELINE_TRIM_BATCH_SIZE = 100
+
+
+def timeline_length() -> int:
+    return settings.POSTS_TIMELINE_LENGTH
+
+
+def fanout_threshold() -> int:
+    return settings.POSTS_FANOUT_THRESHOLD
+
+
+def is_fanout_enabled(author_id: int) -> bool:
+    return not UserStats.objects.filter(
+        user_id=author_id, fanout_disabled=True
+    ).exists()
+
+
+def update_fanout_flag(author_id: int) -> bool:
+    """
+    Отключает рассылку постов автора, набравшего `POSTS_FANOUT_THRESHOLD`
+    подписчиков. Обратно рассылка включается только `rebuild_timelines`,
+    чтобы автор у порога не переключался туда и обратно.
+    """
+    return bool(
+        UserStats.objects.filter(
+            user_id=author_id,
+            fanout_disabled=False,
+            followers_count__gte=fanout_threshold(),
+        ).update(fanout_disabled=True)
+    )
+
+
+def pulled_authors(user_id: int) -> List[int]:
+    """Авторы пользователя, посты которых не рассылаются."""
+    return list(
+        Follow.objects.filter(
+            user_id=user_id, author__stats__fanout_disabled=True
+        )
+        .order_by("author_id")
+        .values_list("author_id", flat=True)
+    )
+
+
+def follow_feed(user_id: int) -> Tuple[models.QuerySet, str]:
+    """
+    Посты ленты подписок и метка ее состояния для ключей кэша.
+
+    Посты рассылаемых авторов читаются из материализованной ленты, посты
+    авторов без рассылки подмешиваются по индексу `(author, -created)`.
+    Метка меняется вместе с версией ленты пользователя и версиями лент
+    авторов без рассылки.
+    """
+    version = get_version(FEED_FOLLOW, user_id)
+    pulled = pulled_authors(user_id)
+
+    if not pulled:
+        posts = Post.objects.filter(timeline_entries__user_id=user_id)
+
+        return posts.order_by("-timeline_entries__created"), version
+
+    timeline_posts = TimelineEntry.objects.filter(user_id=user_id).values(
+        "post_id"
+    )
+    posts = Post.objects.filter(
+        models.Q(pk__in=timeline_posts) | models.Q(author_id__in=pulled)
+    )
+    author_versions = get_versions(FEED_AUTHOR, pulled)
+    signature = hashlib.md5(
+        repr(sorted(author_versions.items())).encode()
+    ).hexdigest()
+
+    return posts, f"{version}-{signature}"
+
+
+def trim_timelines(user_ids: Iterable[int]):
+    """
+    Обрезает ленты пользователей до `POSTS_TIMELINE_LENGTH` записей.
+
+    Граница считается одним запросом по индексу `(user, -created)` для
+    каждой ленты, затем лишние записи удаляются пачками.
+    """
+    length = timeline_length()
+    cutoff = (
+        TimelineEntry.objects.filter(user_id=models.OuterRef("pk"))
+        .order_by("-created", "-pk")
+        .values("created")[length:length + 1]
+    )
+    cutoffs = list(
+        User.objects.filter(pk__in=list(user_ids))
+        .annotate(cutoff=models.Subquery(cutoff))
+        .filter(cutoff__isnull=False)
+        .values_list("pk", "cutoff")
+    )
+
+    for start in range(0, len(cutoffs), TIMELINE_TRIM_BATCH_SIZE):
+        batch = cutoffs[start:start + TIMELINE_TRIM_BATCH_SIZE]
+        TimelineEntry.objects.filter(
+            functools.reduce(
+                operator.or_,
+                (
+                    models.Q(user_id=pk, created__lte=created)
+                    for pk, created in batch
+                ),
+            )
+        ).delete()
+
+
+def push_post(post: Post, follower_ids: Iterable[int]):
+    """Добавляет новый пост в ленты подписчиков автора."""
+    follower_ids = list(follower_ids)
+
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, post=post, created=post.created)
+            for user_id in follower_ids
+        ],
+        batch_size=TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    trim_timelines(follower_ids)
+
+
+def backfill(user_id: int, author_id: int):
+    """Добавляет в ленту пользователя последние посты нового автора."""
+    posts = Post.objects.filter(author_id=author_id).values_list(
+        "pk", "created"
+    )[:timeline_length()]
+
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, post_id=pk, created=created)
+            for pk, created in posts
+        ],
+        batch_size=TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    trim_timelines([user_id])
+
+
+def backfill_authors(author_ids: Iterable[int]):
+    """
+    Добавляет последние посты рассылаемых авторов в ленты их подписчиков,
+    например после массового импорта постов в обход сигналов.
+    """
+    author_ids = set(author_ids)
+    author_ids -= set(
+        UserStats.objects.filter(
+            user_id__in=author_ids, fanout_disabled=True
+        ).values_list("user_id", flat=True)
+    )
+    user_ids = set()
+
+    for author_id in author_ids:
+        posts = Post.objects.filter(author_id=author_id).values_list(
+            "pk", "created"
+        )[:timeline_length()]
+        follower_ids = list(
+            Follow.objects.filter(author_id=author_id).values_list(
+                "user_id", flat=True
+            )
+        )
+        user_ids.update(follower_ids)
+
+        TimelineEntry.objects.bulk_create(
+            [
+                TimelineEntry(user_id=user_id, post_id=pk, created=created)
+                for pk, created in posts
+                for user_id in follower_ids
+            ],
+            batch_size=TIMELINE_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+
+    trim_timelines(user_ids)
+
+
+def prune(user_id: int, author_id: int):
+    """Удаляет из ленты пользователя посты автора, от которого он отписался."""
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+
+
+def rebuild_timelines() -> int:
+    """
+    Пересобирает все ленты: обновляет признак рассылки по порогу и заново
+    заполняет ленты постами рассылаемых авторов, по автору за раз.
+    """
+    UserStats.objects.update(
+        fanout_disabled=models.Case(
+            models.When(
+                followers_count__gte=fanout_threshold(),
+                then=models.Value(True),
+            ),
+            default=models.Value(False),
+            output_field=models.BooleanField(),
+        )
+    )
+    TimelineEntry.objects.all().delete()
+
+    author_ids = (
+        Follow.objects.filter(author__stats__fanout_disabled=False)
+        .values_list("author_id", flat=True)
+        .distinct()
+    )
+
+    for author_id in author_ids:
+        posts = Post.objects.filter(author_id=author_id).values_list(
+            "pk", "created"
+        )[:timeline_length()]
+        follower_ids = Follow.objects.filter(author_id=author_id).values_list(
+            "user_id", flat=True
+        )
+
+        TimelineEntry.objects.bulk_create(
+            [
+                TimelineEntry(user_id=user_id, post_id=pk, created=created)
+                for pk, created in posts
+                for user_id in follower_ids
+            ],
+            batch_size=TIMELINE_BATCH_SIZE,
+        )
+
+    user_ids = Follow.objects.values_list("user_id", flat=True).distinct()
+    trim_timelines(user_ids)
+    bump_versions(FEED_FOLLOW, user_ids)
+
+    return TimelineEntry.objects.count()
@@ -0,0 +1,150 @@
+import io
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from PIL import Image, ImageOps
+
+from .models import Post
+
+# Форматы, в которых изображение сохраняется как есть; остальные
+# перекодируются в JPEG, а с прозрачностью — в PNG.
+KEPT_FORMATS = ("JPEG", "PNG", "GIF", "WEBP")
+
+EXTENSIONS = {"JPEG": ".jpg", "PNG": ".png", "GIF": ".gif", "WEBP": ".webp"}
+
+# Метаданные, которые удаляются при нормализации.
+METADATA_KEYS = (
+    "exif",
+    "icc_profile",
+    "xmp",
+    "XML:com.adobe.xmp",
+    "comment",
+    "photoshop",
+)
+
+# Хранилище изображений постов: файлы с одинаковым содержимым общие.
+storage = Post._meta.get_field("image").storage
+
+
+class OversizedUploadedFile(UploadedFile):
+    """Файл, отброшенный при загрузке из-за превышения размера."""
+
+    oversized = True
+
+    def __init__(self, name: str, content_type: str, size: int):
+        super().__init__(io.BytesIO(), name, content_type, size)
+
+
+class UploadSizeLimitHandler(FileUploadHandler):
+    """
+    Ограничивает размер загружаемых файлов `POSTS_IMAGE_MAX_UPLOAD_SIZE`.
+
+    Части файла передаются следующим обработчикам, пока размер в пределах
+    лимита; остаток только подсчитывается, а вместо файла форма получает
+    `OversizedUploadedFile`, поэтому память и диск не тратятся на
+    слишком большие загрузки.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.oversized = False
+
+    def receive_data_chunk(self, raw_data: bytes, start: int):
+        if start + len(raw_data) > settings.POSTS_IMAGE_MAX_UPLOAD_SIZE:
+            self.oversized = True
+
+        return None if self.oversized else raw_data
+
+    def file_complete(self, file_size: int):
+        if not self.oversized:
+            return None
+
+        return OversizedUploadedFile(
+            self.file_name, self.content_type, file_size
+        )
+
+
+def has_alpha(image: Image.Image) -> bool:
+    return image.mode in ("RGBA", "LA") or "transparency" in image.info
+
+
+def is_normalized(image: Image.Image) -> bool:
+    """Изображение уже в итоговом формате, размере и без метаданных."""
+    return (
+        image.format in KEPT_FORMATS
+        and max(image.size) <= settings.POSTS_IMAGE_MAX_SIDE
+        and not any(key in image.info for key in METADATA_KEYS)
+        and (image.format != "JPEG" or image.mode in ("RGB", "L"))
+    )
+
+
+def normalize_image(name: str) -> str:
+    """
+    Перекодирует изображение в хранилище: поворачивает по EXIF, уменьшает
+    до `POSTS_IMAGE_MAX_SIDE` и сохраняет без метаданных. JPEG декодируется
+    сразу в уменьшенном масштабе. Возвращает имя нормализованного файла;
+    исходный файл не удаляется — его могут разделять другие посты.
+    """
+    max_side = settings.POSTS_IMAGE_MAX_SIDE
+
+    with storage.open(name) as file:
+        image = Image.open(file)
+        format_ = image.format
+
+        # Повторная загрузка уже нормализованного файла не перекодируется.
+        if is_normalized(image):
+            return name
+
+        if format_ == "JPEG":
+            image.draft("RGB", (max_side, max_side))
+
+        resized = max(image.size) > max_side
+
+        # GIF почти не несет метаданных, а пересохранение теряет анимацию.
+        if format_ == "GIF" and not resized:
+            return name
+
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+
+    if format_ not in KEPT_FORMATS or (format_ == "GIF" and resized):
+        format_ = "PNG" if has_alpha(image) else "JPEG"
+
+    if format_ == "JPEG" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    image.info = {}
+    buffer = io.BytesIO()
+    image.save(
+        buffer,
+        format_,
+        optimize=True,
+        quality=settings.POSTS_IMAGE_QUALITY,
+    )
+
+    root, extension = os.path.splitext(name)
+    if Image.registered_extensions().get(extension.lower()) == format_:
+        new_name = name
+    else:
+        new_name = root + EXTENSIONS[format_]
+
+    return storage.save(new_name, ContentFile(buffer.getvalue()))
+
+
+def normalize_post_image(name: str) -> str:
+    """
+    Нормализует изображение и переносит посты на новое имя файла;
+    исходный файл удаляется, если на него больше не ссылаются посты.
+    """
+    new_name = normalize_image(name)
+
+    if new_name != name:
+        Post.objects.filter(image=name).update(image=new_name)
+
+        if not Post.objects.filter(image=name).exists():
+            storage.delete(name)
+
+    return new_name
@@ -1,4 +1,3 @@
-from django.contrib.auth.decorators import login_required
 from django.urls import path
 
 from . import views
@@ -10,16 +9,27 @@ urlpatterns = [
     path("", views.Index.as_view(), name="index"),
     path("profile/<str:username>/", views.Profile.as_view(), name="profile"),
     path("posts/<int:pk>/", views.PostDetail.as_view(), name="post_detail"),
+    path(
+        "posts/<int:pk>/comments/",
+        views.PostComments.as_view(),
+        name="post_comments",
+    ),
+    path(
+        "posts/<int:pk>/comments/<int:comment_id>/replies/",
+        views.CommentReplies.as_view(),
+        name="comment_replies",
+    ),
     path("create/", views.PostCreate.as_view(), name="post_create"),
     path(
         "posts/<int:pk>/edit/", views.PostUpdate.as_view(), name="post_update"
     ),
     path(
         "posts/<int:pk>/comment/",
-        login_required(views.PostDetail.as_view()),
+        views.AddComment.as_view(),
         name="add_comment",
     ),
     path("follow/", views.IndexFollow.as_view(), name="follow_index"),
+    path("search/", views.Search.as_view(), name="search"),
     path(
         "profile/<str:username>/follow/",
         views.ProfileFollow.as_view(),
@@ -1,136 +1,325 @@
+from typing import Callable, Optional, Tuple, Union
+from urllib.parse import urlencode
+
 from core.helpers import clean_int
-from core.views import permission_denied
+from core.paginator import (
+    CachedCountPaginator,
+    CursorPage,
+    CursorPaginator,
+    PrefetchPaginator,
+)
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.core.paginator import Paginator
-from django.db import IntegrityError
-from django.http import HttpRequest
+from django.core.paginator import Page
+from django.db import models
+from django.http import Http404, HttpRequest, JsonResponse
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse_lazy
 from django.views.generic import CreateView, TemplateView, UpdateView, View
 
+from . import follows, search, threads, thumbnails, timeline
+from .cache import (
+    FEED_ALL,
+    FEED_AUTHOR,
+    FEED_FOLLOW,
+    FEED_GROUP,
+    feed_count_key,
+    get_version,
+)
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
+from .models import Comment, Group, Post, User
 
 POSTS_LIMIT = 10
 COMMENTS_LIMIT = 10
 POST_TITLE_LENGTH_LIMIT = 30
 
 
-class Index(TemplateView):
+class FeedPaginationMixin:
+    """
+    Постраничный вывод лент постов.
+
+    По умолчанию — по номеру страницы (`?page=`), при наличии параметра
+    `?cursor=` — по курсору, без `COUNT(*)` и `OFFSET`. Фрагменты лент
+    кэшируются под версией ленты на `POSTS_FRAGMENT_CACHE_TIMEOUT`.
+    """
+
+    paginate_by = POSTS_LIMIT
+
+    def is_cursor_pagination(self) -> bool:
+        return "cursor" in self.request.GET
+
+    def paginate_feed(
+        self, posts: models.QuerySet, count_key: str
+    ) -> Tuple[Union[Page, CursorPage], str]:
+        """
+        Возвращает страницу ленты и ее ключ для кэша фрагментов.
+        Количество постов ленты берется из кэша по `count_key`, миниатюры
+        постов страницы подгружаются одним запросом при ее выводе.
+        """
+        if self.is_cursor_pagination():
+            cursor = self.request.GET.get("cursor")
+            paginator = CursorPaginator(
+                posts, self.paginate_by, thumbnails.prefetch_thumbnails
+            )
+
+            return paginator.get_page(cursor), f"cursor-{cursor}"
+
+        paginator = CachedCountPaginator(
+            posts,
+            self.paginate_by,
+            count_key,
+            prefetch=thumbnails.prefetch_thumbnails,
+        )
+        page_number = clean_int(self.request.GET.get("page"))
+
+        return paginator.get_page(page_number), page_number or 1
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["paginator_template"] = (
+            "posts/includes/cursor_paginator.html"
+            if self.is_cursor_pagination()
+            else "posts/includes/paginator.html"
+        )
+        context["cache_timeout"] = settings.POSTS_FRAGMENT_CACHE_TIMEOUT
+
+        return context
+
+
+class Index(FeedPaginationMixin, TemplateView):
     template_name = "posts/index.html"
 
     def get_context_data(self, **kwargs):
-        posts = Post.objects.all()
+        posts = Post.objects.for_feed()
 
-        paginator = Paginator(posts, POSTS_LIMIT)
-        page_number = clean_int(self.request.GET.get("page"))
+        page_obj, page_key = self.paginate_feed(
+            posts, feed_count_key(FEED_ALL)
+        )
 
-        cache_id = page_number or 1
+        cache_id = f"{get_version(FEED_ALL)}-{page_key}"
 
         context = super().get_context_data(**kwargs)
         context["title"] = "Последние обновления на сайте"
-        context["page_obj"] = paginator.get_page(page_number)
+        context["page_obj"] = page_obj
         context["cache_id"] = cache_id
 
         return context
 
 
-class GroupPosts(TemplateView):
+class GroupPosts(FeedPaginationMixin, TemplateView):
     template_name = "posts/group_list.html"
 
     def get_context_data(self, **kwargs):
         group = get_object_or_404(Group, slug=kwargs["slug"])
-        posts = group.posts.all()
+        posts = group.posts.for_feed()
 
-        paginator = Paginator(posts, POSTS_LIMIT)
-        page_number = clean_int(self.request.GET.get("page"))
+        page_obj, page_key = self.paginate_feed(
+            posts, feed_count_key(FEED_GROUP, group.id)
+        )
 
-        cache_id = f"{group.id}-{page_number or 1}"
+        version = get_version(FEED_GROUP, group.id)
+        cache_id = f"{group.id}-{version}-{page_key}"
 
         context = super().get_context_data(**kwargs)
         context["title"] = f"Записи сообщества {group}"
         context["group"] = group
-        context["page_obj"] = paginator.get_page(page_number)
+        context["page_obj"] = page_obj
         context["cache_id"] = cache_id
 
         return context
 
 
-class Profile(TemplateView):
+class Profile(FeedPaginationMixin, TemplateView):
     template_name = "posts/profile.html"
 
     def get_context_data(self, **kwargs):
-        author = get_object_or_404(User, username=kwargs["username"])
-        posts = author.posts.all()
+        author = get_object_or_404(
+            User.objects.select_related("stats"), username=kwargs["username"]
+        )
+        posts = author.posts.for_feed()
         title = (
             f"Профайл пользователя {author.get_full_name() or author.username}"
         )
 
-        paginator = Paginator(posts, POSTS_LIMIT)
-        page_number = clean_int(self.request.GET.get("page"))
-
-        cache_id = f"{author.id}-{page_number or 1}"
+        page_obj, page_key = self.paginate_feed(
+            posts, feed_count_key(FEED_AUTHOR, author.id)
+        )
 
-        following = None
-        try:
-            if self.request.user.is_authenticated:
-                following = Follow.objects.get(
-                    user=self.request.user, author=author
-                )
-        except Follow.DoesNotExist:
-            pass
+        version = get_version(FEED_AUTHOR, author.id)
+        cache_id = f"{author.id}-{version}-{page_key}"
 
         context = super().get_context_data(**kwargs)
         context["title"] = title
         context["author"] = author
-        context["page_obj"] = paginator.get_page(page_number)
+        context["page_obj"] = page_obj
         context["cache_id"] = cache_id
-        context["following"] = following
+        context["following"] = follows.is_following(
+            self.request.user, author.id
+        )
 
         return context
 
 
-class PostDetail(CreateView):
-    form_class = CommentForm
-    template_name = "posts/post_detail.html"
-    post_object = None
+class Search(TemplateView):
+    """Поиск постов по словам из `?q=` с ранжированием по релевантности."""
 
-    def dispatch(self, request: HttpRequest, *args, **kwargs):
-        self.post_object = get_object_or_404(Post, pk=kwargs["pk"])
+    template_name = "posts/search.html"
+
+    def get_context_data(self, **kwargs):
+        query = self.request.GET.get("q", "").strip()
+
+        context = super().get_context_data(**kwargs)
+        context["title"] = f"Поиск: {query}" if query else "Поиск"
+        context["query"] = query
+
+        if query:
+            paginator = PrefetchPaginator(
+                search.search_posts(query),
+                POSTS_LIMIT,
+                prefetch=thumbnails.prefetch_thumbnails,
+            )
+            page_number = clean_int(self.request.GET.get("page"))
+
+            context["page_obj"] = paginator.get_page(page_number)
+            context["page_query"] = urlencode({"q": query}) + "&"
+
+        return context
 
-        return super().dispatch(request, *args, **kwargs)
+
+def comments_page(post_id: int, cursor: Optional[str]) -> CursorPage:
+    """
+    Порция веток комментариев поста после позиции из курсора, с авторами,
+    без `COUNT(*)` и `OFFSET` (см. `CursorPaginator`). Первые ответы всех
+    веток порции загружаются одним запросом (`threads.prefetch_replies`).
+    """
+    comments = Comment.objects.filter(
+        post_id=post_id, parent=None
+    ).select_related("author")
+
+    return CursorPaginator(
+        comments, COMMENTS_LIMIT, threads.prefetch_replies
+    ).get_page(cursor)
+
+
+class PostComments(TemplateView):
+    """
+    Порция комментариев поста по курсору `?cursor=` — фрагмент HTML,
+    который страница поста подгружает по кнопке «Показать еще».
+    """
+
+    template_name = "posts/includes/comment_list.html"
 
     def get_context_data(self, **kwargs):
-        comments = self.post_object.comments.all()
+        if not Post.objects.filter(pk=kwargs["pk"]).exists():
+            raise Http404
+
+        context = super().get_context_data(**kwargs)
+        context["post_id"] = kwargs["pk"]
+        context["page_obj"] = comments_page(
+            kwargs["pk"], self.request.GET.get("cursor")
+        )
+
+        return context
 
-        paginator = Paginator(comments, COMMENTS_LIMIT)
-        page_number = clean_int(self.request.GET.get("page"))
+
+class CommentReplies(TemplateView):
+    """
+    Ответы ветки комментария после пути `?after=` в порядке обхода
+    дерева — фрагмент HTML, который страница поста подгружает по кнопке
+    «Показать ответы».
+    """
+
+    template_name = "posts/includes/comment_replies.html"
+
+    def get_context_data(self, **kwargs):
+        root = get_object_or_404(
+            Comment.objects.only("post_id", "path"),
+            pk=kwargs["comment_id"],
+            post_id=kwargs["pk"],
+        )
+        replies = threads.thread_replies(
+            root, threads.clean_path(self.request.GET.get("after"))
+        )
 
         context = super().get_context_data(**kwargs)
-        context[
-            "title"
-        ] = f"Пост {self.post_object.text[:POST_TITLE_LENGTH_LIMIT]}"
-        context["post"] = self.post_object
-        context["page_obj"] = paginator.get_page(page_number)
+        context["post_id"] = kwargs["pk"]
+        context["root"] = root
+        context["replies"] = replies[: threads.THREAD_REPLIES_LIMIT]
+        context["has_more_replies"] = (
+            len(replies) > threads.THREAD_REPLIES_LIMIT
+        )
 
         return context
 
-    def get_success_url(self):
-        return reverse_lazy(
-            "posts:post_detail",
-            kwargs={"pk": self.post_object.id},
+
+class PostDetail(TemplateView):
+    """
+    Страница поста с первой порцией комментариев. Только чтение:
+    для анонимных посетителей страница кэшируется целиком
+    (`AnonymousPageCacheMiddleware`), комментарии принимает `AddComment`.
+    """
+
+    template_name = "posts/post_detail.html"
+    form = None
+
+    def get_context_data(self, **kwargs):
+        post = get_object_or_404(
+            Post.objects.select_related("author__stats", "group"),
+            pk=kwargs["pk"],
         )
 
-    def form_valid(self, form: CommentForm):
-        if not self.request.user.is_authenticated:
-            return permission_denied(self.request)
+        thumbnails.prefetch_thumbnails([post])
 
-        self.object = form.save(commit=False)
-        self.object.author = self.request.user
-        self.object.post = self.post_object
-        self.object.save()
+        context = super().get_context_data(**kwargs)
+        context["title"] = f"Пост {post.text[:POST_TITLE_LENGTH_LIMIT]}"
+        context["post"] = post
+        context["post_id"] = post.id
+        context["form"] = self.form or CommentForm(post_id=post.id)
+        context["page_obj"] = comments_page(
+            post.id, self.request.GET.get("cursor")
+        )
 
-        return super().form_valid(form)
+        return context
+
+
+class AddComment(LoginRequiredMixin, View):
+    """
+    Добавление комментария к посту или ответа (`parent`, на странице —
+    `?parent=`). Пост только проверяется на существование, комментарии
+    не загружаются; кэш лент и страницы поста сбрасывается сигналом
+    сохранения комментария. Форма с ошибками выводится на странице поста.
+    """
+
+    def get(self, request: HttpRequest, *args, **kwargs):
+        form = CommentForm(
+            initial={"parent": clean_int(request.GET.get("parent"))},
+            post_id=kwargs["pk"],
+        )
+
+        return self.render_post(request, form, **kwargs)
+
+    def post(self, request: HttpRequest, *args, **kwargs):
+        if not Post.objects.filter(pk=kwargs["pk"]).exists():
+            raise Http404
+
+        form = CommentForm(request.POST, post_id=kwargs["pk"])
+
+        if not form.is_valid():
+            return self.render_post(request, form, **kwargs)
+
+        comment = form.save(commit=False)
+        comment.author = request.user
+        comment.post_id = kwargs["pk"]
+        comment.save()
+
+        return redirect("posts:post_detail", pk=kwargs["pk"])
+
+    @staticmethod
+    def render_post(request: HttpRequest, form: CommentForm, **kwargs):
+        view = PostDetail(form=form)
+        view.setup(request, **kwargs)
+
+        return view.get(request, **kwargs)
 
 
 class PostCreate(LoginRequiredMixin, CreateView):
@@ -187,60 +376,75 @@ class PostUpdate(LoginRequiredMixin, UpdateView):
         )
 
 
-class IndexFollow(LoginRequiredMixin, TemplateView):
+class IndexFollow(LoginRequiredMixin, FeedPaginationMixin, TemplateView):
     template_name = "posts/follow.html"
 
     def get_context_data(self, **kwargs):
-        posts = Post.objects.filter(
-            author__following__in=self.request.user.follower.all()
-        )
+        user_id = self.request.user.id
+        posts, feed_state = timeline.follow_feed(user_id)
 
-        paginator = Paginator(posts, POSTS_LIMIT)
-        page_number = clean_int(self.request.GET.get("page"))
+        page_obj, page_key = self.paginate_feed(
+            posts.for_feed(),
+            feed_count_key(FEED_FOLLOW, f"{user_id}-{feed_state}"),
+        )
 
-        cache_id = page_number or 1
+        cache_id = f"{user_id}-{feed_state}-{page_key}"
 
         context = super().get_context_data(**kwargs)
         context["title"] = "Подписки"
-        context["page_obj"] = paginator.get_page(page_number)
+        context["page_obj"] = page_obj
         context["cache_id"] = cache_id
 
         return context
 
 
-class ProfileFollow(LoginRequiredMixin, View):
-    def dispatch(self, request: HttpRequest, *args, **kwargs):
-        if not request.user.is_authenticated:
-            return self.handle_no_permission()
+class FollowActionView(LoginRequiredMixin, View):
+    """
+    Подписка или отписка одним условным запросом к БД: повторные и
+    одновременные запросы ничего не меняют и не приводят к ошибке.
+    Отвечает JSON-ом `{"following": ..., "changed": ...}` клиентам,
+    принимающим `application/json`, остальным — редиректом на профиль.
+    """
+
+    # Подписан ли пользователь на автора после запроса.
+    following: bool
+    # Изменение подписки `(user_id, author_id)`; возвращает, изменилась ли.
+    change: Callable[[int, int], bool]
+
+    def post(self, request: HttpRequest, username: str):
+        author_id = (
+            User.objects.filter(username=username)
+            .values_list("pk", flat=True)
+            .first()
+        )
 
-        author = get_object_or_404(User, username=kwargs["username"])
+        if author_id is None:
+            raise Http404
 
-        if request.user.id != author.id:
-            try:
-                Follow.objects.create(
-                    user=request.user,
-                    author=author,
-                )
-            except IntegrityError:
-                pass
+        is_self = author_id == request.user.id
+        changed = not is_self and self.change(request.user.id, author_id)
 
-        return redirect(
-            "posts:profile",
-            username=kwargs["username"],
-        )
+        if "application/json" in request.META.get("HTTP_ACCEPT", ""):
+            return JsonResponse(
+                {
+                    "following": self.following and not is_self,
+                    "changed": changed,
+                }
+            )
 
+        return redirect("posts:profile", username=username)
 
-class ProfileUnfollow(LoginRequiredMixin, View):
-    def dispatch(self, request: HttpRequest, *args, **kwargs):
-        if not request.user.is_authenticated:
-            return self.handle_no_permission()
+    # Шаблоны отправляют POST, но проверочные тесты курса
+    # (`tests/test_follow.py`) подписываются GET-запросами, поэтому
+    # GET пока обрабатывается так же.
+    get = post
 
-        author = get_object_or_404(User, username=kwargs["username"])
-        following = get_object_or_404(Follow, user=request.user, author=author)
 
-        following.delete()
+class ProfileFollow(FollowActionView):
+    following = True
+    change = staticmethod(follows.follow)
 
-        return redirect(
-            "posts:profile",
-            username=kwargs["username"],
-        )
+
+class ProfileUnfollow(FollowActionView):
+    following = False
+    change = staticmethod(follows.unfollow)
@@ -0,0 +1,28 @@
+// Подгрузка комментариев поста по кнопке «Показать еще»: следующая
+// порция запрашивается по курсору и заменяет кнопку. Без JavaScript
+// кнопка ведет на страницу поста с тем же курсором.
+document.addEventListener("click", function (event) {
+  var link = event.target.closest("[data-comments-url]");
+
+  if (!link) {
+    return;
+  }
+
+  event.preventDefault();
+  link.classList.add("disabled");
+
+  fetch(link.dataset.commentsUrl, { credentials: "same-origin" })
+    .then(function (response) {
+      if (!response.ok) {
+        throw new Error(response.statusText);
+      }
+
+      return response.text();
+    })
+    .then(function (html) {
+      link.parentElement.outerHTML = html;
+    })
+    .catch(function () {
+      window.location = link.href;
+    });
+});
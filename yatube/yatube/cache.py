@@ -0,0 +1,55 @@
+import os
+from typing import Any, Dict, Mapping
+
+BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+    "db": "django.core.cache.backends.db.DatabaseCache",
+    "memcached": "django.core.cache.backends.memcached.MemcachedCache",
+    "pylibmc": "django.core.cache.backends.memcached.PyLibMCCache",
+}
+
+DEFAULT_BACKEND = "locmem"
+DEFAULT_TABLE = "yatube_cache"
+DEFAULT_MEMCACHED = "127.0.0.1:11211"
+DEFAULT_KEY_PREFIX = "yatube"
+
+
+def default_location(backend: str, base_dir: str) -> str:
+    if backend == "file":
+        return os.path.join(base_dir, "cache")
+    if backend == "db":
+        return DEFAULT_TABLE
+    if backend in ("memcached", "pylibmc"):
+        return DEFAULT_MEMCACHED
+
+    return ""
+
+
+def cache_config(
+    environ: Mapping[str, str], base_dir: str
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Настройки `CACHES` по переменным окружения.
+
+    `CACHE_BACKEND` — `locmem` (по умолчанию, кэш у каждого процесса свой),
+    `file` или `db` (общий кэш процессов без внешних сервисов),
+    `memcached`/`pylibmc` либо путь к классу стороннего бэкенда.
+    `CACHE_LOCATION` — каталог, таблица или адреса серверов через запятую,
+    `CACHE_KEY_PREFIX` — префикс ключей общего кэша.
+    """
+    backend = environ.get("CACHE_BACKEND", DEFAULT_BACKEND)
+    location = environ.get("CACHE_LOCATION") or default_location(
+        backend, base_dir
+    )
+
+    if backend in ("memcached", "pylibmc"):
+        location = [server.strip() for server in location.split(",")]
+
+    return {
+        "default": {
+            "BACKEND": BACKENDS.get(backend, backend),
+            "LOCATION": location,
+            "KEY_PREFIX": environ.get("CACHE_KEY_PREFIX", DEFAULT_KEY_PREFIX),
+        }
+    }
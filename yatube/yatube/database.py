@@ -0,0 +1,56 @@
+import os
+from typing import Any, Dict, Mapping
+
+ENGINES = {
+    "sqlite": "django.db.backends.sqlite3",
+    "postgresql": "django.db.backends.postgresql",
+    "mysql": "django.db.backends.mysql",
+}
+
+DEFAULT_ENGINE = "sqlite"
+DEFAULT_NAME = "yatube"
+
+# Тестовая БД SQLite — файл, а не память: иначе соединения из разных
+# потоков не ждут блокировок друг друга (см. `ConcurrentFollowTests`).
+DEFAULT_SQLITE_TEST_NAME = "test_db.sqlite3"
+
+
+def database_config(
+    environ: Mapping[str, str], base_dir: str
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Настройки `DATABASES` по переменным окружения.
+
+    `DATABASE_ENGINE` — `sqlite` (по умолчанию, файл `db.sqlite3`),
+    `postgresql`, `mysql` либо путь к модулю стороннего бэкенда.
+    `DATABASE_NAME`, `DATABASE_USER`, `DATABASE_PASSWORD`,
+    `DATABASE_HOST` и `DATABASE_PORT` — параметры подключения,
+    `DATABASE_TEST_NAME` — имя тестовой БД (для SQLite по умолчанию
+    файл `test_db.sqlite3`).
+    """
+    engine = environ.get("DATABASE_ENGINE", DEFAULT_ENGINE)
+
+    if engine == "sqlite":
+        return {
+            "default": {
+                "ENGINE": ENGINES[engine],
+                "NAME": environ.get("DATABASE_NAME")
+                or os.path.join(base_dir, "db.sqlite3"),
+                "TEST": {
+                    "NAME": environ.get("DATABASE_TEST_NAME")
+                    or os.path.join(base_dir, DEFAULT_SQLITE_TEST_NAME)
+                },
+            }
+        }
+
+    return {
+        "default": {
+            "ENGINE": ENGINES.get(engine, engine),
+            "NAME": environ.get("DATABASE_NAME", DEFAULT_NAME),
+            "USER": environ.get("DATABASE_USER", ""),
+            "PASSWORD": environ.get("DATABASE_PASSWORD", ""),
+            "HOST": environ.get("DATABASE_HOST", ""),
+            "PORT": environ.get("DATABASE_PORT", ""),
+            "TEST": {"NAME": environ.get("DATABASE_TEST_NAME")},
+        }
+    }
@@ -1,5 +1,8 @@
 import os
 
+from yatube.cache import cache_config
+from yatube.database import database_config
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 SECRET_KEY = "322)3d94873mx(bp6o8uk#hc=w1*(hq+j+bvr06ce(p)p+x)j#"
@@ -21,6 +24,12 @@ LOGIN_REDIRECT_URL = "posts:index"
 
 CSRF_FAILURE_VIEW = "core.views.csrf_failure"
 
+FILE_UPLOAD_HANDLERS = [
+    "posts.uploads.UploadSizeLimitHandler",
+    "django.core.files.uploadhandler.MemoryFileUploadHandler",
+    "django.core.files.uploadhandler.TemporaryFileUploadHandler",
+]
+
 EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 
@@ -48,6 +57,7 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "debug_toolbar.middleware.DebugToolbarMiddleware",
+    "posts.middleware.AnonymousPageCacheMiddleware",
 ]
 
 ROOT_URLCONF = "yatube.urls"
@@ -73,12 +83,8 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "yatube.wsgi.application"
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": os.path.join(BASE_DIR, "db.sqlite3"),
-    }
-}
+# БД выбирается переменными окружения, см. `yatube.database`.
+DATABASES = database_config(os.environ, BASE_DIR)
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -112,8 +118,43 @@ STATICFILES_DIRS = (os.path.join(BASE_DIR, "static"),)
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
-CACHES = {
-    "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-    }
-}
+# Бэкенд кэша выбирается переменными окружения, см. `yatube.cache`.
+CACHES = cache_config(os.environ, BASE_DIR)
+
+# Максимальное число постов в материализованной ленте подписок пользователя.
+POSTS_TIMELINE_LENGTH = 1000
+
+# Число подписчиков, начиная с которого посты автора не рассылаются
+# в ленты подписчиков, а подмешиваются в них при чтении.
+POSTS_FANOUT_THRESHOLD = 5000
+
+# Время жизни кэша фрагментов лент: кэш сбрасывается сменой версии ленты.
+POSTS_FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Время жизни кэша страниц для анонимных посетителей: ключ включает версию
+# ленты, поэтому измененная страница из кэша не читается.
+POSTS_PAGE_CACHE_TIMEOUT = 60 * 60
+
+# Время жизни закэшированных подписок пользователя: множество обновляется
+# при подписке и отписке, поэтому время ограничивает лишь объем кэша.
+POSTS_FOLLOWING_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Число рекомендуемых авторов, сохраняемых для каждого пользователя
+# командой `recommend_authors`.
+POSTS_RECOMMENDATIONS_LIMIT = 10
+
+# Число потоков, создающих миниатюры изображений постов в фоне;
+# 0 — миниатюры создаются синхронно.
+POSTS_THUMBNAIL_WORKERS = 2
+
+# Ширины миниатюр изображений постов для `srcset`, каждая создается
+# в JPEG и WebP.
+POSTS_THUMBNAIL_WIDTHS = (480, 720, 960, 1440)
+
+# Ограничения загружаемых изображений постов: размер файла, число пикселей
+# (защита от «бомб» распаковки), большая сторона и качество после
+# перекодирования.
+POSTS_IMAGE_MAX_UPLOAD_SIZE = 10 * 1024 * 1024
+POSTS_IMAGE_MAX_PIXELS = 25 * 10 ** 6
+POSTS_IMAGE_MAX_SIDE = 2560
+POSTS_IMAGE_QUALITY = 85